@@ -1,6 +1,8 @@
 import os
 import re
 import json
+import queue
+import threading
 import torch
 import librosa
 import soundfile
@@ -13,12 +15,16 @@ import torch
 
 from . import utils
 from . import commons
+from .audio_cache import AudioCache
+from .optimize import DTYPES, model_bytes, optimize_for_inference
 from .models import SynthesizerTrn
 from .split_utils import split_sentence
 from .mel_processing import spectrogram_torch, spectrogram_torch_conv
-from .download_utils import load_or_download_config, load_or_download_model
+from .download_utils import get_or_download_model_path, load_or_download_config, load_or_download_model
 
 class TTS(nn.Module):
+    backend = 'torch'
+
     def __init__(self, 
                 language,
                 device='auto',
@@ -55,11 +61,38 @@ class TTS(nn.Module):
         self.device = device
     
         # load state_dict
+        ckpt_path = get_or_download_model_path(language, use_hf=use_hf, ckpt_path=ckpt_path)
         checkpoint_dict = load_or_download_model(language, device, use_hf=use_hf, ckpt_path=ckpt_path)
+        self.model_files = [ckpt_path]
         self.model.load_state_dict(checkpoint_dict['model'], strict=True)
         
         language = language.split('_')[0]
         self.language = 'ZH_MIX_EN' if language == 'ZH' else language # we support a ZH_MIX_EN model
+        self.audio_cache = None
+        self.cache_fingerprint = None
+        self.dtype = torch.float32
+
+    def optimize_for_inference(self, dtype=None):
+        """Strip weight norm and training-only modules, optionally casting to 'float16' or 'bfloat16'."""
+        before = model_bytes(self.model)
+        removed = optimize_for_inference(self.model, dtype)
+        if dtype is not None:
+            self.dtype = DTYPES.get(dtype, dtype)
+            self.cache_fingerprint = None
+        print(f" > Removed weight norm from {removed} layers, "
+              f"{before / 2**20:.1f} MiB -> {model_bytes(self.model) / 2**20:.1f} MiB")
+
+    def enable_cache(self, max_bytes=64 * 1024 * 1024, disk_dir=None):
+        """Reuse synthesized sentences; hits skip text processing and the model entirely."""
+        self.audio_cache = AudioCache(max_bytes=max_bytes, disk_dir=disk_dir)
+        return self.audio_cache
+
+    def _cache_key(self, t, speaker_id, sdp_ratio, noise_scale, noise_scale_w, speed):
+        if self.audio_cache is None:
+            return None
+        if self.cache_fingerprint is None:
+            self.cache_fingerprint = AudioCache.model_fingerprint(self.model_files, self.dtype, self.backend)
+        return self.audio_cache.key(t, self.language, speaker_id, speed, sdp_ratio, noise_scale, noise_scale_w, model=self.cache_fingerprint)
 
     @staticmethod
     def audio_numpy_concat(segment_data_list, sr, speed=1.):
@@ -79,11 +112,160 @@ class TTS(nn.Module):
             print(" > ===========================")
         return texts
 
-    def tts_to_file(self, text, speaker_id, play_audio=False, output_path=None, sdp_ratio=0.2, noise_scale=0.6, noise_scale_w=0.8, speed=1.0, pbar=None, format=None, position=None, quiet=False,):
+    def _prepare(self, t):
+        language = self.language
+        if language in ['EN', 'ZH_MIX_EN']:
+            t = re.sub(r'([a-z])([A-Z])', r'\1 \2', t)
+        return utils.get_text_for_tts_infer(t, language, self.hps, self.device, self.symbol_to_id)
+
+    def _infer_batch(self, prepared, speaker_id, sdp_ratio=0.2, noise_scale=0.6, noise_scale_w=0.8, speed=1.0):
+        """Run one forward pass over several prepared sentences.
+
+        Inputs are zero-padded to the longest sentence; `infer` masks the
+        padding through `x_lengths`, and every output is cut to its own
+        `y_mask` length.
+        """
+        device = self.device
+        count = len(prepared)
+        lengths = [phones.size(0) for _, _, phones, _, _ in prepared]
+        max_length = max(lengths)
+        with torch.no_grad():
+            x_tst = torch.zeros(count, max_length, dtype=torch.long, device=device)
+            tones = torch.zeros(count, max_length, dtype=torch.long, device=device)
+            lang_ids = torch.zeros(count, max_length, dtype=torch.long, device=device)
+            bert = torch.zeros(count, prepared[0][0].size(0), max_length, dtype=self.dtype, device=device)
+            ja_bert = torch.zeros(count, prepared[0][1].size(0), max_length, dtype=self.dtype, device=device)
+            for index, (item_bert, item_ja_bert, phones, item_tones, item_lang_ids) in enumerate(prepared):
+                length = lengths[index]
+                x_tst[index, :length] = phones
+                tones[index, :length] = item_tones
+                lang_ids[index, :length] = item_lang_ids
+                bert[index, :, :length] = item_bert
+                ja_bert[index, :, :length] = item_ja_bert
+            x_tst_lengths = torch.LongTensor(lengths).to(device)
+            speakers = torch.LongTensor([speaker_id] * count).to(device)
+            o, _, y_mask, _ = self.model.infer(
+                    x_tst,
+                    x_tst_lengths,
+                    speakers,
+                    tones,
+                    lang_ids,
+                    bert,
+                    ja_bert,
+                    sdp_ratio=sdp_ratio,
+                    noise_scale=noise_scale,
+                    noise_scale_w=noise_scale_w,
+                    length_scale=1. / speed,
+                )
+            y_lengths = y_mask.float().sum(dim=(1, 2)).long() * self.hps.data.hop_length
+            audio = [o[index, 0, :y_lengths[index]].data.cpu().float().numpy() for index in range(count)]
+            del x_tst, tones, lang_ids, bert, ja_bert, x_tst_lengths, speakers, o, y_mask
+        return audio
+
+    def _synthesize(self, t, speaker_id, sdp_ratio=0.2, noise_scale=0.6, noise_scale_w=0.8, speed=1.0):
+        key = self._cache_key(t, speaker_id, sdp_ratio, noise_scale, noise_scale_w, speed)
+        if key is not None:
+            audio = self.audio_cache.get(key)
+            if audio is not None:
+                return audio
+        audio = self._infer_batch([self._prepare(t)], speaker_id, sdp_ratio, noise_scale, noise_scale_w, speed)[0]
+        if key is not None:
+            audio = self.audio_cache.put(key, audio)
+        return audio
+
+    def tts_batch(self, texts, speaker_id, batch_size=8, sdp_ratio=0.2, noise_scale=0.6, noise_scale_w=0.8, speed=1.0):
+        """Synthesize many sentences, `batch_size` at a time, and return their waveforms in input order.
+
+        Sentences are sorted by phone count before batching so each batch
+        pads as little as possible.
+        """
+        audio_list = [None] * len(texts)
+        keys = [self._cache_key(t, speaker_id, sdp_ratio, noise_scale, noise_scale_w, speed) for t in texts]
+        prepared = {}
+        for index, (t, key) in enumerate(zip(texts, keys)):
+            if key is not None:
+                audio_list[index] = self.audio_cache.get(key)
+            if audio_list[index] is None:
+                prepared[index] = self._prepare(t)
+
+        order = sorted(prepared, key=lambda index: prepared[index][2].size(0))
+        for start in range(0, len(order), max(1, batch_size)):
+            group = order[start:start + max(1, batch_size)]
+            outputs = self._infer_batch([prepared[index] for index in group], speaker_id, sdp_ratio, noise_scale, noise_scale_w, speed)
+            for index, audio in zip(group, outputs):
+                audio_list[index] = self.audio_cache.put(keys[index], audio) if keys[index] is not None else audio
+        return audio_list
+
+    def tts_stream(self, text, speaker_id, sdp_ratio=0.2, noise_scale=0.6, noise_scale_w=0.8, speed=1.0, dtype='float32', lookahead=1, quiet=True):
+        """Yield the waveform of each sentence as soon as it is synthesized.
+
+        Every chunk ends with the same short silence `tts_to_file` inserts
+        between sentences, so concatenating the chunks gives its output.
+        With `lookahead` > 0 a background thread synthesizes up to that many
+        sentences ahead while the caller plays the current one. `dtype` is
+        'float32' or 'int16'. Closing the generator stops the synthesis.
+        """
+        if dtype not in ('float32', 'int16'):
+            raise ValueError(f"Unsupported dtype: {dtype}")
+        texts = self.split_sentences_into_pieces(text, self.language, quiet)
+        sr = self.hps.data.sampling_rate
+        gap = np.zeros(int((sr * 0.05) / speed), dtype=np.float32)
+
+        def render(t):
+            audio = np.concatenate([self._synthesize(t, speaker_id, sdp_ratio, noise_scale, noise_scale_w, speed).reshape(-1), gap])
+            if dtype == 'int16':
+                return (np.clip(audio, -1.0, 1.0) * 32767).astype(np.int16)
+            return audio.astype(np.float32)
+
+        if lookahead <= 0:
+            for t in texts:
+                yield render(t)
+            return
+
+        chunks = queue.Queue(maxsize=lookahead)
+        stopped = threading.Event()
+        done = object()
+
+        def put(item):
+            while not stopped.is_set():
+                try:
+                    chunks.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def produce():
+            try:
+                for t in texts:
+                    if not put(render(t)):
+                        return
+            except Exception as exc:
+                put(exc)
+                return
+            put(done)
+
+        worker = threading.Thread(target=produce, name='tts-lookahead', daemon=True)
+        worker.start()
+        try:
+            while True:
+                item = chunks.get()
+                if item is done:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            stopped.set()
+
+    def tts_to_file(self, text, speaker_id, play_audio=False, output_path=None, sdp_ratio=0.2, noise_scale=0.6, noise_scale_w=0.8, speed=1.0, pbar=None, format=None, position=None, quiet=False, batch_size=1,):
         language = self.language
         texts = self.split_sentences_into_pieces(text, language, quiet)
         audio_list = []
-        if pbar:
+        if batch_size > 1:
+            tx = []
+            audio_list = self.tts_batch(texts, speaker_id, batch_size, sdp_ratio, noise_scale, noise_scale_w, speed)
+        elif pbar:
             tx = pbar(texts)
         else:
             if position:
@@ -93,35 +275,7 @@ class TTS(nn.Module):
             else:
                 tx = tqdm(texts)
         for t in tx:
-            if language in ['EN', 'ZH_MIX_EN']:
-                t = re.sub(r'([a-z])([A-Z])', r'\1 \2', t)
-            device = self.device
-            bert, ja_bert, phones, tones, lang_ids = utils.get_text_for_tts_infer(t, language, self.hps, device, self.symbol_to_id)
-            with torch.no_grad():
-                x_tst = phones.to(device).unsqueeze(0)
-                tones = tones.to(device).unsqueeze(0)
-                lang_ids = lang_ids.to(device).unsqueeze(0)
-                bert = bert.to(device).unsqueeze(0)
-                ja_bert = ja_bert.to(device).unsqueeze(0)
-                x_tst_lengths = torch.LongTensor([phones.size(0)]).to(device)
-                del phones
-                speakers = torch.LongTensor([speaker_id]).to(device)
-                audio = self.model.infer(
-                        x_tst,
-                        x_tst_lengths,
-                        speakers,
-                        tones,
-                        lang_ids,
-                        bert,
-                        ja_bert,
-                        sdp_ratio=sdp_ratio,
-                        noise_scale=noise_scale,
-                        noise_scale_w=noise_scale_w,
-                        length_scale=1. / speed,
-                    )[0][0, 0].data.cpu().float().numpy()
-                del x_tst, tones, lang_ids, bert, ja_bert, x_tst_lengths, speakers
-                # 
-            audio_list.append(audio)
+            audio_list.append(self._synthesize(t, speaker_id, sdp_ratio, noise_scale, noise_scale_w, speed))
         torch.cuda.empty_cache()
         audio = self.audio_numpy_concat(audio_list, sr=self.hps.data.sampling_rate, speed=speed)
 
@@ -133,3 +287,4 @@ class TTS(nn.Module):
                 soundfile.write(output_path, audio, self.hps.data.sampling_rate, format=format)
             else:
                 soundfile.write(output_path, audio, self.hps.data.sampling_rate)
+        return audio
@@ -0,0 +1,121 @@
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+class AudioCache:
+    """Sentence-level cache of synthesized float32 waveforms.
+
+    Entries are keyed by the normalized sentence plus every setting that
+    changes the audio, including a fingerprint of the model that produced
+    it (see `model_fingerprint`), so disk entries from an older checkpoint,
+    dtype or backend are never served. They live in an in-memory LRU bounded by `max_bytes`
+    and, with `disk_dir`, also as raw little-endian float32 PCM files that
+    survive restarts. Returned arrays are read-only and shared; copy before
+    modifying them.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, disk_dir=None):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    @staticmethod
+    def normalize(text):
+        return re.sub(r'\s+', ' ', text).strip()
+
+    @classmethod
+    def key(cls, text, language, speaker_id, speed, sdp_ratio, noise_scale, noise_scale_w, model=None):
+        fields = (cls.normalize(text), language, int(speaker_id), float(speed), float(sdp_ratio), float(noise_scale), float(noise_scale_w), model)
+        return hashlib.sha1(repr(fields).encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def model_fingerprint(paths, *settings):
+        """Short hash of model files (path, size, mtime) and settings such as dtype and backend."""
+        fields = []
+        for path in paths:
+            stat = os.stat(path)
+            fields.append((os.path.abspath(path), stat.st_size, stat.st_mtime_ns))
+        fields.extend(str(setting) for setting in settings)
+        return hashlib.sha1(repr(fields).encode('utf-8')).hexdigest()[:16]
+
+    def _path(self, key):
+        return os.path.join(self.disk_dir, f'{key}.pcm')
+
+    def _insert(self, key, audio):
+        previous = self.entries.pop(key, None)
+        if previous is not None:
+            self.bytes -= previous.nbytes
+        if audio.nbytes > self.max_bytes:
+            return
+        self.entries[key] = audio
+        self.bytes += audio.nbytes
+        while self.bytes > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.bytes -= evicted.nbytes
+
+    def get(self, key):
+        with self.lock:
+            audio = self.entries.get(key)
+            if audio is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return audio
+
+        if self.disk_dir:
+            try:
+                audio = np.fromfile(self._path(key), dtype='<f4')
+            except (FileNotFoundError, ValueError):
+                audio = None
+            if audio is not None:
+                audio.setflags(write=False)
+                with self.lock:
+                    self._insert(key, audio)
+                    self.disk_hits += 1
+                return audio
+
+        with self.lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, audio):
+        audio = np.ascontiguousarray(audio, dtype=np.float32).reshape(-1)
+        audio.setflags(write=False)
+        with self.lock:
+            self._insert(key, audio)
+
+        if self.disk_dir:
+            path = self._path(key)
+            temporary = f'{path}.{threading.get_ident()}.tmp'
+            try:
+                audio.astype('<f4').tofile(temporary)
+                os.replace(temporary, path)
+            except OSError as exc:
+                print(f'Audio cache write failed: {exc}')
+        return audio
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        with self.lock:
+            return {
+                'entries': len(self.entries),
+                'bytes': self.bytes,
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+            }
@@ -63,7 +63,7 @@ def load_or_download_config(locale, use_hf=True, config_path=None):
     return utils.get_hparams_from_file(config_path)
 
 
-def load_or_download_model(locale, device, use_hf=True, ckpt_path=None):
+def get_or_download_model_path(locale, use_hf=True, ckpt_path=None):
     if ckpt_path is None:
         language = locale.split('-')[0].upper()
         if use_hf:
@@ -76,6 +76,11 @@ def load_or_download_model(locale, device, use_hf=True, ckpt_path=None):
         else:
             assert language in DOWNLOAD_CKPT_URLS
             ckpt_path = cached_path(DOWNLOAD_CKPT_URLS[language])
+    return ckpt_path
+
+
+def load_or_download_model(locale, device, use_hf=True, ckpt_path=None):
+    ckpt_path = get_or_download_model_path(locale, use_hf=use_hf, ckpt_path=ckpt_path)
     return torch.load(ckpt_path, map_location=device)
 
 
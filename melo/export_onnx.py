@@ -0,0 +1,186 @@
+import json
+import os
+
+import click
+import numpy as np
+import torch
+import torch.nn as nn
+
+from .api import TTS
+from .onnx_api import OnnxTTS
+
+OPSET = 17
+
+
+class EncoderGraph(nn.Module):
+    """Text encoder plus duration predictors; returns ceil'd durations instead of the alignment."""
+
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, x, x_lengths, sid, tone, language, bert, ja_bert, sdp_ratio, noise_scale_w, length_scale):
+        model = self.model
+        g = model.emb_g(sid).unsqueeze(-1)
+        x, m_p, logs_p, x_mask = model.enc_p(
+            x, x_lengths, tone, language, bert, ja_bert, g=None if model.use_vc else g
+        )
+        logw = model.sdp(x, x_mask, g=g, reverse=True, noise_scale=noise_scale_w) * sdp_ratio + model.dp(
+            x, x_mask, g=g
+        ) * (1 - sdp_ratio)
+        w_ceil = torch.ceil(torch.exp(logw) * x_mask * length_scale)
+        return w_ceil, m_p, logs_p, x_mask, g
+
+
+class FlowGraph(nn.Module):
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, z_p, y_mask, g):
+        return self.model.flow(z_p, y_mask, g=g, reverse=True)
+
+
+class DecoderGraph(nn.Module):
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, z, g):
+        return self.model.dec(z, g=g)
+
+
+def _to_dict(hparams):
+    if hasattr(hparams, 'items'):
+        return {key: _to_dict(value) for key, value in hparams.items()}
+    return hparams
+
+
+def export(tts, output_dir):
+    """Write encoder.onnx, flow.onnx, decoder.onnx and config.json for `OnnxTTS`.
+
+    Every graph has dynamic batch and sequence axes, so one export serves
+    any sentence length and batch size.
+    """
+    model = tts.model
+    if model.n_speakers <= 0:
+        raise ValueError("Only multi-speaker checkpoints (speaker embeddings) can be exported.")
+    os.makedirs(output_dir, exist_ok=True)
+    model = model.cpu().eval()
+
+    length = 20
+    x = torch.randint(1, len(tts.symbol_to_id), (1, length), dtype=torch.long)
+    x_lengths = torch.LongTensor([length])
+    sid = torch.LongTensor([0])
+    tone = torch.zeros(1, length, dtype=torch.long)
+    language = torch.zeros(1, length, dtype=torch.long)
+    bert = torch.zeros(1, 1024, length)
+    ja_bert = torch.zeros(1, 768, length)
+    scalars = (torch.tensor(0.2), torch.tensor(0.8), torch.tensor(1.0))
+
+    with torch.no_grad():
+        torch.onnx.export(
+            EncoderGraph(model),
+            (x, x_lengths, sid, tone, language, bert, ja_bert) + scalars,
+            os.path.join(output_dir, 'encoder.onnx'),
+            input_names=['x', 'x_lengths', 'sid', 'tone', 'language', 'bert', 'ja_bert', 'sdp_ratio', 'noise_scale_w', 'length_scale'],
+            output_names=['w_ceil', 'm_p', 'logs_p', 'x_mask', 'g'],
+            dynamic_axes={
+                'x': {0: 'batch', 1: 'phones'},
+                'x_lengths': {0: 'batch'},
+                'sid': {0: 'batch'},
+                'tone': {0: 'batch', 1: 'phones'},
+                'language': {0: 'batch', 1: 'phones'},
+                'bert': {0: 'batch', 2: 'phones'},
+                'ja_bert': {0: 'batch', 2: 'phones'},
+                'w_ceil': {0: 'batch', 2: 'phones'},
+                'm_p': {0: 'batch', 2: 'phones'},
+                'logs_p': {0: 'batch', 2: 'phones'},
+                'x_mask': {0: 'batch', 2: 'phones'},
+                'g': {0: 'batch'},
+            },
+            opset_version=OPSET,
+        )
+
+        w_ceil, m_p, logs_p, x_mask, g = EncoderGraph(model)(x, x_lengths, sid, tone, language, bert, ja_bert, *scalars)
+        frames = max(int(w_ceil.sum()), 1)
+        z_p = torch.randn(1, model.inter_channels, frames)
+        y_mask = torch.ones(1, 1, frames)
+        torch.onnx.export(
+            FlowGraph(model),
+            (z_p, y_mask, g),
+            os.path.join(output_dir, 'flow.onnx'),
+            input_names=['z_p', 'y_mask', 'g'],
+            output_names=['z'],
+            dynamic_axes={
+                'z_p': {0: 'batch', 2: 'frames'},
+                'y_mask': {0: 'batch', 2: 'frames'},
+                'g': {0: 'batch'},
+                'z': {0: 'batch', 2: 'frames'},
+            },
+            opset_version=OPSET,
+        )
+
+        torch.onnx.export(
+            DecoderGraph(model),
+            (z_p, g),
+            os.path.join(output_dir, 'decoder.onnx'),
+            input_names=['z', 'g'],
+            output_names=['audio'],
+            dynamic_axes={
+                'z': {0: 'batch', 2: 'frames'},
+                'g': {0: 'batch'},
+                'audio': {0: 'batch', 2: 'samples'},
+            },
+            opset_version=OPSET,
+        )
+
+    with open(os.path.join(output_dir, 'config.json'), 'w', encoding='utf-8') as f:
+        json.dump(_to_dict(tts.hps), f, indent=2, ensure_ascii=False)
+    return output_dir
+
+
+def check_parity(tts, onnx_tts, texts, speaker_id, speed=1.0):
+    """Compare ONNX against PyTorch output sentence by sentence.
+
+    Noise is disabled (sdp_ratio, noise_scale and noise_scale_w are 0) so both
+    runs are deterministic; returns the largest absolute sample difference
+    and the largest length mismatch in samples.
+    """
+    max_abs_diff = 0.0
+    max_length_diff = 0
+    for t in texts:
+        prepared = tts._prepare(t)
+        expected = tts._infer_batch([prepared], speaker_id, 0.0, 0.0, 0.0, speed)[0]
+        actual = onnx_tts._infer_batch([prepared], speaker_id, 0.0, 0.0, 0.0, speed)[0]
+        length = min(len(expected), len(actual))
+        max_length_diff = max(max_length_diff, abs(len(expected) - len(actual)))
+        if length:
+            max_abs_diff = max(max_abs_diff, float(np.max(np.abs(expected[:length] - actual[:length]))))
+    return {'max_abs_diff': max_abs_diff, 'max_length_diff': max_length_diff}
+
+
+@click.command()
+@click.option('--language', '-l', type=str, default='KR', help="Language of the model")
+@click.option('--output_dir', '-o', type=str, required=True, help="Directory for the ONNX graphs")
+@click.option('--ckpt_path', '-m', type=str, default=None, help="Path to the checkpoint file")
+@click.option('--config_path', '-c', type=str, default=None, help="Path to the model config")
+@click.option('--check', 'check_text', type=str, default=None, help="Text to synthesize with both backends for a parity check")
+@click.option('--tolerance', type=float, default=1e-3, help="Largest acceptable sample difference")
+def main(language, output_dir, ckpt_path, config_path, check_text, tolerance):
+    tts = TTS(language=language, device='cpu', config_path=config_path, ckpt_path=ckpt_path)
+    tts.optimize_for_inference()
+    export(tts, output_dir)
+    print(f"Exported to {output_dir}")
+    if check_text:
+        onnx_tts = OnnxTTS(language=language, onnx_dir=output_dir)
+        texts = tts.split_sentences_into_pieces(check_text, tts.language, quiet=True)
+        speaker_id = list(tts.hps.data.spk2id.values())[0]
+        result = check_parity(tts, onnx_tts, texts, speaker_id)
+        print(f"Max abs diff {result['max_abs_diff']:.6f}, max length diff {result['max_length_diff']} samples")
+        if result['max_abs_diff'] > tolerance or result['max_length_diff'] > 0:
+            raise SystemExit("Parity check failed.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+import os
+
+import numpy as np
+import torch.nn as nn
+
+from .api import TTS
+from .download_utils import load_or_download_config
+
+
+def sequence_mask(lengths, max_length):
+    return (np.arange(max_length)[None, :] < lengths[:, None]).astype(np.float32)
+
+
+def length_regulate(w_ceil, x_mask, m_p, logs_p):
+    """NumPy version of the alignment step in `SynthesizerTrn.infer`.
+
+    Expands the per-phone statistics [b, d, t_x] to per-frame statistics
+    [b, d, t_y] using the rounded durations, and returns them with y_mask.
+    """
+    y_lengths = np.maximum(w_ceil.sum(axis=(1, 2)), 1).astype(np.int64)
+    y_mask = sequence_mask(y_lengths, int(y_lengths.max()))[:, None, :]
+    cum_duration = np.cumsum(w_ceil[:, 0, :], axis=-1)
+    below = (np.arange(y_mask.shape[2])[None, None, :] < cum_duration[:, :, None]).astype(np.float32)
+    path = below.copy()
+    path[:, 1:] -= below[:, :-1]
+    path *= x_mask[:, 0, :, None] * y_mask  # [b, t_x, t_y]
+    return np.matmul(m_p, path), np.matmul(logs_p, path), y_mask
+
+
+class OnnxTTS(TTS):
+    """`melo.api.TTS` running the graphs written by `melo.export_onnx` on onnxruntime.
+
+    Text processing (including BERT features) still runs in PyTorch; the
+    acoustic model and vocoder run as encoder.onnx, flow.onnx and
+    decoder.onnx, with length regulation in NumPy between them.
+    """
+
+    backend = 'onnxruntime'
+
+    def __init__(self,
+                language,
+                onnx_dir,
+                device='cpu',
+                use_hf=True,
+                config_path=None,
+                providers=None,
+                num_threads=None):
+        nn.Module.__init__(self)
+        import onnxruntime as ort
+
+        if config_path is None and os.path.exists(os.path.join(onnx_dir, 'config.json')):
+            config_path = os.path.join(onnx_dir, 'config.json')
+        hps = load_or_download_config(language, use_hf=use_hf, config_path=config_path)
+        self.symbol_to_id = {s: i for i, s in enumerate(hps.symbols)}
+        self.hps = hps
+        self.device = device
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        providers = providers or ['CPUExecutionProvider']
+        self.model_files = [os.path.join(onnx_dir, f'{name}.onnx') for name in ('encoder', 'flow', 'decoder')]
+        self.encoder = ort.InferenceSession(os.path.join(onnx_dir, 'encoder.onnx'), options, providers=providers)
+        self.flow = ort.InferenceSession(os.path.join(onnx_dir, 'flow.onnx'), options, providers=providers)
+        self.decoder = ort.InferenceSession(os.path.join(onnx_dir, 'decoder.onnx'), options, providers=providers)
+
+        language = language.split('_')[0]
+        self.language = 'ZH_MIX_EN' if language == 'ZH' else language # we support a ZH_MIX_EN model
+        self.audio_cache = None
+        self.cache_fingerprint = None
+        self.dtype = np.float32
+
+    def _infer_batch(self, prepared, speaker_id, sdp_ratio=0.2, noise_scale=0.6, noise_scale_w=0.8, speed=1.0):
+        count = len(prepared)
+        lengths = [phones.size(0) for _, _, phones, _, _ in prepared]
+        max_length = max(lengths)
+        x = np.zeros((count, max_length), dtype=np.int64)
+        tones = np.zeros((count, max_length), dtype=np.int64)
+        lang_ids = np.zeros((count, max_length), dtype=np.int64)
+        bert = np.zeros((count, prepared[0][0].size(0), max_length), dtype=np.float32)
+        ja_bert = np.zeros((count, prepared[0][1].size(0), max_length), dtype=np.float32)
+        for index, (item_bert, item_ja_bert, phones, item_tones, item_lang_ids) in enumerate(prepared):
+            length = lengths[index]
+            x[index, :length] = phones.numpy()
+            tones[index, :length] = item_tones.numpy()
+            lang_ids[index, :length] = item_lang_ids.numpy()
+            bert[index, :, :length] = item_bert.float().cpu().numpy()
+            ja_bert[index, :, :length] = item_ja_bert.float().cpu().numpy()
+
+        w_ceil, m_p, logs_p, x_mask, g = self.encoder.run(None, {
+            'x': x,
+            'x_lengths': np.array(lengths, dtype=np.int64),
+            'sid': np.array([speaker_id] * count, dtype=np.int64),
+            'tone': tones,
+            'language': lang_ids,
+            'bert': bert,
+            'ja_bert': ja_bert,
+            'sdp_ratio': np.array(sdp_ratio, dtype=np.float32),
+            'noise_scale_w': np.array(noise_scale_w, dtype=np.float32),
+            'length_scale': np.array(1. / speed, dtype=np.float32),
+        })
+        m_p, logs_p, y_mask = length_regulate(w_ceil, x_mask, m_p, logs_p)
+        z_p = m_p + np.random.randn(*m_p.shape).astype(np.float32) * np.exp(logs_p) * noise_scale
+        z = self.flow.run(None, {'z_p': z_p.astype(np.float32), 'y_mask': y_mask, 'g': g})[0]
+        o = self.decoder.run(None, {'z': (z * y_mask).astype(np.float32), 'g': g})[0]
+
+        y_lengths = y_mask.sum(axis=(1, 2)).astype(np.int64) * self.hps.data.hop_length
+        return [o[index, 0, :y_lengths[index]].astype(np.float32) for index in range(count)]
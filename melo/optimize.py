@@ -0,0 +1,91 @@
+import time
+
+import click
+import torch
+from torch.nn.utils import remove_weight_norm
+
+DTYPES = {
+    'float32': torch.float32,
+    'float16': torch.float16,
+    'bfloat16': torch.bfloat16,
+}
+
+
+def model_bytes(model):
+    """Bytes held by parameters and buffers."""
+    tensors = list(model.parameters()) + list(model.buffers())
+    return sum(tensor.numel() * tensor.element_size() for tensor in tensors)
+
+
+def optimize_for_inference(model, dtype=None):
+    """Turn a training-form `SynthesizerTrn` into an inference-only one, in place.
+
+    Weight norm is removed from every submodule, so each conv keeps one plain
+    weight instead of recomputing it from `weight_g`/`weight_v` on every
+    forward. Training-only submodules are deleted, gradients are disabled and,
+    with `dtype`, the weights are cast to float16 or bfloat16.
+    """
+    removed = 0
+    for module in model.modules():
+        try:
+            remove_weight_norm(module)
+        except ValueError:
+            continue
+        removed += 1
+
+    # The posterior encoder is only used for training and voice conversion.
+    # Discriminators live in separate models that TTS never loads.
+    if hasattr(model, 'enc_q'):
+        del model.enc_q
+
+    model.eval()
+    for parameter in model.parameters():
+        parameter.requires_grad_(False)
+    if dtype is not None:
+        model.to(DTYPES[dtype] if isinstance(dtype, str) else dtype)
+    return removed
+
+
+def sentence_latency_ms(tts, texts, speaker_id, runs=3):
+    """Median per-sentence synthesis time, text frontend excluded."""
+    prepared = [tts._prepare(t) for t in texts]
+    tts._infer_batch(prepared[:1], speaker_id)
+    timings = []
+    for _ in range(runs):
+        for item in prepared:
+            if 'cuda' in str(tts.device):
+                torch.cuda.synchronize()
+            started = time.perf_counter()
+            tts._infer_batch([item], speaker_id)
+            if 'cuda' in str(tts.device):
+                torch.cuda.synchronize()
+            timings.append((time.perf_counter() - started) * 1000.0)
+    timings.sort()
+    return timings[len(timings) // 2]
+
+
+@click.command()
+@click.option('--language', '-l', type=str, default='KR', help="Language of the model")
+@click.option('--device', '-d', type=str, default='auto', help="Device to run on")
+@click.option('--dtype', type=click.Choice(list(DTYPES)), default='float32', help="Precision after optimization")
+@click.option('--text', '-t', type=str, default="안녕하세요. 오늘은 날씨가 맑고 따뜻합니다. 무엇을 도와드릴까요?", help="Text to synthesize")
+@click.option('--runs', type=int, default=3, help="Passes over the sentences")
+def main(language, device, dtype, text, runs):
+    from .api import TTS
+
+    tts = TTS(language=language, device=device)
+    texts = tts.split_sentences_into_pieces(text, tts.language, quiet=True)
+    speaker_id = list(tts.hps.data.spk2id.values())[0]
+
+    before_bytes = model_bytes(tts.model)
+    before_ms = sentence_latency_ms(tts, texts, speaker_id, runs)
+    tts.optimize_for_inference(dtype=dtype)
+    after_bytes = model_bytes(tts.model)
+    after_ms = sentence_latency_ms(tts, texts, speaker_id, runs)
+
+    print(f"Memory:  {before_bytes / 2**20:.1f} MiB -> {after_bytes / 2**20:.1f} MiB")
+    print(f"Latency: {before_ms:.1f} ms -> {after_ms:.1f} ms per sentence (median of {runs * len(texts)})")
+
+
+if __name__ == "__main__":
+    main()
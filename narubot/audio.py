@@ -0,0 +1,265 @@
+import time
+
+import numpy as np
+
+from .config import Config
+
+
+class AudioRingBuffer:
+    """Fixed-capacity int16 ring buffer that captured PCM is written into in place.
+
+    Storage is allocated once, so capture cost does not grow with session
+    length. When the buffer is full the oldest samples are overwritten.
+    """
+
+    def __init__(self, capacity: int):
+        if capacity <= 0:
+            raise ValueError("AudioRingBuffer capacity must be positive.")
+
+        self.capacity = int(capacity)
+        self.buffer = np.zeros(self.capacity, dtype=np.int16)
+        self.start = 0
+        self.size = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    @property
+    def full(self) -> bool:
+        return self.size >= self.capacity
+
+    def clear(self) -> None:
+        self.start = 0
+        self.size = 0
+
+    def write(self, data) -> int:
+        """Copy raw int16 PCM bytes (or an int16 array) into the buffer."""
+        samples = np.frombuffer(data, dtype=np.int16) if isinstance(data, (bytes, bytearray, memoryview)) else data
+        count = len(samples)
+        if count == 0:
+            return 0
+
+        if count >= self.capacity:
+            self.buffer[:] = samples[-self.capacity:]
+            self.start = 0
+            self.size = self.capacity
+            return count
+
+        end = (self.start + self.size) % self.capacity
+        first = min(count, self.capacity - end)
+        self.buffer[end:end + first] = samples[:first]
+        if first < count:
+            self.buffer[:count - first] = samples[first:]
+
+        overflow = self.size + count - self.capacity
+        if overflow > 0:
+            self.start = (self.start + overflow) % self.capacity
+            self.size = self.capacity
+        else:
+            self.size += count
+        return count
+
+    def to_float32(self, out=None):
+        """Return buffered samples as normalized float32 using a single conversion pass."""
+        if self.size == 0:
+            return None
+
+        if out is None:
+            out = np.empty(self.size, dtype=np.float32)
+        else:
+            out = out[:self.size]
+
+        first = min(self.size, self.capacity - self.start)
+        np.multiply(self.buffer[self.start:self.start + first], 1.0 / 32768.0, out=out[:first], dtype=np.float32)
+        if first < self.size:
+            np.multiply(self.buffer[:self.size - first], 1.0 / 32768.0, out=out[first:], dtype=np.float32)
+        return out
+
+
+class AudioSource:
+    """Blocking source of raw int16 PCM in the configured rate and channel layout.
+
+    `read` returns up to `frames` frames and an empty bytes object once the
+    source is exhausted.
+    """
+
+    def __init__(self, channels: int = 1):
+        self.frame_bytes = 2 * channels
+
+    def read(self, frames: int) -> bytes:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+    def _read_exactly(self, read_fn, size: int) -> bytes:
+        chunks = []
+        remaining = size
+        while remaining > 0:
+            data = read_fn(remaining)
+            if not data:
+                break
+            chunks.append(data)
+            remaining -= len(data)
+        data = b"".join(chunks)
+        return data[:len(data) - len(data) % self.frame_bytes]
+
+
+class MicrophoneSource(AudioSource):
+    def __init__(self, pyaudio_instance, audio_format: int, channels: int, sample_rate: int, chunk: int):
+        super().__init__(channels)
+        self.stream = pyaudio_instance.open(
+            format=audio_format,
+            channels=channels,
+            rate=sample_rate,
+            input=True,
+            frames_per_buffer=chunk,
+        )
+
+    def read(self, frames: int) -> bytes:
+        return self.stream.read(frames, exception_on_overflow=False)
+
+    def close(self) -> None:
+        if self.stream is not None:
+            self.stream.stop_stream()
+            self.stream.close()
+            self.stream = None
+
+
+class WavFileSource(AudioSource):
+    """Replay a 16-bit WAV file, paced in real time or as fast as possible."""
+
+    def __init__(self, path: str, channels: int, sample_rate: int, realtime: bool = True):
+        import wave
+
+        super().__init__(channels)
+        self.wav = wave.open(path, "rb")
+        if self.wav.getsampwidth() != 2 or self.wav.getnchannels() != channels or self.wav.getframerate() != sample_rate:
+            self.wav.close()
+            raise ValueError(
+                f"WAV source must be 16-bit, {channels} channel(s), {sample_rate} Hz: {path}"
+            )
+        self.sample_rate = sample_rate
+        self.realtime = realtime
+        self.frames_read = 0
+        self.started_at = None
+
+    def read(self, frames: int) -> bytes:
+        if self.started_at is None:
+            self.started_at = time.monotonic()
+
+        data = self.wav.readframes(frames)
+        self.frames_read += len(data) // self.frame_bytes
+        if self.realtime:
+            delay = self.started_at + self.frames_read / self.sample_rate - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        return data
+
+    def close(self) -> None:
+        self.wav.close()
+
+
+class StdinPCMSource(AudioSource):
+    """Raw little-endian int16 PCM piped into standard input."""
+
+    def __init__(self, channels: int, stream=None):
+        import sys
+
+        super().__init__(channels)
+        self.stream = stream if stream is not None else sys.stdin.buffer
+
+    def read(self, frames: int) -> bytes:
+        return self._read_exactly(self.stream.read, frames * self.frame_bytes)
+
+
+class TCPSource(AudioSource):
+    """Accept one local TCP client and read raw int16 PCM from it."""
+
+    def __init__(self, host: str, port: int, channels: int):
+        import socket
+
+        super().__init__(channels)
+        self.server = socket.create_server((host, port))
+        self.connection = None
+        print(f"Waiting for PCM stream on tcp://{host}:{port}")
+
+    def read(self, frames: int) -> bytes:
+        if self.connection is None:
+            self.connection, _ = self.server.accept()
+        return self._read_exactly(self.connection.recv, frames * self.frame_bytes)
+
+    def close(self) -> None:
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+        self.server.close()
+
+
+class WebSocketSource(AudioSource):
+    """Serve one WebSocket client that sends binary int16 PCM messages."""
+
+    def __init__(self, host: str, port: int, channels: int):
+        import queue
+        import threading
+
+        from websockets.sync.server import serve
+
+        super().__init__(channels)
+        self.messages = queue.Queue()
+        self.pending = b""
+        self.finished = False
+        self.server = serve(self._handle, host, port)
+        self.thread = threading.Thread(target=self.server.serve_forever, name="audio-websocket", daemon=True)
+        self.thread.start()
+        print(f"Waiting for PCM stream on ws://{host}:{port}")
+
+    def _handle(self, connection) -> None:
+        for message in connection:
+            if isinstance(message, bytes):
+                self.messages.put(message)
+        self.messages.put(None)
+
+    def _recv(self, size: int) -> bytes:
+        if not self.pending:
+            if self.finished:
+                return b""
+            message = self.messages.get()
+            if message is None:
+                self.finished = True
+                return b""
+            self.pending = message
+        data, self.pending = self.pending[:size], self.pending[size:]
+        return data
+
+    def read(self, frames: int) -> bytes:
+        return self._read_exactly(self._recv, frames * self.frame_bytes)
+
+    def close(self) -> None:
+        self.server.shutdown()
+
+
+def create_audio_source(config: Config, pyaudio_instance=None) -> AudioSource:
+    source = (config.audio_source or "microphone").lower()
+    if source == "microphone":
+        return MicrophoneSource(
+            pyaudio_instance,
+            config.audio_format,
+            config.audio_channels,
+            config.audio_sample_rate,
+            config.audio_chunk,
+        )
+    if source == "wav":
+        return WavFileSource(
+            config.audio_source_path,
+            config.audio_channels,
+            config.audio_sample_rate,
+            realtime=config.audio_source_realtime,
+        )
+    if source == "stdin":
+        return StdinPCMSource(config.audio_channels)
+    if source == "tcp":
+        return TCPSource(config.audio_source_host, config.audio_source_port, config.audio_channels)
+    if source == "websocket":
+        return WebSocketSource(config.audio_source_host, config.audio_source_port, config.audio_channels)
+    raise ValueError(f"Unknown audio source: {config.audio_source}")
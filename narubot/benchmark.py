@@ -0,0 +1,213 @@
+import json
+import threading
+import time
+import urllib.request
+
+from .config import Config
+from .tracing import percentile
+
+DEFAULT_PROMPTS = [
+    "Tell me something interesting about the ocean.",
+    "How do I make a good cup of coffee?",
+    "What should I read this weekend?",
+    "Explain what a neural network is.",
+]
+
+
+def _latency_summary(values: list[float]) -> dict:
+    return {
+        "count": len(values),
+        "p50_ms": percentile(values, 0.5),
+        "p95_ms": percentile(values, 0.95),
+        "max_ms": max(values, default=0.0),
+    }
+
+
+def raw_request_ms(config: Config, prompt: str) -> float:
+    """Latency of one non-streaming request sent with plain urllib on a fresh connection."""
+    messages = [{"role": "user", "content": prompt}]
+    if (config.llm_provider or "ollama").lower() == "openai":
+        url = (config.llm_base_url or "https://api.openai.com/v1").rstrip("/") + "/chat/completions"
+        body = {"model": config.llm_model, "messages": messages}
+    else:
+        host = config.llm_ollama_host if "://" in config.llm_ollama_host else f"http://{config.llm_ollama_host}"
+        url = host.rstrip("/") + "/api/chat"
+        body = {"model": config.llm_model, "messages": messages, "stream": False}
+
+    headers = {"Content-Type": "application/json"}
+    if config.llm_api_key:
+        headers["Authorization"] = f"Bearer {config.llm_api_key}"
+    request = urllib.request.Request(url, data=json.dumps(body).encode("utf-8"), headers=headers)
+    started = time.monotonic()
+    with urllib.request.urlopen(request, timeout=config.llm_timeout_sec) as response:
+        response.read()
+    return (time.monotonic() - started) * 1000.0
+
+
+def run_load(config: Config, clients: int = 1, turns: int = 5, stream: bool = False, prompts: list[str] | None = None) -> dict:
+    """Run `clients` concurrent conversations of `turns` turns each through `LLM`.
+
+    Reports per-turn latency, time to the first streamed sentence (with
+    `stream`), errors and overall throughput.
+    """
+    from .llm import LLM
+
+    prompts = prompts or DEFAULT_PROMPTS
+    latencies = []
+    first_sentence = []
+    errors = []
+    lock = threading.Lock()
+
+    def conversation(index: int) -> None:
+        try:
+            llm = LLM(config)
+        except Exception as exc:
+            with lock:
+                errors.append(str(exc))
+            return
+        for turn in range(turns):
+            prompt = prompts[(index + turn) % len(prompts)]
+            started = time.monotonic()
+            try:
+                if stream:
+                    for sentence_index, _ in enumerate(llm.chat_stream(prompt)):
+                        if sentence_index == 0:
+                            with lock:
+                                first_sentence.append((time.monotonic() - started) * 1000.0)
+                else:
+                    llm.chat(prompt)
+            except Exception as exc:
+                with lock:
+                    errors.append(str(exc))
+                continue
+            with lock:
+                latencies.append((time.monotonic() - started) * 1000.0)
+
+    started = time.monotonic()
+    threads = [threading.Thread(target=conversation, args=(index,), name=f"bench-client-{index}") for index in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+
+    result = {
+        "clients": clients,
+        "turns": turns,
+        "stream": stream,
+        "latency": _latency_summary(latencies),
+        "errors": len(errors),
+        "turns_per_sec": len(latencies) / elapsed if elapsed > 0 else 0.0,
+    }
+    if stream:
+        result["first_sentence"] = _latency_summary(first_sentence)
+    if errors:
+        result["first_error"] = errors[0]
+    return result
+
+
+def client_overhead(config: Config, turns: int = 5, prompt: str | None = None) -> dict:
+    """Compare `LLM.chat` against bare HTTP requests carrying the same prompt."""
+    from .llm import LLM
+
+    prompt = prompt or DEFAULT_PROMPTS[0]
+    raw = [raw_request_ms(config, prompt) for _ in range(turns)]
+    llm = LLM(config)
+    wrapped = []
+    for _ in range(turns):
+        llm.reset()
+        started = time.monotonic()
+        llm.chat(prompt)
+        wrapped.append((time.monotonic() - started) * 1000.0)
+    return {
+        "raw": _latency_summary(raw),
+        "llm": _latency_summary(wrapped),
+        "overhead_p50_ms": percentile(wrapped, 0.5) - percentile(raw, 0.5),
+    }
+
+
+def batching(config: Config, prompts: list[str] | None = None) -> dict:
+    """Time answering queued utterances one by one versus as one merged turn.
+
+    The merged text is built like STT's utterance batching (newline joined).
+    """
+    from .llm import LLM
+
+    prompts = prompts or DEFAULT_PROMPTS[:3]
+    llm = LLM(config)
+    started = time.monotonic()
+    for prompt in prompts:
+        llm.chat(prompt)
+    separate_ms = (time.monotonic() - started) * 1000.0
+
+    llm.reset()
+    started = time.monotonic()
+    llm.chat("\n".join(prompts))
+    merged_ms = (time.monotonic() - started) * 1000.0
+    return {"utterances": len(prompts), "separate_ms": separate_ms, "merged_ms": merged_ms}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark narubot.LLM against a real or mock chat endpoint.")
+    parser.add_argument("--provider", default="ollama", choices=["ollama", "openai"])
+    parser.add_argument("--model", default="mock")
+    parser.add_argument("--ollama-host", default="localhost:11434")
+    parser.add_argument("--base-url", default=None, help="OpenAI-compatible base URL (including /v1).")
+    parser.add_argument("--api-key", default=None)
+    parser.add_argument("--async-client", action="store_true", help="Use the pooled asyncio client.")
+    parser.add_argument("--stream", action="store_true", help="Measure streamed replies (time to first sentence).")
+    parser.add_argument("--clients", default="1,2,4,8", help="Comma separated concurrency levels.")
+    parser.add_argument("--turns", type=int, default=5)
+    parser.add_argument("--mock", action="store_true", help="Start a bundled mock server and benchmark against it.")
+    parser.add_argument("--mock-ttft-ms", type=float, default=200.0)
+    parser.add_argument("--mock-tokens-per-sec", type=float, default=30.0)
+    parser.add_argument("--mock-max-concurrency", type=int, default=1)
+    parser.add_argument("--mock-failure-rate", type=float, default=0.0)
+    parser.add_argument("--output", default=None, help="Write the results as JSON to this file.")
+    args = parser.parse_args()
+
+    mock = None
+    ollama_host = args.ollama_host
+    base_url = args.base_url
+    api_key = args.api_key
+    if args.mock:
+        from .mock_server import MockLLMServer
+        from .mock_server import MockLLMSettings
+
+        mock = MockLLMServer(settings=MockLLMSettings(
+            ttft_ms=args.mock_ttft_ms,
+            tokens_per_sec=args.mock_tokens_per_sec,
+            max_concurrency=args.mock_max_concurrency,
+            failure_rate=args.mock_failure_rate,
+        )).start()
+        ollama_host = mock.url
+        base_url = mock.url + "/v1"
+        api_key = api_key or "mock"
+        print(f"Mock LLM server on {mock.url}")
+
+    config = Config(
+        llm_provider=args.provider,
+        llm_model=args.model,
+        llm_ollama_host=ollama_host,
+        llm_base_url=base_url,
+        llm_api_key=api_key,
+        llm_async_client=args.async_client,
+    )
+
+    results = {"overhead": client_overhead(config, turns=args.turns)}
+    print(f"Client overhead: {results['overhead']}")
+    results["batching"] = batching(config)
+    print(f"Batching: {results['batching']}")
+    results["load"] = []
+    for clients in (int(value) for value in args.clients.split(",") if value):
+        load = run_load(config, clients=clients, turns=args.turns, stream=args.stream)
+        results["load"].append(load)
+        print(f"Load: {load}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+    if mock is not None:
+        mock.close()
@@ -0,0 +1,34 @@
+from .config import Config
+
+
+def normalize_command_text(text: str) -> str:
+    return "".join(ch for ch in text.casefold() if ch.isalnum())
+
+
+def is_start_of_speech(config: Config, text: str) -> tuple[bool, str]:
+    normalized_text = normalize_command_text(text)
+    for command in config.stt_start_commands:
+        if text.startswith(command):
+            return True, text.removeprefix(command).strip()
+        normalized_command = normalize_command_text(command)
+        if normalized_command and normalized_text.startswith(normalized_command):
+            return True, text
+
+    for command in config.stt_magic_commands:
+        if text.find(command) != -1:
+            return True, text
+        normalized_command = normalize_command_text(command)
+        if normalized_command and normalized_command in normalized_text:
+            return True, text
+    return False, ""
+
+
+def is_end_of_speech(config: Config, text: str) -> bool:
+    normalized_text = normalize_command_text(text)
+    for command in config.stt_stop_commands:
+        if text.startswith(command):
+            return True
+        normalized_command = normalize_command_text(command)
+        if normalized_command and normalized_text.startswith(normalized_command):
+            return True
+    return False
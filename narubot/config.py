@@ -37,8 +37,23 @@ class Config:
             stt_compute_type = "int8_float16",
             stt_language = "ko",
             stt_beam_size = 5,
+            stt_standby_model = None,
+            stt_standby_compute_type = "int8",
+            stt_standby_beam_size = 1,
+            stt_standby_max_new_tokens = 32,
+            stt_conversation_keep_warm = True,
             stt_vad_filter = True,
             stt_vad_min_silence_ms = 300,
+            stt_vad_engine = "energy",
+            stt_vad_frame_ms = 10,
+            stt_vad_hysteresis_ratio = 0.6,
+            stt_vad_adaptive_ratio = 3.0,
+            stt_vad_speech_threshold = 0.5,
+            stt_vad_min_speech_ms = 250,
+            stt_streaming_enabled = False,
+            stt_streaming_interval_sec = 0.5,
+            stt_streaming_min_window_sec = 1.0,
+            stt_streaming_beam_size = 1,
             stt_start_commands = ["\uc2dc\uc791"],
             stt_magic_commands = [],
             stt_stop_commands = ["\uc885\ub8cc"],
@@ -47,10 +62,37 @@ class Config:
             llm_system_prompt = "",
             llm_api_key = None,
             llm_base_url = None,
+            llm_ollama_host = "localhost:11434",
+            llm_ollama_profile_path = "~/.narubot/ollama_profile.json",
+            llm_async_client = False,
+            llm_timeout_sec = 60.0,
+            llm_max_connections = 16,
+            llm_tool_workers = 4,
+            llm_tool_timeout_sec = 5.0,
+            llm_tool_selection = False,
+            llm_tool_selection_threshold = 0.3,
+            llm_history_token_budget = 4096,
+            llm_history_trim_ratio = 0.5,
+            llm_history_summarize = False,
+            llm_intent_router = False,
+            llm_intent_threshold = 0.8,
+            llm_backends = None,
+            llm_hedge_enabled = True,
+            llm_hedge_delay_ms = None,
+            llm_hedge_percentile = 0.95,
+            llm_hedge_min_samples = 20,
+            llm_hedge_default_delay_ms = 1500.0,
+            llm_stream_enabled = False,
+            llm_stream_min_sentence_chars = 10,
             llm_batch_enabled = True,
             llm_batch_window_sec = 0.35,
             llm_batch_max_items = 3,
             wav_file = "conversation.wav",
+            audio_source = "microphone",
+            audio_source_path = None,
+            audio_source_realtime = True,
+            audio_source_host = "127.0.0.1",
+            audio_source_port = 8765,
             audio_chunk = 1024,
             audio_format = None,
             audio_channels = 1,
@@ -58,19 +100,60 @@ class Config:
             silence_threshold = 500,
             silence_limit = 1,
             stt_queue_max_size = 32,
+            stt_max_utterance_sec = 30,
             stt_pause_during_tts = True,
+            stt_barge_in = False,
+            stt_barge_in_min_speech_ms = 200,
+            stt_barge_in_threshold_ratio = 2.0,
+            stt_pipeline_enabled = False,
+            stt_pipeline_queue_size = 4,
             tts_enabled = True,
             tts_wait_for_user_silence = True,
             tts_wait_timeout_sec = 2.0,
             tts_speed = 1.3,
-            tts_language = "KR"):
+            tts_language = "KR",
+            tts_lookahead = 1,
+            tts_batch_size = 4,
+            tts_cache_mb = 64,
+            tts_cache_dir = None,
+            tts_onnx_dir = None,
+            tts_optimize = True,
+            tts_dtype = None,
+            server_host = "127.0.0.1",
+            server_port = 8766,
+            server_max_sessions = 16,
+            server_workers = 2,
+            server_max_batch = 8,
+            server_session_queue_limit = 4,
+            server_llm_enabled = False,
+            pool_prewarm = True,
+            pool_idle_timeout_sec = None,
+            pool_memory_budget_mb = None,
+            trace_enabled = False,
+            trace_file = None,
+            trace_callback = None):
         self.device = _resolve_device(device)  # The device to use for inference.
         self.stt_model = stt_model  # The model size to use for transcription.
         self.stt_compute_type = stt_compute_type  # The compute type to use for the model.
         self.stt_language = stt_language  # The language to use for transcription.
         self.stt_beam_size = stt_beam_size  # Beam width for decoding quality/speed tradeoff.
+        self.stt_standby_model = stt_standby_model  # Small model used to spot start/magic commands in standby (None = use stt_model).
+        self.stt_standby_compute_type = stt_standby_compute_type  # Compute type for the standby model.
+        self.stt_standby_beam_size = stt_standby_beam_size  # Beam width for the standby model (1 = greedy).
+        self.stt_standby_max_new_tokens = stt_standby_max_new_tokens  # Decode length cap for the standby model.
+        self.stt_conversation_keep_warm = stt_conversation_keep_warm  # Keep stt_model loaded in standby instead of loading it on activation.
         self.stt_vad_filter = stt_vad_filter  # Whether to apply model-side VAD filtering.
         self.stt_vad_min_silence_ms = stt_vad_min_silence_ms  # Minimum silence for VAD split.
+        self.stt_vad_engine = stt_vad_engine  # Capture-side VAD ("energy", "adaptive" or "silero").
+        self.stt_vad_frame_ms = stt_vad_frame_ms  # Frame length the capture-side VAD classifies.
+        self.stt_vad_hysteresis_ratio = stt_vad_hysteresis_ratio  # Leave-speech threshold as a fraction of the enter threshold.
+        self.stt_vad_adaptive_ratio = stt_vad_adaptive_ratio  # Enter threshold as a multiple of the noise floor (adaptive VAD).
+        self.stt_vad_speech_threshold = stt_vad_speech_threshold  # Speech probability threshold (silero VAD).
+        self.stt_vad_min_speech_ms = stt_vad_min_speech_ms  # Utterances with less speech are dropped before Whisper.
+        self.stt_streaming_enabled = stt_streaming_enabled  # Transcribe growing audio windows while the user is still speaking.
+        self.stt_streaming_interval_sec = stt_streaming_interval_sec  # Minimum time between partial transcriptions.
+        self.stt_streaming_min_window_sec = stt_streaming_min_window_sec  # Minimum uncommitted audio before a partial decode.
+        self.stt_streaming_beam_size = stt_streaming_beam_size  # Beam width for partial (non-final) decodes.
         self.stt_start_commands = stt_start_commands  # Commands to start the transcription process.
         self.stt_magic_commands = stt_magic_commands  # Magic commands to trigger specific actions during transcription.
         self.stt_stop_commands = stt_stop_commands  # Commands to stop the transcription process.
@@ -79,10 +162,37 @@ class Config:
         self.llm_system_prompt = llm_system_prompt  # System prompt for LLM.
         self.llm_api_key = llm_api_key  # API key for cloud providers such as OpenAI.
         self.llm_base_url = llm_base_url  # Optional custom base URL (e.g. OpenAI-compatible endpoint).
+        self.llm_ollama_host = llm_ollama_host  # Host (and port) of the ollama server.
+        self.llm_ollama_profile_path = llm_ollama_profile_path  # Runtime options found by `python -m narubot.tuner` (None to ignore).
+        self.llm_async_client = llm_async_client  # Send requests through the shared asyncio client with a persistent connection pool.
+        self.llm_timeout_sec = llm_timeout_sec  # Read timeout for a single LLM request.
+        self.llm_max_connections = llm_max_connections  # Connection pool size shared by all conversations.
+        self.llm_tool_workers = llm_tool_workers  # Threads used to run tool calls of one turn concurrently.
+        self.llm_tool_timeout_sec = llm_tool_timeout_sec  # Timeout for tools without their own entry in utility.tool_policies.
+        self.llm_tool_selection = llm_tool_selection  # Attach only relevant tools; the set grows per conversation, and each growth re-evaluates the cached prompt prefix once.
+        self.llm_tool_selection_threshold = llm_tool_selection_threshold  # Minimum relevance score for a tool to be attached.
+        self.llm_history_token_budget = llm_history_token_budget  # Estimated history size (tokens) that triggers a trim.
+        self.llm_history_trim_ratio = llm_history_trim_ratio  # A trim drops old turns until the history fits this fraction of the budget.
+        self.llm_history_summarize = llm_history_summarize  # Replace trimmed turns with a model-written summary.
+        self.llm_intent_router = llm_intent_router  # Answer matching tool-only questions locally (see utility.tool_intents).
+        self.llm_intent_threshold = llm_intent_threshold  # Minimum classifier similarity for a local answer.
+        self.llm_backends = llm_backends  # Ordered backend dicts for hedged/failover requests (see router.ProviderRouter.from_config).
+        self.llm_hedge_enabled = llm_hedge_enabled  # Send a duplicate request to the next backend when the current one is slow.
+        self.llm_hedge_delay_ms = llm_hedge_delay_ms  # Fixed hedge delay; None derives it from the backend's latency histogram.
+        self.llm_hedge_percentile = llm_hedge_percentile  # Latency percentile used as the automatic hedge delay.
+        self.llm_hedge_min_samples = llm_hedge_min_samples  # Samples needed before the automatic hedge delay is trusted.
+        self.llm_hedge_default_delay_ms = llm_hedge_default_delay_ms  # Hedge delay until enough samples exist.
+        self.llm_stream_enabled = llm_stream_enabled  # Stream replies and start speaking after the first complete sentence.
+        self.llm_stream_min_sentence_chars = llm_stream_min_sentence_chars  # Shorter sentences are merged with the next one.
         self.llm_batch_enabled = llm_batch_enabled  # Whether to combine queued utterances into one LLM turn.
         self.llm_batch_window_sec = llm_batch_window_sec  # Time window to collect extra queued utterances.
         self.llm_batch_max_items = llm_batch_max_items  # Maximum utterances to merge in a single LLM turn.
         self.wav_file = wav_file  # File to save audio data as WAV.
+        self.audio_source = audio_source  # Capture input: "microphone", "wav", "stdin", "tcp" or "websocket".
+        self.audio_source_path = audio_source_path  # WAV file replayed by the "wav" source.
+        self.audio_source_realtime = audio_source_realtime  # Pace WAV replay in real time instead of as fast as possible.
+        self.audio_source_host = audio_source_host  # Bind address for the "tcp" and "websocket" sources.
+        self.audio_source_port = audio_source_port  # Bind port for the "tcp" and "websocket" sources.
         self.audio_chunk = audio_chunk  # Number of frames per buffer for PyAudio.
         self.audio_format = audio_format if audio_format is not None else _resolve_default_audio_format()  # Audio format for recording.
         self.audio_channels = audio_channels  # Number of channels for recording.
@@ -90,9 +200,35 @@ class Config:
         self.silence_threshold = silence_threshold  # Threshold to detect silence in audio data.
         self.silence_limit = silence_limit  # Maximum number of silent chunks before considering speech as ended.
         self.stt_queue_max_size = stt_queue_max_size  # Max buffered utterances while worker is busy.
+        self.stt_max_utterance_sec = stt_max_utterance_sec  # Capture buffer capacity; longer utterances are cut here.
         self.stt_pause_during_tts = stt_pause_during_tts  # Pause STT capture while speaker output is playing.
+        self.stt_barge_in = stt_barge_in  # Interrupt playback and the in-flight reply when the user starts speaking.
+        self.stt_barge_in_min_speech_ms = stt_barge_in_min_speech_ms  # Continuous speech needed during playback to interrupt.
+        self.stt_barge_in_threshold_ratio = stt_barge_in_threshold_ratio  # VAD threshold multiplier during playback (speaker echo margin).
+        self.stt_pipeline_enabled = stt_pipeline_enabled  # Run transcribe, respond and speak on separate overlapping workers.
+        self.stt_pipeline_queue_size = stt_pipeline_queue_size  # Bound for the respond/speak queues (backpressure).
         self.tts_enabled = tts_enabled  # Enable/disable all speech playback (TTS and effects).
         self.tts_wait_for_user_silence = tts_wait_for_user_silence  # Wait until user speech ends before TTS output.
         self.tts_wait_timeout_sec = tts_wait_timeout_sec  # Max wait time before speaking anyway.
         self.tts_speed = tts_speed  # Speed for text-to-speech conversion.
         self.tts_language = tts_language  # Language for text-to-speech conversion.
+        self.tts_lookahead = tts_lookahead  # Sentences synthesized ahead while the current one plays (0 = none).
+        self.tts_batch_size = tts_batch_size  # Sentences per forward pass when rendering whole texts to files.
+        self.tts_cache_mb = tts_cache_mb  # In-memory budget for synthesized sentences (0 disables the cache).
+        self.tts_cache_dir = tts_cache_dir  # Optional directory that keeps cached sentences as raw PCM across restarts.
+        self.tts_onnx_dir = tts_onnx_dir  # Run TTS on onnxruntime with graphs from melo.export_onnx (None = PyTorch).
+        self.tts_optimize = tts_optimize  # Remove weight norm and training-only modules after loading the PyTorch model.
+        self.tts_dtype = tts_dtype  # "float16" or "bfloat16" to run the optimized PyTorch model in reduced precision.
+        self.server_host = server_host  # Bind address for narubot.server.
+        self.server_port = server_port  # Bind port for narubot.server.
+        self.server_max_sessions = server_max_sessions  # Concurrent sessions accepted by the server.
+        self.server_workers = server_workers  # Whisper workers sharing the server's model.
+        self.server_max_batch = server_max_batch  # Max utterances decoded in one batch.
+        self.server_session_queue_limit = server_session_queue_limit  # Pending utterances per session before rejecting.
+        self.server_llm_enabled = server_llm_enabled  # Answer activated sessions with the LLM.
+        self.pool_prewarm = pool_prewarm  # Load conversation models in the background at startup.
+        self.pool_idle_timeout_sec = pool_idle_timeout_sec  # Release unused models after this idle time (None = keep).
+        self.pool_memory_budget_mb = pool_memory_budget_mb  # Release idle models while process RSS exceeds this (None = no limit).
+        self.trace_enabled = trace_enabled  # Record per-turn latency traces and print percentiles on close.
+        self.trace_file = trace_file  # Optional JSONL file that receives one record per turn.
+        self.trace_callback = trace_callback  # Optional callable invoked with each turn record.
@@ -0,0 +1,106 @@
+import json
+
+
+def estimate_tokens(message: dict) -> int:
+    """Rough token count of a chat message (about four characters per token)."""
+    size = len(message.get("content") or "")
+    if message.get("tool_calls"):
+        size += len(json.dumps(message["tool_calls"], default=str))
+    return size // 4 + 4
+
+
+def prompt_usage(response) -> dict:
+    """Prompt statistics reported by ollama (`prompt_eval_*`) or OpenAI (`usage`)."""
+    if response is None:
+        return {}
+
+    get = response.get if isinstance(response, dict) else lambda key, default=None: getattr(response, key, default)
+    usage = {}
+    if get("prompt_eval_count") is not None:
+        usage["prompt_tokens"] = get("prompt_eval_count")
+    if get("prompt_eval_duration") is not None:
+        usage["prompt_eval_ms"] = get("prompt_eval_duration") / 1e6
+
+    openai_usage = get("usage")
+    if openai_usage is not None:
+        field = openai_usage.get if isinstance(openai_usage, dict) else lambda key, default=None: getattr(openai_usage, key, default)
+        if field("prompt_tokens") is not None:
+            usage["prompt_tokens"] = field("prompt_tokens")
+        details = field("prompt_tokens_details")
+        if details is not None:
+            cached = details.get("cached_tokens") if isinstance(details, dict) else getattr(details, "cached_tokens", None)
+            if cached is not None:
+                usage["cached_prompt_tokens"] = cached
+    return usage
+
+
+class ConversationHistory:
+    """Token-budgeted trimming that keeps the prompt prefix stable.
+
+    Nothing is removed until the estimated history exceeds `token_budget`.
+    Then whole turns are dropped from the front in one block, down to
+    `trim_ratio` of the budget. Between trims, every request therefore
+    extends the previous prompt, so the backend's prefix (KV) cache can be
+    reused. The system prompt is never touched. With a `summarize`
+    callable, dropped turns are folded into a single summary message placed
+    right after the system prompt.
+    """
+
+    summary_prefix = "Summary of the earlier conversation: "
+
+    def __init__(self, system_prompt: str = "", token_budget: int = 4096, trim_ratio: float = 0.5, summarize=None):
+        self.system_prompt = system_prompt
+        self.token_budget = max(1, int(token_budget))
+        self.trim_ratio = min(1.0, max(0.0, float(trim_ratio)))
+        self.summarize = summarize  # (messages, previous_summary) -> str
+        self.summary = ""
+        self.trims = 0
+
+    def initial_messages(self) -> list[dict]:
+        self.summary = ""
+        return [{"role": "system", "content": self.system_prompt}] if self.system_prompt else []
+
+    def pinned(self) -> int:
+        """Number of leading messages that are never trimmed."""
+        return (1 if self.system_prompt else 0) + (1 if self.summary else 0)
+
+    def tokens(self, messages: list[dict]) -> int:
+        return sum(estimate_tokens(message) for message in messages)
+
+    def trim(self, messages: list[dict]) -> bool:
+        """Drop a block of old turns from `messages` in place if over budget."""
+        if self.tokens(messages) <= self.token_budget:
+            return False
+
+        start = self.pinned()
+        target = int(self.token_budget * self.trim_ratio)
+        total = self.tokens(messages)
+        cut = start
+        index = start
+        # Only cut in front of a user message so tool results never lose their call.
+        while index < len(messages) and total > target:
+            total -= estimate_tokens(messages[index])
+            index += 1
+            if index < len(messages) and messages[index].get("role") == "user":
+                cut = index
+        if cut == start:
+            return False
+
+        dropped = messages[start:cut]
+        del messages[start:cut]
+        self.trims += 1
+
+        if self.summarize is not None:
+            try:
+                summary = self.summarize(dropped, self.summary).strip()
+            except Exception as exc:
+                print(f"History summary failed: {exc}")
+                summary = ""
+            if summary:
+                summary_message = {"role": "system", "content": self.summary_prefix + summary}
+                if self.summary:
+                    messages[start - 1] = summary_message
+                else:
+                    messages.insert(start, summary_message)
+                self.summary = summary
+        return True
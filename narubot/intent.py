@@ -0,0 +1,120 @@
+import datetime
+import math
+import re
+from collections import Counter
+
+from .utility import tool_intents
+
+
+def _language(text: str) -> str:
+    return "ko" if re.search(r"[가-힣]", text) else "en"
+
+
+def _normalize(text: str) -> str:
+    return re.sub(r"[^\w]+", " ", text.lower()).strip()
+
+
+def _strip_punctuation(text: str) -> str:
+    """Lowercase and drop punctuation, keeping apostrophes ("what's")."""
+    return " ".join(re.sub(r"[^\w\s']+", " ", text.lower()).split())
+
+
+def _bigrams(text: str) -> Counter:
+    """Character bigrams per word; works for Korean without a tokenizer."""
+    grams = Counter()
+    for word in _normalize(text).split():
+        padded = f" {word} "
+        grams.update(padded[index:index + 2] for index in range(len(padded) - 1))
+    return grams
+
+
+def _cosine(left: Counter, right: Counter) -> float:
+    dot = sum(count * right[gram] for gram, count in left.items() if gram in right)
+    if dot == 0:
+        return 0.0
+    norm = math.sqrt(sum(count * count for count in left.values())) * math.sqrt(sum(count * count for count in right.values()))
+    return dot / norm
+
+
+def _reply_fields(output) -> dict:
+    if isinstance(output, dict):
+        return output
+    fields = {"result": output}
+    try:
+        moment = datetime.datetime.strptime(str(output), "%Y-%m-%d %H:%M:%S")
+    except ValueError:
+        return fields
+    fields.update(hour=moment.hour, minute=moment.minute, date=moment.strftime("%Y-%m-%d"))
+    return fields
+
+
+class IntentRouter:
+    """Answer frequent tool-only questions locally, without an LLM round trip.
+
+    A query matches a tool when one of its regular expressions matches the
+    whole punctuation-stripped query (confidence 1.0), or when its
+    character-bigram similarity to the tool's example utterances reaches
+    `threshold` and every word of the query occurs in those examples. Extra
+    words ("... in Tokyo", "... 회의가 있었지") change the question, so they
+    send it to the model. A match runs the tool through the tool runtime and
+    fills the reply template for the query's language. A miss, a tool error
+    or a missing template returns None, and the caller falls through to the
+    model.
+    """
+
+    def __init__(self, tool_runtime, intents: dict | None = None, threshold: float = 0.8, max_chars: int = 60):
+        self.tool_runtime = tool_runtime
+        self.intents = tool_intents if intents is None else intents
+        self.threshold = threshold
+        self.max_chars = max_chars
+        self.patterns = {
+            name: [re.compile(pattern, re.IGNORECASE) for pattern in intent.get("patterns", [])]
+            for name, intent in self.intents.items()
+        }
+        self.examples = {
+            name: [_bigrams(example) for example in intent.get("examples", [])]
+            for name, intent in self.intents.items()
+        }
+        self.vocabulary = {
+            name: {word for example in intent.get("examples", []) for word in _normalize(example).split()}
+            for name, intent in self.intents.items()
+        }
+
+    def match(self, text: str) -> tuple[str, float] | None:
+        """Return (tool_name, confidence) of the best confident match."""
+        text = text.strip()
+        # Long utterances usually carry more than a lookup; leave them to the model.
+        if not text or len(text) > self.max_chars:
+            return None
+
+        stripped = _strip_punctuation(text)
+        for name, patterns in self.patterns.items():
+            if any(pattern.fullmatch(stripped) for pattern in patterns):
+                return name, 1.0
+
+        grams = _bigrams(text)
+        best = None
+        for name, examples in self.examples.items():
+            score = max((_cosine(grams, example) for example in examples), default=0.0)
+            if best is None or score > best[1]:
+                best = (name, score)
+        if best is not None and best[1] >= self.threshold and set(_normalize(text).split()) <= self.vocabulary[best[0]]:
+            return best
+        return None
+
+    def answer(self, text: str) -> str | None:
+        matched = self.match(text)
+        if matched is None:
+            return None
+
+        name, _ = matched
+        template = self.intents[name].get("templates", {}).get(_language(text))
+        if template is None:
+            return None
+        result = self.tool_runtime.execute([(name, {})])[0]
+        if result is None or result[1] is not None:
+            return None
+        try:
+            return template.format(**_reply_fields(result[0]))
+        except (KeyError, IndexError, ValueError):
+            return None
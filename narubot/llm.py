@@ -1,32 +1,126 @@
 import os
-
-os.environ['OLLAMA_HOST'] = 'localhost:11434'
+import re
+import threading
+from concurrent.futures import CancelledError
 
 import ollama
 
 from .config import Config
-from .utility import available_functions
+from .history import ConversationHistory
+from .history import prompt_usage
+from .intent import IntentRouter
+from .tools import ToolSelector
+from .tools import estimate_schema_tokens
+from .tools import get_tool_runtime
 from .utility import get_tools
 
 
+class SentenceChunker:
+    """Split streamed text into sentence-complete chunks for speech synthesis."""
+
+    boundary = re.compile(r"[.!?\u2026]+[\"')\]]*\s+|[\u3002\uff01\uff1f]+|\n+")
+
+    def __init__(self, min_chars: int = 10):
+        self.min_chars = min_chars
+        self.buffer = ""
+
+    def feed(self, text: str) -> list[str]:
+        self.buffer += text
+        sentences = []
+        start = 0
+        for match in self.boundary.finditer(self.buffer):
+            candidate = self.buffer[start:match.end()].strip()
+            if len(candidate) < self.min_chars:
+                continue
+            sentences.append(candidate)
+            start = match.end()
+        self.buffer = self.buffer[start:]
+        return sentences
+
+    def flush(self) -> str:
+        rest, self.buffer = self.buffer.strip(), ""
+        return rest
+
+
 class LLM:
+    max_tool_rounds = 3
+
     def __init__(self, config: Config):
         self.config = config
         self.tools = get_tools()
+        self.tool_runtime = get_tool_runtime(config)
+        self.tool_selector = ToolSelector(self.tools, threshold=config.llm_tool_selection_threshold) if config.llm_tool_selection else None
+        self.intent_router = IntentRouter(self.tool_runtime, threshold=config.llm_intent_threshold) if config.llm_intent_router else None
         self.provider = (self.config.llm_provider or "ollama").lower()
+        self.ollama_client = None
         self.openai_client = None
+        self.async_client = None
+        self.async_loop = None
+        self.router = None
+        self.ollama_options = {"num_batch": 1}
+        self.ollama_keep_alive = None
+        self.cancelled = threading.Event()
+        self.trim_thread = None
+        self.inflight = None
+        self.turn_usage = {}
 
-        if self.provider == "openai":
-            self._init_openai_client()
+        if self.provider == "ollama":
+            self._load_ollama_profile()
 
-        if len(self.config.llm_system_prompt) > 0:
-            self.messages = [{"role": "system", "content": self.config.llm_system_prompt}]
-            self.max_messages = 33
-            self.pop_at = 1
+        if self.config.llm_backends:
+            self._init_router()
+        elif self.config.llm_async_client:
+            self._init_async_client()
+        elif self.provider == "openai":
+            self._init_openai_client()
         else:
-            self.messages = []
-            self.max_messages = 32
-            self.pop_at = 0
+            self.ollama_client = ollama.Client(host=self.config.llm_ollama_host)
+
+        self.reset()
+
+    def reset(self) -> None:
+        """Start a new conversation while keeping the provider client."""
+        self.history = ConversationHistory(
+            self.config.llm_system_prompt,
+            token_budget=self.config.llm_history_token_budget,
+            trim_ratio=self.config.llm_history_trim_ratio,
+            summarize=self._summarize if self.config.llm_history_summarize else None,
+        )
+        self.messages = self.history.initial_messages()
+        self.attached_tools = set()
+
+    def _load_ollama_profile(self) -> None:
+        from .tuner import load_profile
+
+        profile = load_profile(self.config)
+        if profile is not None:
+            self.ollama_options = dict(profile.get("options") or self.ollama_options)
+            self.ollama_keep_alive = profile.get("keep_alive")
+
+    def _openai_api_key(self) -> str:
+        api_key = self.config.llm_api_key or os.getenv("OPENAI_API_KEY")
+        if not api_key:
+            raise ValueError(
+                "OpenAI provider requires an API key. Set config.llm_api_key or OPENAI_API_KEY."
+            )
+        return api_key
+
+    def _init_async_client(self) -> None:
+        from .llm_client import get_client_loop
+        from .llm_client import get_shared_client
+
+        api_key = self._openai_api_key() if self.provider == "openai" else None
+        # Shared by every LLM in the process, so connections outlive a single conversation.
+        self.async_client = get_shared_client(self.config, self.provider, api_key=api_key)
+        self.async_loop = get_client_loop()
+
+    def _init_router(self) -> None:
+        from .llm_client import get_client_loop
+        from .router import ProviderRouter
+
+        self.router = ProviderRouter.from_config(self.config)
+        self.async_loop = get_client_loop()
+        self.provider = "router"
 
     def _init_openai_client(self) -> None:
         try:
@@ -37,32 +131,29 @@ class LLM:
                 "Install it with: pip install openai"
             ) from exc
 
-        api_key = self.config.llm_api_key or os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            raise ValueError(
-                "OpenAI provider requires an API key. Set config.llm_api_key or OPENAI_API_KEY."
-            )
-
-        client_kwargs = {"api_key": api_key}
+        client_kwargs = {"api_key": self._openai_api_key()}
         if self.config.llm_base_url:
             client_kwargs["base_url"] = self.config.llm_base_url
 
         self.openai_client = OpenAI(**client_kwargs)
 
-    def _chat_with_ollama(self) -> dict:
-        return ollama.chat(
+    def _chat_with_ollama(self, messages: list, tools: list | None) -> dict:
+        kwargs = {"tools": tools} if tools else {}
+        return self.ollama_client.chat(
             model=self.config.llm_model,
-            messages=self.messages,
+            messages=messages,
             stream=False,
-            tools=self.tools,
-            options={"num_batch": 1},
+            options=self.ollama_options,
+            keep_alive=self.ollama_keep_alive,
+            **kwargs,
         )
 
-    def _chat_with_openai(self) -> tuple[dict, list]:
+    def _chat_with_openai(self, messages: list, tools: list | None) -> tuple[dict, list, object]:
+        kwargs = {"tools": tools} if tools else {}
         response = self.openai_client.chat.completions.create(
             model=self.config.llm_model,
-            messages=self.messages,
-            tools=self.tools,
+            messages=messages,
+            **kwargs,
         )
 
         choice = response.choices[0].message
@@ -84,7 +175,7 @@ class LLM:
                 for tool_call in choice.tool_calls
             ]
 
-        return message, choice.tool_calls or []
+        return message, choice.tool_calls or [], response
 
     def _parse_tool_arguments(self, arguments):
         if isinstance(arguments, dict):
@@ -102,65 +193,360 @@ class LLM:
 
         return {}
 
-    def chat(self, text: str) -> str:
+    def _set_inflight(self, future) -> None:
+        self.inflight = future
+        if self.cancelled.is_set():
+            future.cancel()
+
+    def _chat_with_async_client(self, messages: list, tools: list | None) -> tuple[dict | None, list, dict | None]:
+        if self.router is not None:
+            coroutine = self.router.chat(messages, tools)
+        else:
+            coroutine = self.async_client.chat(
+                self.config.llm_model, messages, tools, self.ollama_options, keep_alive=self.ollama_keep_alive,
+            )
+        future = self.async_loop.submit(coroutine)
+        self._set_inflight(future)
+        try:
+            return future.result()
+        except CancelledError:
+            return None, [], None
+        finally:
+            self.inflight = None
+
+    def _complete(self, tools: list | None, messages: list | None = None) -> tuple[dict | None, list]:
+        """Send the history (or `messages`) and return (assistant_message, tool_calls)."""
+        conversation = messages is None
+        messages = self.messages if conversation else messages
+        if self.async_loop is not None:
+            message, tool_calls, response = self._chat_with_async_client(messages, tools)
+        elif self.provider == "openai":
+            message, tool_calls, response = self._chat_with_openai(messages, tools)
+        else:
+            response = self._chat_with_ollama(messages, tools)
+            message = response["message"]
+            tool_calls = message.get("tool_calls") or []
+        if conversation:
+            self._record_usage(response)
+        return message, tool_calls
+
+    def _record_usage(self, response) -> None:
+        """Accumulate prompt statistics over the requests of one turn."""
+        for name, value in prompt_usage(response).items():
+            self.turn_usage[name] = self.turn_usage.get(name, 0) + value
+
+    def _report_usage(self, trace) -> None:
+        if trace is not None:
+            for name, value in self.turn_usage.items():
+                trace.set_metric(name, value)
+
+    def cancel(self) -> None:
+        """Discard the reply of the in-flight `chat` call (e.g. on barge-in).
+
+        With the async client the HTTP request itself is aborted as well.
+        """
+        self.cancelled.set()
+        future = self.inflight
+        if future is not None:
+            future.cancel()
+
+    def _discard_turn(self, start: int) -> str:
+        del self.messages[start:]
+        return ""
+
+    def _answer_locally(self, text: str, trace=None) -> str | None:
+        """Reply from the intent router, recording the exchange in the history."""
+        if self.intent_router is None:
+            return None
+        reply = self.intent_router.answer(text)
+        if reply is None:
+            return None
+        self.messages.append({"role": "user", "content": text})
+        self.messages.append({"role": "assistant", "content": reply})
+        if trace is not None:
+            trace.mark("llm_sent")
+            trace.mark("llm_first_token")
+            trace.update("llm_last_token")
+            trace.set_metric("intent_local", 1)
+        self._trim_history()
+        return reply
+
+    def _begin_turn(self) -> None:
+        # A summarizing trim from the previous turn must finish before the history is extended.
+        if self.trim_thread is not None:
+            self.trim_thread.join()
+            self.trim_thread = None
+        self.cancelled.clear()
+        self.turn_usage = {}
+
+    def chat(self, text: str, trace=None) -> str:
+        self._begin_turn()
+        reply = self._answer_locally(text, trace)
+        if reply is not None:
+            return reply
+
+        turn_start = len(self.messages)
         user_message = {"role": "user", "content": text}
         self.messages.append(user_message)
 
-        if self.provider == "openai":
-            msg, tool_calls = self._chat_with_openai()
-        else:
-            response = self._chat_with_ollama()
-            msg = response["message"]
-            tool_calls = msg.get("tool_calls") or []
+        if trace is not None:
+            trace.mark("llm_sent")
 
-        self.messages.append(msg)
+        tools = self._select_tools(text, trace)
+        for _ in self._tool_loop(tools, self._complete_events, turn_start):
+            pass
+        if len(self.messages) <= turn_start:
+            # Cancelled; the turn was discarded.
+            return ""
+        msg = self.messages[-1]
 
-        if tool_calls:
-            for tool in tool_calls:
-                if self.provider == "openai":
-                    function_name = tool.function.name
-                    arguments = self._parse_tool_arguments(tool.function.arguments)
-                    tool_call_id = tool.id
+        if trace is not None:
+            # Non-streaming requests deliver every token at once.
+            trace.mark("llm_first_token")
+            trace.update("llm_last_token")
+
+        self._report_usage(trace)
+        self._trim_history()
+        return msg.get("content", "")
+
+    def _complete_events(self, tools: list | None):
+        """`_complete` in the event form of `_stream`; usage is recorded by `_complete` itself."""
+        message, tool_calls = self._complete(tools)
+        yield "message", message, tool_calls
+
+    def _tool_loop(self, tools: list | None, request, turn_start: int):
+        """Send requests until a reply has no tool calls, running at most `max_tool_rounds` rounds of tools.
+
+        `request(tools)` yields ("content", text), ("usage", stats) and finally
+        ("message", assistant_message, tool_calls), like `_stream`. Content is
+        yielded on; assistant messages and tool results are appended to the
+        history. On cancel the turn is discarded and the loop stops. Every
+        round sends the same `tools`: chat templates render them into the
+        system block, so dropping them would change the cached prompt prefix.
+        """
+        for tool_round in range(self.max_tool_rounds + 1):
+            message = None
+            tool_calls = []
+            for event in request(tools):
+                if event[0] == "content":
+                    yield event[1]
+                elif event[0] == "usage":
+                    self._record_usage(event[1])
                 else:
-                    function_name = tool["function"]["name"]
-                    arguments = tool["function"]["arguments"]
-                    tool_call_id = None
-
-                if function_to_call := available_functions.get(function_name):
-                    output = function_to_call(**arguments)
-                    if self.provider == "openai":
-                        self.messages.append(
-                            {
-                                "role": "tool",
-                                "tool_call_id": tool_call_id,
-                                "content": str(output),
-                            }
-                        )
-                    else:
-                        self.messages.append(
-                            {
-                                "role": "tool",
-                                "content": str(output),
-                                "name": function_name,
-                            }
-                        )
-
-            if self.provider == "openai":
-                final_msg, _ = self._chat_with_openai()
-            else:
-                final_response = ollama.chat(
-                    model=self.config.llm_model,
-                    messages=self.messages,
-                    stream=False,
-                    options={"num_batch": 1},
+                    _, message, tool_calls = event
+
+            if self.cancelled.is_set() or message is None:
+                self._discard_turn(turn_start)
+                return
+
+            if tool_calls and tool_round == self.max_tool_rounds:
+                # Out of tool rounds: keep the text, drop calls that would never get results.
+                message.pop("tool_calls", None)
+                tool_calls = []
+            self.messages.append(message)
+            if not tool_calls:
+                return
+            self._run_tool_calls(tool_calls)
+
+    def _trim_history(self) -> None:
+        """Trim the history once the reply is out.
+
+        Trimming rewrites the prompt prefix, so it happens rarely and in large
+        blocks. A summarizing trim costs a model round trip, so it runs in the
+        background and the next turn waits for it in `_begin_turn`.
+        """
+        if self.history.summarize is not None and self.history.tokens(self.messages) > self.history.token_budget:
+            self.trim_thread = threading.Thread(target=self._trim_now, name="llm-history-trim", daemon=True)
+            self.trim_thread.start()
+            return
+        self._trim_now()
+
+    def _trim_now(self) -> None:
+        if self.history.trim(self.messages):
+            print(f"Trimmed conversation history to ~{self.history.tokens(self.messages)} tokens")
+
+    def _summarize(self, dropped: list[dict], previous: str) -> str:
+        transcript = "\n".join(
+            f"{message['role']}: {message.get('content') or ''}"
+            for message in dropped
+            if message.get("role") in ("user", "assistant") and message.get("content")
+        )
+        if previous:
+            transcript = f"Earlier summary: {previous}\n{transcript}"
+        message, _ = self._complete(None, messages=[
+            {
+                "role": "system",
+                "content": "Summarize the following conversation in a few sentences. Keep names, facts and open requests.",
+            },
+            {"role": "user", "content": transcript},
+        ])
+        return (message or {}).get("content", "")
+
+    def _tool_call_fields(self, tool) -> tuple[str, dict, str | None]:
+        """Return (name, arguments, id) for ollama dicts, OpenAI objects or accumulated stream dicts."""
+        if isinstance(tool, dict):
+            function = tool["function"]
+            return function["name"], self._parse_tool_arguments(function.get("arguments")), tool.get("id")
+        return tool.function.name, self._parse_tool_arguments(tool.function.arguments), tool.id
+
+    def _select_tools(self, text: str, trace=None) -> list:
+        if self.tool_selector is None:
+            return self.tools
+        # Tools render into the cached prompt prefix, so within a conversation
+        # the attached set only grows: a tool is added once and never removed.
+        self.attached_tools.update(tool["function"]["name"] for tool in self.tool_selector.select(text))
+        tools = [tool for tool in self.tools if tool["function"]["name"] in self.attached_tools]
+        before = estimate_schema_tokens(self.tools)
+        after = estimate_schema_tokens(tools)
+        print(f"Tools: {len(tools)}/{len(self.tools)} attached, ~{after}/{before} schema tokens")
+        if trace is not None:
+            trace.set_metric("tool_schema_tokens", after)
+        return tools
+
+    def _run_tool_calls(self, tool_calls) -> None:
+        fields = [self._tool_call_fields(tool) for tool in tool_calls]
+        outputs = self.tool_runtime.run([(function_name, arguments) for function_name, arguments, _ in fields])
+        for (function_name, _, tool_call_id), output in zip(fields, outputs):
+            if output is None:
+                # Every call gets a result, or the next request pairs results with the wrong calls.
+                print(f"Function {function_name} not found")
+                output = f"Error: unknown tool {function_name}"
+            # With a router both fields are kept; each backend gets the one it understands.
+            message = {"role": "tool", "content": output}
+            if self.provider != "ollama":
+                message["tool_call_id"] = tool_call_id
+            if self.provider != "openai":
+                message["name"] = function_name
+            self.messages.append(message)
+
+    def _stream_ollama(self, tools: list | None):
+        """Yield ("content", text) pieces and ("usage", stats), then ("message", assistant_message, tool_calls)."""
+        kwargs = {"tools": tools} if tools else {}
+        content = []
+        tool_calls = []
+        for chunk in self.ollama_client.chat(
+            model=self.config.llm_model,
+            messages=self.messages,
+            stream=True,
+            options=self.ollama_options,
+            keep_alive=self.ollama_keep_alive,
+            **kwargs,
+        ):
+            message = chunk.get("message") or {}
+            if message.get("tool_calls"):
+                tool_calls.extend(message["tool_calls"])
+            if message.get("content"):
+                content.append(message["content"])
+                yield "content", message["content"]
+            if chunk.get("done"):
+                yield "usage", chunk
+            if self.cancelled.is_set():
+                break
+
+        message = {"role": "assistant", "content": "".join(content)}
+        if tool_calls:
+            message["tool_calls"] = tool_calls
+        yield "message", message, tool_calls
+
+    def _stream_openai(self, tools: list | None):
+        """Yield ("content", text) pieces and ("usage", stats), then ("message", assistant_message, tool_calls)."""
+        kwargs = {"tools": tools} if tools else {}
+        content = []
+        partial_calls = {}
+        stream = self.openai_client.chat.completions.create(
+            model=self.config.llm_model,
+            messages=self.messages,
+            stream=True,
+            stream_options={"include_usage": True},
+            **kwargs,
+        )
+        for chunk in stream:
+            if getattr(chunk, "usage", None) is not None:
+                yield "usage", chunk
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta
+            for tool_call in delta.tool_calls or []:
+                # Tool calls arrive in fragments keyed by index; the arguments JSON is split across chunks.
+                call = partial_calls.setdefault(
+                    tool_call.index,
+                    {"id": None, "type": "function", "function": {"name": "", "arguments": ""}},
                 )
-                final_msg = final_response["message"]
+                if tool_call.id:
+                    call["id"] = tool_call.id
+                if tool_call.function is not None:
+                    call["function"]["name"] += tool_call.function.name or ""
+                    call["function"]["arguments"] += tool_call.function.arguments or ""
+            if delta.content:
+                content.append(delta.content)
+                yield "content", delta.content
+            if self.cancelled.is_set():
+                stream.close()
+                break
+
+        tool_calls = [partial_calls[index] for index in sorted(partial_calls)]
+        message = {"role": "assistant", "content": "".join(content)}
+        if tool_calls:
+            message["tool_calls"] = tool_calls
+        yield "message", message, tool_calls
 
-            msg = final_msg
-            self.messages.append(msg)
+    def _stream_async(self, tools: list | None):
+        """Yield the same events as `_stream_ollama`; cancelling ends the stream without a message event."""
+        if self.router is not None:
+            stream = self.router.chat_stream(self.messages, tools)
+        else:
+            stream = self.async_client.chat_stream(
+                self.config.llm_model, self.messages, tools, self.ollama_options, keep_alive=self.ollama_keep_alive,
+            )
+        try:
+            yield from self.async_loop.stream(stream, on_future=self._set_inflight)
+        finally:
+            self.inflight = None
 
-        if len(self.messages) > self.max_messages:
-            self.messages.pop(self.pop_at)
-            self.messages.pop(self.pop_at)
+    def _stream(self, tools: list | None):
+        if self.async_loop is not None:
+            return self._stream_async(tools)
+        if self.provider == "openai":
+            return self._stream_openai(tools)
+        return self._stream_ollama(tools)
 
-        return msg.get("content", "")
+    def chat_stream(self, text: str, trace=None):
+        """Stream the reply to `text` as sentence-complete chunks.
+
+        Tool calls are executed when a response finishes and the follow-up
+        answer is streamed the same way, for up to `max_tool_rounds` rounds
+        (see `_tool_loop`, which `chat` shares). The full reply is added to
+        the history once the stream ends; a cancelled stream leaves no trace
+        in the history.
+        """
+        self._begin_turn()
+        reply = self._answer_locally(text, trace)
+        if reply is not None:
+            yield reply
+            return
+
+        turn_start = len(self.messages)
+        self.messages.append({"role": "user", "content": text})
+        if trace is not None:
+            trace.mark("llm_sent")
+
+        chunker = SentenceChunker(self.config.llm_stream_min_sentence_chars)
+        tools = self._select_tools(text, trace)
+        for content in self._tool_loop(tools, self._stream, turn_start):
+            if trace is not None:
+                trace.mark("llm_first_token")
+                trace.update("llm_last_token")
+            yield from chunker.feed(content)
+        if len(self.messages) <= turn_start:
+            return
+
+        rest = chunker.flush()
+        if rest:
+            yield rest
+        self._report_usage(trace)
+        self._trim_history()
+
+    def close(self) -> None:
+        if self.router is not None:
+            for name, stats in self.router.stats().items():
+                print(f"LLM backend {name}: {stats}")
@@ -0,0 +1,223 @@
+import asyncio
+import json
+import queue
+import threading
+
+from .config import Config
+
+
+class AsyncLLMClient:
+    """asyncio client for ollama `/api/chat` and OpenAI-compatible `/chat/completions`.
+
+    One instance holds a long-lived httpx connection pool with keep-alive,
+    so TCP/TLS setup is paid once per process rather than per conversation,
+    and many conversations can have requests in flight at the same time.
+    """
+
+    def __init__(self, provider: str, base_url: str, api_key: str | None = None, timeout_sec: float = 60.0,
+            max_connections: int = 16, keepalive_expiry_sec: float = 300.0):
+        import httpx
+
+        self.provider = provider
+        headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+        self.http = httpx.AsyncClient(
+            base_url=base_url.rstrip("/"),
+            headers=headers,
+            timeout=httpx.Timeout(timeout_sec, connect=min(10.0, timeout_sec)),
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+                keepalive_expiry=keepalive_expiry_sec,
+            ),
+        )
+
+    def _payload(self, model: str, messages: list, tools: list | None, options: dict | None, stream: bool,
+            keep_alive: str | None = None) -> tuple[str, dict]:
+        payload = {"model": model, "messages": messages, "stream": stream}
+        if tools:
+            payload["tools"] = tools
+        if self.provider == "openai":
+            if stream:
+                payload["stream_options"] = {"include_usage": True}
+            return "/chat/completions", payload
+        if options:
+            payload["options"] = options
+        if keep_alive is not None:
+            payload["keep_alive"] = keep_alive
+        return "/api/chat", payload
+
+    @staticmethod
+    def _openai_message(choice: dict) -> tuple[dict, list]:
+        message = {"role": "assistant", "content": choice.get("content") or ""}
+        tool_calls = choice.get("tool_calls") or []
+        if tool_calls:
+            message["tool_calls"] = tool_calls
+        return message, tool_calls
+
+    async def chat(self, model: str, messages: list, tools: list | None = None, options: dict | None = None,
+            keep_alive: str | None = None) -> tuple[dict, list, dict]:
+        """Return (assistant_message, tool_calls, raw_response)."""
+        path, payload = self._payload(model, messages, tools, options, stream=False, keep_alive=keep_alive)
+        response = await self.http.post(path, json=payload)
+        response.raise_for_status()
+        body = response.json()
+        if self.provider == "openai":
+            message, tool_calls = self._openai_message(body["choices"][0]["message"])
+            return message, tool_calls, body
+        message = body["message"]
+        return message, message.get("tool_calls") or [], body
+
+    async def chat_stream(self, model: str, messages: list, tools: list | None = None, options: dict | None = None,
+            keep_alive: str | None = None):
+        """Yield ("content", text) pieces and ("usage", stats), then ("message", assistant_message, tool_calls)."""
+        path, payload = self._payload(model, messages, tools, options, stream=True, keep_alive=keep_alive)
+        content = []
+        tool_calls = []
+        partial_calls = {}
+        async with self.http.stream("POST", path, json=payload) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line:
+                    continue
+                if self.provider == "openai":
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[len("data:"):].strip()
+                    if data == "[DONE]":
+                        break
+                    chunk = json.loads(data)
+                    if chunk.get("usage"):
+                        yield "usage", chunk
+                    if not chunk.get("choices"):
+                        continue
+                    delta = chunk["choices"][0].get("delta") or {}
+                    for tool_call in delta.get("tool_calls") or []:
+                        call = partial_calls.setdefault(
+                            tool_call.get("index", 0),
+                            {"id": None, "type": "function", "function": {"name": "", "arguments": ""}},
+                        )
+                        if tool_call.get("id"):
+                            call["id"] = tool_call["id"]
+                        function = tool_call.get("function") or {}
+                        call["function"]["name"] += function.get("name") or ""
+                        call["function"]["arguments"] += function.get("arguments") or ""
+                    text = delta.get("content")
+                else:
+                    chunk = json.loads(line)
+                    message = chunk.get("message") or {}
+                    tool_calls.extend(message.get("tool_calls") or [])
+                    text = message.get("content")
+                    if chunk.get("done"):
+                        yield "usage", chunk
+                if text:
+                    content.append(text)
+                    yield "content", text
+
+        if partial_calls:
+            tool_calls = [partial_calls[index] for index in sorted(partial_calls)]
+        message = {"role": "assistant", "content": "".join(content)}
+        if tool_calls:
+            message["tool_calls"] = tool_calls
+        yield "message", message, tool_calls
+
+    async def aclose(self) -> None:
+        await self.http.aclose()
+
+
+class ClientLoop:
+    """Background event loop that lets synchronous callers use async clients.
+
+    Calls return `concurrent.futures.Future` objects, so a caller on another
+    thread can cancel an in-flight request; the cancellation propagates into
+    the asyncio task and aborts the HTTP request.
+    """
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="llm-client-loop", daemon=True)
+        self.thread.start()
+
+    def submit(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+
+    def stream(self, async_iterator, on_future=None):
+        """Iterate an async iterator from synchronous code.
+
+        `on_future` receives the future driving the iteration so the caller
+        can cancel it; cancellation ends the iteration early.
+        """
+        items = queue.Queue()
+        done = object()
+
+        async def pump():
+            try:
+                async for item in async_iterator:
+                    items.put((item, None))
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                items.put((None, exc))
+
+        future = self.submit(pump())
+        # Also fires when the task is cancelled before it starts running.
+        future.add_done_callback(lambda _: items.put((done, None)))
+        if on_future is not None:
+            on_future(future)
+        try:
+            while True:
+                item, error = items.get()
+                if error is not None:
+                    raise error
+                if item is done:
+                    return
+                yield item
+        finally:
+            # Abandoning the iterator early must not leave the request running.
+            future.cancel()
+
+
+_shared_loop = None
+_shared_clients = {}
+_shared_lock = threading.Lock()
+
+
+def get_client_loop() -> ClientLoop:
+    global _shared_loop
+    with _shared_lock:
+        if _shared_loop is None:
+            _shared_loop = ClientLoop()
+        return _shared_loop
+
+
+def get_shared_client(config: Config, provider: str | None = None, base_url: str | None = None,
+        api_key: str | None = None) -> AsyncLLMClient:
+    """Return the process-wide client for an endpoint, creating it on first use."""
+    import os
+
+    provider = (provider or config.llm_provider or "ollama").lower()
+    if provider == "openai":
+        base_url = base_url or config.llm_base_url or "https://api.openai.com/v1"
+        api_key = api_key or config.llm_api_key or os.getenv("OPENAI_API_KEY")
+    else:
+        base_url = base_url or config.llm_ollama_host
+        if "://" not in base_url:
+            base_url = f"http://{base_url}"
+
+    key = (provider, base_url, api_key)
+    loop = get_client_loop()
+    with _shared_lock:
+        client = _shared_clients.get(key)
+        if client is None:
+            async def create():
+                # httpx binds its connection pool to the loop it is used on.
+                return AsyncLLMClient(
+                    provider,
+                    base_url,
+                    api_key=api_key,
+                    timeout_sec=config.llm_timeout_sec,
+                    max_connections=config.llm_max_connections,
+                )
+
+            client = loop.submit(create()).result()
+            _shared_clients[key] = client
+        return client
@@ -0,0 +1,398 @@
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+
+
+class MockLLMSettings:
+    """Timing and failure behaviour of the mock server.
+
+    `ttft_ms` is the delay before the first token, plus `prefill_ms_per_token`
+    for every (estimated) prompt token. Tokens are then emitted at
+    `tokens_per_sec`. `max_concurrency` requests are generated at a time; the
+    rest wait, like a single-GPU ollama. Failure injection: `failure_rate`
+    answers HTTP 500, `stall_rate` hangs for `stall_sec` before answering
+    and `disconnect_rate` drops streamed responses after a few tokens.
+    """
+
+    def __init__(self, ttft_ms: float = 200.0, tokens_per_sec: float = 30.0, prefill_ms_per_token: float = 0.0,
+            reply: str | None = None, reply_tokens: int = 40, max_concurrency: int = 1, failure_rate: float = 0.0,
+            stall_rate: float = 0.0, stall_sec: float = 30.0, disconnect_rate: float = 0.0, seed: int | None = None):
+        self.ttft_ms = ttft_ms
+        self.tokens_per_sec = tokens_per_sec
+        self.prefill_ms_per_token = prefill_ms_per_token
+        self.reply = reply
+        self.reply_tokens = reply_tokens
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.failure_rate = failure_rate
+        self.stall_rate = stall_rate
+        self.stall_sec = stall_sec
+        self.disconnect_rate = disconnect_rate
+        self.seed = seed
+
+
+_FILLER = (
+    "This is a simulated answer from the mock server. It streams one token at a time so latency can be measured. "
+    "Each sentence ends with a period, which lets the sentence chunker hand complete sentences to speech synthesis. "
+)
+
+
+class MockLLM:
+    """Generates replies, tool calls and timings for one server instance."""
+
+    def __init__(self, settings: MockLLMSettings):
+        self.settings = settings
+        self.random = random.Random(settings.seed)
+        self.random_lock = threading.Lock()
+        self.slots = threading.Semaphore(settings.max_concurrency)
+        self.stats_lock = threading.Lock()
+        self.requests = 0
+        self.failures = 0
+
+    def roll(self, rate: float) -> bool:
+        if rate <= 0.0:
+            return False
+        with self.random_lock:
+            return self.random.random() < rate
+
+    def tokens(self, messages: list) -> list[str]:
+        last = messages[-1] if messages else {}
+        if last.get("role") == "tool":
+            return re.findall(r"\S+\s*", f"The tool returned {last.get('content', '')}.")
+        words = re.findall(r"\S+\s*", self.settings.reply or _FILLER)
+        if self.settings.reply is None:
+            while len(words) < self.settings.reply_tokens:
+                words.extend(re.findall(r"\S+\s*", _FILLER))
+            words = words[:self.settings.reply_tokens]
+        return words
+
+    def tool_call(self, messages: list, tools: list | None) -> dict | None:
+        """Call the first offered tool whose name shares a word with the user's message."""
+        if not tools or not messages or messages[-1].get("role") != "user":
+            return None
+        text = str(messages[-1].get("content", "")).lower()
+        for tool in tools:
+            name = tool.get("function", {}).get("name", "")
+            words = [word for word in name.lower().split("_") if word not in ("get", "set", "current")]
+            if any(word in text for word in words):
+                return {"name": name, "arguments": {}}
+        return None
+
+    def prompt_tokens(self, messages: list) -> int:
+        return sum(len(str(message.get("content") or "")) // 4 + 4 for message in messages)
+
+    def wait_first_token(self, prompt_tokens: int) -> float:
+        delay = (self.settings.ttft_ms + self.settings.prefill_ms_per_token * prompt_tokens) / 1000.0
+        time.sleep(delay)
+        return delay
+
+    def token_interval(self) -> float:
+        return 1.0 / self.settings.tokens_per_sec if self.settings.tokens_per_sec > 0 else 0.0
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "MockLLMServer"
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+    def _send_json(self, status: int, body: dict) -> None:
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _start_stream(self, content_type: str) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+    def _write_chunk(self, data: str) -> None:
+        encoded = data.encode("utf-8")
+        self.wfile.write(f"{len(encoded):X}\r\n".encode("ascii") + encoded + b"\r\n")
+        self.wfile.flush()
+
+    def _end_stream(self) -> None:
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+    def do_GET(self) -> None:
+        if self.path == "/mock/stats":
+            self._send_json(200, self.server.stats())
+        elif self.path in ("/api/tags", "/v1/models", "/models"):
+            self._send_json(200, {"models": [], "data": []})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            request = json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError:
+            self._send_json(400, {"error": "invalid JSON"})
+            return
+
+        if self.path == "/api/chat":
+            handler = self._ollama_chat
+        elif self.path in ("/v1/chat/completions", "/chat/completions"):
+            handler = self._openai_chat
+        else:
+            self._send_json(404, {"error": "not found"})
+            return
+
+        llm = self.server.llm
+        with llm.stats_lock:
+            llm.requests += 1
+        if llm.roll(llm.settings.stall_rate):
+            time.sleep(llm.settings.stall_sec)
+        if llm.roll(llm.settings.failure_rate):
+            with llm.stats_lock:
+                llm.failures += 1
+            self._send_json(500, {"error": "injected failure"})
+            return
+
+        with llm.slots:
+            try:
+                handler(request)
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+    def _generate(self, request: dict):
+        """Yield ("tool_call", call) or ("token", text) events, then ("done", stats)."""
+        llm = self.server.llm
+        messages = request.get("messages") or []
+        prompt_tokens = llm.prompt_tokens(messages)
+        started = time.monotonic()
+        prefill = llm.wait_first_token(prompt_tokens)
+
+        call = llm.tool_call(messages, request.get("tools"))
+        emitted = 0
+        if call is not None:
+            yield "tool_call", call
+        else:
+            interval = llm.token_interval()
+            for index, token in enumerate(llm.tokens(messages)):
+                if index:
+                    time.sleep(interval)
+                emitted += 1
+                yield "token", token
+        yield "done", {
+            "prompt_tokens": prompt_tokens,
+            "prompt_eval_ns": int(prefill * 1e9),
+            "completion_tokens": emitted,
+            "total_ns": int((time.monotonic() - started) * 1e9),
+        }
+
+    def _ollama_chat(self, request: dict) -> None:
+        model = request.get("model", "mock")
+        stream = request.get("stream", True)
+        disconnect = stream and self.server.llm.roll(self.server.llm.settings.disconnect_rate)
+        content = []
+        tool_calls = []
+
+        if stream:
+            self._start_stream("application/x-ndjson")
+        for event, value in self._generate(request):
+            if event == "tool_call":
+                tool_calls.append({"function": value})
+                if stream:
+                    self._write_chunk(json.dumps({
+                        "model": model,
+                        "message": {"role": "assistant", "content": "", "tool_calls": tool_calls},
+                        "done": False,
+                    }) + "\n")
+            elif event == "token":
+                content.append(value)
+                if stream:
+                    self._write_chunk(json.dumps({
+                        "model": model,
+                        "message": {"role": "assistant", "content": value},
+                        "done": False,
+                    }) + "\n")
+                    if disconnect and len(content) >= 3:
+                        self.close_connection = True
+                        return
+            else:
+                final = {
+                    "model": model,
+                    "message": {"role": "assistant", "content": "" if stream else "".join(content)},
+                    "done": True,
+                    "done_reason": "stop",
+                    "prompt_eval_count": value["prompt_tokens"],
+                    "prompt_eval_duration": value["prompt_eval_ns"],
+                    "eval_count": value["completion_tokens"],
+                    "total_duration": value["total_ns"],
+                }
+                if tool_calls and not stream:
+                    final["message"]["tool_calls"] = tool_calls
+                if stream:
+                    self._write_chunk(json.dumps(final) + "\n")
+                    self._end_stream()
+                else:
+                    self._send_json(200, final)
+
+    def _openai_chat(self, request: dict) -> None:
+        model = request.get("model", "mock")
+        stream = request.get("stream", False)
+        include_usage = bool((request.get("stream_options") or {}).get("include_usage"))
+        disconnect = stream and self.server.llm.roll(self.server.llm.settings.disconnect_rate)
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        content = []
+        tool_calls = []
+
+        def chunk(delta: dict, finish_reason=None) -> str:
+            body = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }
+            return f"data: {json.dumps(body)}\n\n"
+
+        if stream:
+            self._start_stream("text/event-stream")
+            self._write_chunk(chunk({"role": "assistant", "content": ""}))
+        for event, value in self._generate(request):
+            if event == "tool_call":
+                call = {
+                    "id": f"call_{uuid.uuid4().hex[:12]}",
+                    "type": "function",
+                    "function": {"name": value["name"], "arguments": json.dumps(value["arguments"])},
+                }
+                tool_calls.append(call)
+                if stream:
+                    # Split like real servers do: name first, then the arguments in fragments.
+                    arguments = call["function"]["arguments"]
+                    self._write_chunk(chunk({"tool_calls": [{
+                        "index": 0, "id": call["id"], "type": "function",
+                        "function": {"name": value["name"], "arguments": ""},
+                    }]}))
+                    for start in range(0, len(arguments), 4):
+                        self._write_chunk(chunk({"tool_calls": [{
+                            "index": 0, "function": {"arguments": arguments[start:start + 4]},
+                        }]}))
+            elif event == "token":
+                content.append(value)
+                if stream:
+                    self._write_chunk(chunk({"content": value}))
+                    if disconnect and len(content) >= 3:
+                        self.close_connection = True
+                        return
+            else:
+                usage = {
+                    "prompt_tokens": value["prompt_tokens"],
+                    "completion_tokens": value["completion_tokens"],
+                    "total_tokens": value["prompt_tokens"] + value["completion_tokens"],
+                }
+                finish_reason = "tool_calls" if tool_calls else "stop"
+                if not stream:
+                    message = {"role": "assistant", "content": "".join(content) or None}
+                    if tool_calls:
+                        message["tool_calls"] = tool_calls
+                    self._send_json(200, {
+                        "id": completion_id,
+                        "object": "chat.completion",
+                        "created": int(time.time()),
+                        "model": model,
+                        "choices": [{"index": 0, "message": message, "finish_reason": finish_reason}],
+                        "usage": usage,
+                    })
+                    return
+                self._write_chunk(chunk({}, finish_reason))
+                if include_usage:
+                    self._write_chunk("data: " + json.dumps({
+                        "id": completion_id,
+                        "object": "chat.completion.chunk",
+                        "created": int(time.time()),
+                        "model": model,
+                        "choices": [],
+                        "usage": usage,
+                    }) + "\n\n")
+                self._write_chunk("data: [DONE]\n\n")
+                self._end_stream()
+
+
+class MockLLMServer(ThreadingHTTPServer):
+    """Stand-in for ollama (`/api/chat`) and OpenAI-compatible (`/v1/chat/completions`) servers.
+
+    Replies are canned text streamed at a controlled rate; a user message
+    that names an offered tool (e.g. "current time" for `get_current_time`)
+    gets a tool call instead, and the follow-up request echoes the tool
+    result. Point `llm_ollama_host` or `llm_base_url` (with `/v1`) at `url`.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, settings: MockLLMSettings | None = None):
+        super().__init__((host, port), _Handler)
+        self.llm = MockLLM(settings or MockLLMSettings())
+        self.thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def stats(self) -> dict:
+        with self.llm.stats_lock:
+            return {"requests": self.llm.requests, "failures": self.llm.failures}
+
+    def start(self) -> "MockLLMServer":
+        self.thread = threading.Thread(target=self.serve_forever, name="mock-llm-server", daemon=True)
+        self.thread.start()
+        return self
+
+    def close(self) -> None:
+        self.shutdown()
+        self.server_close()
+        if self.thread is not None:
+            self.thread.join(timeout=2.0)
+            self.thread = None
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve a mock ollama/OpenAI-compatible chat endpoint.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--ttft-ms", type=float, default=200.0)
+    parser.add_argument("--tokens-per-sec", type=float, default=30.0)
+    parser.add_argument("--prefill-ms-per-token", type=float, default=0.0)
+    parser.add_argument("--reply-tokens", type=int, default=40)
+    parser.add_argument("--max-concurrency", type=int, default=1)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--stall-rate", type=float, default=0.0)
+    parser.add_argument("--stall-sec", type=float, default=30.0)
+    parser.add_argument("--disconnect-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    server = MockLLMServer(args.host, args.port, MockLLMSettings(
+        ttft_ms=args.ttft_ms,
+        tokens_per_sec=args.tokens_per_sec,
+        prefill_ms_per_token=args.prefill_ms_per_token,
+        reply_tokens=args.reply_tokens,
+        max_concurrency=args.max_concurrency,
+        failure_rate=args.failure_rate,
+        stall_rate=args.stall_rate,
+        stall_sec=args.stall_sec,
+        disconnect_rate=args.disconnect_rate,
+        seed=args.seed,
+    ))
+    print(f"Mock LLM server listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
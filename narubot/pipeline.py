@@ -0,0 +1,156 @@
+import queue
+import threading
+import time
+
+
+class StageStats:
+    def __init__(self):
+        self.processed = 0
+        self.dropped = 0
+        self.errors = 0
+        self.busy_sec = 0.0
+        self.started_at = time.monotonic()
+
+    def snapshot(self, depth: int) -> dict:
+        elapsed = max(1e-9, time.monotonic() - self.started_at)
+        return {
+            "queue_depth": depth,
+            "processed": self.processed,
+            "dropped": self.dropped,
+            "errors": self.errors,
+            "throughput_per_sec": self.processed / elapsed,
+            "utilization": min(1.0, self.busy_sec / elapsed),
+            "avg_sec": self.busy_sec / self.processed if self.processed else 0.0,
+        }
+
+
+class Stage:
+    """One pipeline step with its own worker thread and bounded input queue.
+
+    `handler(item)` returns the item for the next stage, or None to stop
+    there. Putting into a full queue blocks, which pushes back on the
+    previous stage instead of growing memory. Every item taken from the
+    queue is marked done only after it was handled and forwarded, so
+    `queue.unfinished_tasks` counts work that is queued or in flight.
+    """
+
+    def __init__(self, name: str, handler, maxsize: int = 4, input_queue: queue.Queue | None = None):
+        self.name = name
+        self.handler = handler
+        self.queue = input_queue if input_queue is not None else queue.Queue(maxsize=maxsize)
+        self.next_stage = None
+        self.pipeline = None
+        self.thread = None
+        self.stats = StageStats()
+
+    def put(self, item) -> bool:
+        while self.pipeline.running:
+            try:
+                self.queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def clear(self) -> int:
+        cleared = 0
+        while True:
+            try:
+                self.queue.get_nowait()
+            except queue.Empty:
+                break
+            self.queue.task_done()
+            cleared += 1
+        self.stats.dropped += cleared
+        return cleared
+
+    def _loop(self) -> None:
+        while self.pipeline.running:
+            try:
+                item = self.queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+
+            try:
+                self._process(item)
+            finally:
+                self.queue.task_done()
+
+    def _process(self, item) -> None:
+        epoch = self.pipeline.epoch
+        started = time.monotonic()
+        try:
+            output = self.handler(item)
+        except Exception as exc:
+            self.stats.errors += 1
+            print(f"{self.name} stage error: {exc}")
+            return
+        finally:
+            self.stats.busy_sec += time.monotonic() - started
+
+        self.stats.processed += 1
+        if output is None or self.next_stage is None:
+            return
+        if not self.pipeline.is_current(epoch):
+            self.stats.dropped += 1
+            return
+        self.next_stage.put(output)
+
+    def start(self) -> None:
+        self.stats = StageStats()
+        self.thread = threading.Thread(target=self._loop, name=f"stage-{self.name}", daemon=True)
+        self.thread.start()
+
+    def join(self, timeout: float) -> None:
+        if self.thread is not None and self.thread.is_alive():
+            self.thread.join(timeout=timeout)
+        self.thread = None
+
+
+class Pipeline:
+    """Chain of stages that run concurrently, e.g. transcribe -> respond -> speak.
+
+    `cancel` bumps the pipeline epoch and empties downstream queues, so work
+    that was started before the cancel is discarded instead of forwarded.
+    """
+
+    def __init__(self, stages: list[Stage]):
+        self.stages = {stage.name: stage for stage in stages}
+        self.order = stages
+        self.running = False
+        self.epoch = 0
+        self.lock = threading.Lock()
+        for stage, next_stage in zip(stages, stages[1:] + [None]):
+            stage.pipeline = self
+            stage.next_stage = next_stage
+
+    def is_current(self, epoch: int) -> bool:
+        return epoch == self.epoch
+
+    def submit(self, stage_name: str, item) -> bool:
+        return self.stages[stage_name].put(item)
+
+    def cancel(self, stage_names: list[str] | None = None) -> None:
+        with self.lock:
+            self.epoch += 1
+            for stage in self.order:
+                if stage_names is None or stage.name in stage_names:
+                    stage.clear()
+
+    def start(self) -> None:
+        self.running = True
+        for stage in self.order:
+            stage.start()
+
+    def stop(self, timeout: float = 1.0) -> None:
+        self.running = False
+        for stage in self.order:
+            stage.join(timeout)
+
+    def is_idle(self) -> bool:
+        # Stages are checked in order; an item handed to the next stage is
+        # counted there before the previous stage marks it done.
+        return all(stage.queue.unfinished_tasks == 0 for stage in self.order)
+
+    def stats(self) -> dict:
+        return {stage.name: stage.stats.snapshot(stage.queue.qsize()) for stage in self.order}
@@ -0,0 +1,161 @@
+import gc
+import os
+import threading
+import time
+
+from .config import Config
+
+
+def _process_rss_bytes() -> int | None:
+    """Resident set size of this process, or None where /proc is unavailable."""
+    try:
+        with open("/proc/self/statm", "r", encoding="ascii") as file:
+            resident_pages = int(file.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return resident_pages * os.sysconf("SC_PAGE_SIZE")
+
+
+class PoolEntry:
+    def __init__(self, name: str, factory, idle_timeout_sec: float | None = None, keep_warm: bool = False):
+        self.name = name
+        self.factory = factory
+        self.idle_timeout_sec = idle_timeout_sec
+        self.keep_warm = keep_warm
+        self.instance = None
+        self.pins = 0
+        self.last_used = 0.0
+        self.lock = threading.Lock()
+
+
+class ModelPool:
+    """Load STT/LLM/TTS resources once and keep them warm between conversations.
+
+    Entries are built on first use (or pre-warmed in the background) and
+    only released when they have been unpinned and idle for longer than
+    their timeout, or when the process exceeds the memory budget.
+    """
+
+    def __init__(self, config: Config):
+        self.config = config
+        self.entries = {}
+        self.running = True
+        self.reaper = None
+
+        from .transcriber import create_conversation_transcriber
+
+        # Without a standby model the conversation model also spots start commands, so it must stay loaded.
+        stt_keep_warm = config.stt_conversation_keep_warm or not config.stt_standby_model
+        stt_timeout = config.pool_idle_timeout_sec if config.pool_idle_timeout_sec is not None else 0.0
+        self.register("stt", lambda: create_conversation_transcriber(config), stt_timeout, keep_warm=stt_keep_warm)
+        self.register("llm", self._create_llm, config.pool_idle_timeout_sec)
+        self.register("tts", self._create_tts, config.pool_idle_timeout_sec)
+
+    def _create_llm(self):
+        from .llm import LLM
+
+        return LLM(self.config)
+
+    def _create_tts(self):
+        from .tts import TTS
+
+        return TTS(self.config)
+
+    def register(self, name: str, factory, idle_timeout_sec: float | None = None, keep_warm: bool = False) -> None:
+        self.entries[name] = PoolEntry(name, factory, idle_timeout_sec, keep_warm)
+
+    def get(self, name: str):
+        entry = self.entries[name]
+        with entry.lock:
+            if entry.instance is None:
+                started = time.monotonic()
+                entry.instance = entry.factory()
+                print(f"Loaded {name} in {time.monotonic() - started:.2f}s")
+            entry.last_used = time.monotonic()
+            return entry.instance
+
+    def is_loaded(self, name: str) -> bool:
+        return self.entries[name].instance is not None
+
+    def pin(self, name: str) -> None:
+        entry = self.entries[name]
+        with entry.lock:
+            entry.pins += 1
+            entry.last_used = time.monotonic()
+
+    def unpin(self, name: str) -> None:
+        entry = self.entries[name]
+        with entry.lock:
+            entry.pins = max(0, entry.pins - 1)
+            entry.last_used = time.monotonic()
+        self.evict_idle()
+
+    def prewarm(self, names: list[str]) -> threading.Thread:
+        def load():
+            for name in names:
+                try:
+                    self.get(name)
+                except Exception as exc:
+                    print(f"Prewarm of {name} failed: {exc}")
+
+        thread = threading.Thread(target=load, name="model-prewarm", daemon=True)
+        thread.start()
+        return thread
+
+    def _evictable(self, entry: PoolEntry) -> bool:
+        return entry.instance is not None and entry.pins == 0 and not entry.keep_warm
+
+    def evict(self, name: str) -> bool:
+        entry = self.entries[name]
+        with entry.lock:
+            if not self._evictable(entry):
+                return False
+            instance, entry.instance = entry.instance, None
+
+        close = getattr(instance, "close", None)
+        if callable(close):
+            close()
+        del instance
+        gc.collect()
+        print(f"Released {name}")
+        return True
+
+    def evict_idle(self) -> None:
+        now = time.monotonic()
+        for entry in list(self.entries.values()):
+            if entry.idle_timeout_sec is None or not self._evictable(entry):
+                continue
+            if now - entry.last_used >= entry.idle_timeout_sec:
+                self.evict(entry.name)
+
+        budget_mb = self.config.pool_memory_budget_mb
+        if budget_mb is None:
+            return
+
+        for entry in sorted(self.entries.values(), key=lambda item: item.last_used):
+            rss = _process_rss_bytes()
+            if rss is None or rss <= budget_mb * 1024 * 1024:
+                break
+            self.evict(entry.name)
+
+    def _reaper_loop(self) -> None:
+        while self.running:
+            time.sleep(1.0)
+            self.evict_idle()
+
+    def start(self) -> None:
+        if self.config.pool_prewarm:
+            names = ["stt"] if self.entries["stt"].keep_warm else []
+            names.append("llm")
+            if self.config.tts_enabled:
+                names.append("tts")
+            self.prewarm(names)
+
+        self.reaper = threading.Thread(target=self._reaper_loop, name="model-pool-reaper", daemon=True)
+        self.reaper.start()
+
+    def close(self) -> None:
+        self.running = False
+        if self.reaper is not None and self.reaper.is_alive():
+            self.reaper.join(timeout=2.0)
+            self.reaper = None
@@ -0,0 +1,303 @@
+import asyncio
+import json
+import math
+import threading
+import time
+
+from .config import Config
+
+
+class LatencyHistogram:
+    """Log-bucketed latency histogram (10 ms to ~2 min, 25% wide buckets).
+
+    Censored samples are requests that were cancelled or failed before
+    answering; their elapsed time is only a lower bound on the latency.
+    They are counted at that bound, so slow requests that lose a race still
+    pull the percentiles up instead of vanishing from the histogram.
+    """
+
+    def __init__(self, min_ms: float = 10.0, max_ms: float = 120000.0, growth: float = 1.25):
+        self.bounds = []
+        bound = min_ms
+        while bound < max_ms:
+            self.bounds.append(bound)
+            bound *= growth
+        self.bounds.append(math.inf)
+        self.counts = [0] * len(self.bounds)
+        self.count = 0
+        self.censored = 0
+        self.lock = threading.Lock()
+
+    def record(self, value_ms: float, censored: bool = False) -> None:
+        index = 0
+        while value_ms > self.bounds[index]:
+            index += 1
+        with self.lock:
+            self.counts[index] += 1
+            self.count += 1
+            if censored:
+                self.censored += 1
+
+    def percentile(self, fraction: float) -> float | None:
+        """Upper bound of the bucket holding the nearest-rank percentile."""
+        with self.lock:
+            if self.count == 0:
+                return None
+            rank = max(1, math.ceil(fraction * self.count))
+            seen = 0
+            for bound, count in zip(self.bounds, self.counts):
+                seen += count
+                if seen >= rank:
+                    return bound if bound != math.inf else self.bounds[-2]
+        return None
+
+
+class Backend:
+    def __init__(self, name: str, client, model: str, options: dict | None = None):
+        self.name = name
+        self.client = client
+        self.model = model
+        self.options = options
+        # Whole-response latency for plain requests, time to the first event for streams.
+        self.histograms = {"complete": LatencyHistogram(), "first_event": LatencyHistogram()}
+        self.requests = 0
+        self.wins = 0
+        self.hedges = 0
+        self.failures = 0
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "wins": self.wins,
+            "hedges": self.hedges,
+            "failures": self.failures,
+            **{f"{kind}_censored": histogram.censored for kind, histogram in self.histograms.items()},
+            **{
+                f"{kind}_p{int(fraction * 100)}_ms": histogram.percentile(fraction)
+                for kind, histogram in self.histograms.items()
+                for fraction in (0.5, 0.95)
+            },
+        }
+
+
+def _call_id(message_index: int, call_index: int) -> str:
+    return f"call_{message_index}_{call_index}"
+
+
+def to_provider_messages(messages: list[dict], provider: str) -> list[dict]:
+    """Rewrite a history so it is valid for `provider`, whichever backend produced it.
+
+    OpenAI needs tool call ids, JSON-string arguments and `tool_call_id` on
+    tool results; ollama wants dict arguments and the tool `name`.
+    """
+    converted = []
+    pending_calls = []
+
+    def match_call(message: dict) -> tuple[str | None, str | None]:
+        # Results are matched by id, then by name, then in order, so a call
+        # without a result cannot shift the ids of the results after it.
+        for key, position in (("tool_call_id", 0), ("name", 1)):
+            if message.get(key):
+                for index, call in enumerate(pending_calls):
+                    if call[position] == message[key]:
+                        return pending_calls.pop(index)
+        return pending_calls.pop(0) if pending_calls else (None, None)
+
+    for message_index, message in enumerate(messages):
+        message = dict(message)
+        if message.get("tool_calls"):
+            calls = []
+            for call_index, call in enumerate(message["tool_calls"]):
+                function = dict(call["function"])
+                arguments = function.get("arguments") or {}
+                if provider == "openai":
+                    if not isinstance(arguments, str):
+                        function["arguments"] = json.dumps(arguments)
+                    calls.append({
+                        "id": call.get("id") or _call_id(message_index, call_index),
+                        "type": "function",
+                        "function": function,
+                    })
+                else:
+                    if isinstance(arguments, str):
+                        try:
+                            function["arguments"] = json.loads(arguments or "{}")
+                        except json.JSONDecodeError:
+                            function["arguments"] = {}
+                    calls.append({"function": function})
+            message["tool_calls"] = calls
+            pending_calls = [
+                (call.get("id") or _call_id(message_index, call_index), call["function"]["name"])
+                for call_index, call in enumerate(calls)
+            ]
+        elif message.get("role") == "tool":
+            call_id, name = match_call(message)
+            if provider == "openai":
+                message["tool_call_id"] = message.get("tool_call_id") or call_id
+                message.pop("name", None)
+            else:
+                message["name"] = message.get("name") or name
+                message.pop("tool_call_id", None)
+        converted.append(message)
+    return converted
+
+
+class ProviderRouter:
+    """Send each LLM request to an ordered list of backends with hedging and failover.
+
+    The first backend gets the request. If it has not answered after the
+    hedge delay, the next backend gets a duplicate. The first answer wins
+    and the slower request is cancelled. An error fails over to the next
+    backend immediately. Unless `hedge_delay_ms` is fixed, the delay is the
+    `hedge_percentile` latency of the running backend, once it has
+    `min_samples` samples; before that `default_hedge_delay_ms` is used.
+    """
+
+    def __init__(self, backends: list[Backend], hedge: bool = True, hedge_delay_ms: float | None = None,
+            hedge_percentile: float = 0.95, min_samples: int = 20, default_hedge_delay_ms: float = 1500.0):
+        if not backends:
+            raise ValueError("ProviderRouter needs at least one backend.")
+        # Names key the stats, so duplicates (e.g. two unnamed backends on one host) get their position appended.
+        seen = set()
+        for index, backend in enumerate(backends):
+            if backend.name in seen:
+                backend.name = f"{backend.name}#{index}"
+            seen.add(backend.name)
+        self.backends = backends
+        self.hedge = hedge
+        self.hedge_delay_ms = hedge_delay_ms
+        self.hedge_percentile = hedge_percentile
+        self.min_samples = min_samples
+        self.default_hedge_delay_ms = default_hedge_delay_ms
+
+    @classmethod
+    def from_config(cls, config: Config) -> "ProviderRouter":
+        """Build backends from `config.llm_backends`, a list of dicts such as
+        {"provider": "ollama", "model": "qwen2.5:7b", "host": "localhost:11434"} or
+        {"provider": "openai", "model": "gpt-4o-mini", "base_url": "...", "api_key": "..."}.
+        """
+        import os
+
+        from .llm_client import get_shared_client
+
+        backends = []
+        for index, spec in enumerate(config.llm_backends):
+            provider = (spec.get("provider") or "ollama").lower()
+            api_key = None
+            if provider == "openai":
+                api_key = spec.get("api_key") or config.llm_api_key or os.getenv("OPENAI_API_KEY")
+                if not api_key:
+                    raise ValueError(f"OpenAI backend {index} requires an API key.")
+            base_url = spec.get("base_url") if provider == "openai" else spec.get("host")
+            client = get_shared_client(config, provider, base_url=base_url, api_key=api_key)
+            model = spec.get("model") or config.llm_model
+            backends.append(Backend(
+                spec.get("name") or f"{provider}:{model}@{base_url or 'default'}",
+                client,
+                model,
+                spec.get("options"),
+            ))
+        return cls(
+            backends,
+            hedge=config.llm_hedge_enabled,
+            hedge_delay_ms=config.llm_hedge_delay_ms,
+            hedge_percentile=config.llm_hedge_percentile,
+            min_samples=config.llm_hedge_min_samples,
+            default_hedge_delay_ms=config.llm_hedge_default_delay_ms,
+        )
+
+    def hedge_delay(self, backend: Backend, kind: str) -> float | None:
+        """Seconds to wait on `backend` before sending a duplicate, or None to never hedge."""
+        if not self.hedge:
+            return None
+        if self.hedge_delay_ms is not None:
+            return self.hedge_delay_ms / 1000.0
+        histogram = backend.histograms[kind]
+        if histogram.count < self.min_samples:
+            return self.default_hedge_delay_ms / 1000.0
+        return histogram.percentile(self.hedge_percentile) / 1000.0
+
+    async def _race(self, start, kind: str):
+        """Run `start(backend)` coroutines with hedging; return (backend, result) of the first success.
+
+        Losing tasks are cancelled before returning. If every backend fails,
+        the last error is raised.
+        """
+        queue = list(self.backends)
+        running = {}
+        last_error = None
+
+        def launch(hedged: bool) -> None:
+            backend = queue.pop(0)
+            backend.requests += 1
+            if hedged:
+                backend.hedges += 1
+            task = asyncio.ensure_future(start(backend))
+            running[task] = (backend, time.monotonic())
+
+        launch(False)
+        try:
+            while running:
+                newest_backend = list(running.values())[-1][0]
+                delay = self.hedge_delay(newest_backend, kind) if queue else None
+                done, _ = await asyncio.wait(running, timeout=delay, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    launch(True)
+                    continue
+                for task in done:
+                    backend, started = running.pop(task)
+                    error = task.exception()
+                    elapsed_ms = (time.monotonic() - started) * 1000.0
+                    if error is None:
+                        backend.wins += 1
+                        backend.histograms[kind].record(elapsed_ms)
+                        return backend, task.result()
+                    backend.histograms[kind].record(elapsed_ms, censored=True)
+                    backend.failures += 1
+                    last_error = error
+                    print(f"LLM backend {backend.name} failed: {error}")
+                    if queue:
+                        launch(False)
+            raise last_error or RuntimeError("No LLM backend answered.")
+        finally:
+            now = time.monotonic()
+            for task, (backend, started) in running.items():
+                # A hedged-away or cancelled request took at least this long.
+                backend.histograms[kind].record((now - started) * 1000.0, censored=True)
+                task.cancel()
+            # Let the losers unwind before their streams are closed.
+            await asyncio.gather(*running, return_exceptions=True)
+
+    async def chat(self, messages: list, tools: list | None = None) -> tuple[dict, list, dict]:
+        async def start(backend: Backend):
+            return await backend.client.chat(
+                backend.model, to_provider_messages(messages, backend.client.provider), tools, backend.options,
+            )
+
+        _, result = await self._race(start, "complete")
+        return result
+
+    async def chat_stream(self, messages: list, tools: list | None = None):
+        """Stream from whichever backend produces its first event first."""
+        streams = {}
+
+        async def start(backend: Backend):
+            stream = backend.client.chat_stream(
+                backend.model, to_provider_messages(messages, backend.client.provider), tools, backend.options,
+            )
+            # Keyed by the backend itself; names are only labels.
+            streams[backend] = stream
+            return await stream.__anext__()
+
+        try:
+            winner, first = await self._race(start, "first_event")
+            stream = streams.pop(winner)
+            yield first
+            async for event in stream:
+                yield event
+        finally:
+            for stream in streams.values():
+                await stream.aclose()
+
+    def stats(self) -> dict:
+        return {backend.name: backend.stats() for backend in self.backends}
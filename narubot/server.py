@@ -0,0 +1,409 @@
+import itertools
+import json
+import queue
+import socket
+import threading
+import time
+from collections import deque
+
+from .audio import AudioRingBuffer
+from .commands import is_end_of_speech
+from .commands import is_start_of_speech
+from .config import Config
+from .tracing import percentile
+from .transcriber import create_conversation_transcriber
+from .vad import create_vad
+
+
+class SessionStats:
+    def __init__(self):
+        self.submitted = 0
+        self.completed = 0
+        self.rejected = 0
+        self.failed = 0
+        self.latencies_ms = deque(maxlen=1000)
+
+    def snapshot(self) -> dict:
+        latencies = list(self.latencies_ms)
+        return {
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "failed": self.failed,
+            "latency_p50_ms": percentile(latencies, 0.5),
+            "latency_p95_ms": percentile(latencies, 0.95),
+        }
+
+
+class TranscriptionRequest:
+    __slots__ = ("session_id", "audio", "callback", "submitted_at")
+
+    def __init__(self, session_id: int, audio, callback):
+        self.session_id = session_id
+        self.audio = audio
+        self.callback = callback  # (text, latency_ms, error) -> None; error is None on success
+        self.submitted_at = time.monotonic()
+
+
+class TranscriptionScheduler:
+    """Share one Whisper model across sessions and batch their requests.
+
+    Every session has its own bounded queue. Workers build each batch round
+    robin, taking at most one request per session per pass, so a chatty
+    session cannot starve the others.
+    """
+
+    def __init__(self, transcriber, workers: int = 2, max_batch: int = 8, session_queue_limit: int = 4):
+        self.transcriber = transcriber
+        self.workers = max(1, int(workers))
+        self.max_batch = max(1, int(max_batch))
+        self.session_queue_limit = max(1, int(session_queue_limit))
+        self.queues = {}
+        self.stats = {}
+        self.order = deque()
+        self.condition = threading.Condition()
+        self.running = False
+        self.threads = []
+
+    def add_session(self, session_id: int) -> None:
+        with self.condition:
+            self.queues[session_id] = deque()
+            self.stats[session_id] = SessionStats()
+            self.order.append(session_id)
+
+    def remove_session(self, session_id: int) -> dict | None:
+        with self.condition:
+            self.queues.pop(session_id, None)
+            if session_id in self.order:
+                self.order.remove(session_id)
+            stats = self.stats.pop(session_id, None)
+            return stats.snapshot() if stats is not None else None
+
+    def submit(self, session_id: int, audio, callback) -> bool:
+        with self.condition:
+            pending = self.queues.get(session_id)
+            if pending is None:
+                return False
+            stats = self.stats[session_id]
+            if len(pending) >= self.session_queue_limit:
+                stats.rejected += 1
+                return False
+            pending.append(TranscriptionRequest(session_id, audio, callback))
+            stats.submitted += 1
+            self.condition.notify()
+            return True
+
+    def _next_batch(self) -> list[TranscriptionRequest]:
+        batch = []
+        while len(batch) < self.max_batch:
+            taken = False
+            for _ in range(len(self.order)):
+                session_id = self.order[0]
+                self.order.rotate(-1)
+                pending = self.queues[session_id]
+                if pending:
+                    batch.append(pending.popleft())
+                    taken = True
+                    if len(batch) >= self.max_batch:
+                        break
+            if not taken:
+                break
+        return batch
+
+    def _worker_loop(self) -> None:
+        while self.running:
+            with self.condition:
+                batch = self._next_batch()
+                if not batch:
+                    self.condition.wait(timeout=0.1)
+                    continue
+
+            results = self._transcribe(batch)
+            finished = time.monotonic()
+            for request, (text, error) in zip(batch, results):
+                latency_ms = (finished - request.submitted_at) * 1000.0
+                stats = self.stats.get(request.session_id)
+                if stats is not None:
+                    stats.completed += 1
+                    if error is None:
+                        stats.latencies_ms.append(latency_ms)
+                    else:
+                        stats.failed += 1
+                request.callback(text, latency_ms, error)
+
+    def _transcribe(self, batch: list[TranscriptionRequest]) -> list[tuple[str, str | None]]:
+        """Return (text, error) per request; a failed batch is retried one request at a time."""
+        try:
+            texts = self.transcriber.transcribe_batch([request.audio for request in batch])
+            return [(text, None) for text in texts]
+        except Exception as exc:
+            if len(batch) == 1:
+                print(f"Transcription error: {exc}")
+                return [("", str(exc))]
+            print(f"Batched transcription failed, retrying one by one: {exc}")
+
+        results = []
+        for request in batch:
+            try:
+                results.append((self.transcriber.transcribe(request.audio), None))
+            except Exception as exc:
+                print(f"Transcription error: {exc}")
+                results.append(("", str(exc)))
+        return results
+
+    def start(self) -> None:
+        self.running = True
+        self.threads = [
+            threading.Thread(target=self._worker_loop, name=f"whisper-worker-{index}", daemon=True)
+            for index in range(self.workers)
+        ]
+        for thread in self.threads:
+            thread.start()
+
+    def stop(self) -> None:
+        self.running = False
+        with self.condition:
+            self.condition.notify_all()
+        for thread in self.threads:
+            thread.join(timeout=1.0)
+        self.threads = []
+
+    def pending(self, session_id: int) -> int:
+        """Requests of a session that are queued or being decoded."""
+        with self.condition:
+            stats = self.stats.get(session_id)
+            return stats.submitted - stats.completed if stats is not None else 0
+
+    def session_stats(self) -> dict:
+        with self.condition:
+            return {session_id: stats.snapshot() for session_id, stats in self.stats.items()}
+
+
+class Session:
+    """One client connection: raw int16 PCM in, JSON lines out.
+
+    Capture state (buffer, VAD, speaking) and activation state are kept per
+    session. Replies are produced on the session's own thread so a slow LLM
+    turn never blocks the shared Whisper workers.
+    """
+
+    def __init__(self, session_id: int, connection: socket.socket, server: "STTServer"):
+        self.session_id = session_id
+        self.connection = connection
+        self.server = server
+        self.config = server.config
+        self.capture_buffer = AudioRingBuffer(
+            int(max(1.0, float(self.config.stt_max_utterance_sec)) * self.config.audio_sample_rate * self.config.audio_channels)
+        )
+        self.vad = create_vad(self.config)
+        self.speaking = False
+        self.silent_chunks = 0
+        self.activated = False
+        self.llm = None
+        self.transcripts = queue.Queue()
+        self.send_lock = threading.Lock()
+        self.running = True
+
+    def send(self, message: dict) -> None:
+        data = (json.dumps(message, ensure_ascii=False) + "\n").encode("utf-8")
+        with self.send_lock:
+            try:
+                self.connection.sendall(data)
+            except OSError:
+                self.running = False
+
+    def _end_utterance(self) -> None:
+        self.speaking = False
+        self.silent_chunks = 0
+        min_speech_samples = self.config.stt_vad_min_speech_ms * self.config.audio_sample_rate * self.config.audio_channels / 1000
+        if len(self.capture_buffer) >= min_speech_samples:
+            audio = self.capture_buffer.to_float32()
+            if not self.server.scheduler.submit(self.session_id, audio, self._on_transcript):
+                self.send({"type": "rejected", "reason": "queue_full"})
+        self.capture_buffer.clear()
+
+    def _on_transcript(self, text: str, latency_ms: float, error: str | None = None) -> None:
+        self.transcripts.put((text, latency_ms, error))
+
+    def _handle_transcript(self, text: str, latency_ms: float) -> None:
+        if not text:
+            return
+
+        self.send({"type": "transcript", "text": text, "latency_ms": latency_ms, "activated": self.activated})
+        if not self.activated:
+            is_start, start_text = is_start_of_speech(self.config, text)
+            if not is_start:
+                return
+            self.activated = True
+            self.send({"type": "activated"})
+            text = start_text
+
+        if text and is_end_of_speech(self.config, text):
+            self.activated = False
+            self.llm = None
+            self.send({"type": "deactivated"})
+            return
+
+        if not text or not self.config.server_llm_enabled:
+            return
+
+        if self.llm is None:
+            from .llm import LLM
+
+            self.llm = LLM(self.config)
+        self.send({"type": "response", "text": self.llm.chat(text).strip()})
+
+    def _respond_loop(self) -> None:
+        while self.running or not self.transcripts.empty() or self.server.scheduler.pending(self.session_id):
+            try:
+                text, latency_ms, error = self.transcripts.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if error is not None:
+                self.send({"type": "error", "stage": "transcribe", "message": error, "latency_ms": latency_ms})
+                continue
+            try:
+                self._handle_transcript(text, latency_ms)
+            except Exception as exc:
+                self.send({"type": "error", "message": str(exc)})
+
+    def _read(self, size: int) -> bytes:
+        chunks = []
+        remaining = size
+        while remaining > 0:
+            data = self.connection.recv(remaining)
+            if not data:
+                break
+            chunks.append(data)
+            remaining -= len(data)
+        data = b"".join(chunks)
+        return data[:len(data) - len(data) % 2]
+
+    def run(self) -> None:
+        responder = threading.Thread(target=self._respond_loop, name=f"session-{self.session_id}-respond", daemon=True)
+        responder.start()
+        silence_frames = self.config.silence_limit * self.config.audio_sample_rate / self.config.audio_chunk
+        chunk_bytes = self.config.audio_chunk * self.config.audio_channels * 2
+        try:
+            while self.running and self.server.running:
+                data = self._read(chunk_bytes)
+                if not data:
+                    break
+
+                if not self.vad.is_speech(data):
+                    self.silent_chunks += 1
+                    if self.speaking and self.silent_chunks > silence_frames:
+                        self._end_utterance()
+                    continue
+
+                self.silent_chunks = 0
+                self.speaking = True
+                self.capture_buffer.write(data)
+                if self.capture_buffer.full:
+                    self._end_utterance()
+        except OSError:
+            pass
+        finally:
+            if self.speaking:
+                self._end_utterance()
+            self.running = False
+            # Let already submitted utterances finish before the session is torn down.
+            responder.join(timeout=30.0)
+            self.connection.close()
+
+
+class STTServer:
+    """Serve many concurrent voice sessions over TCP from one shared Whisper model."""
+
+    def __init__(self, config: Config):
+        self.config = config
+        workers = max(1, int(config.server_workers))
+        self.transcriber = create_conversation_transcriber(config, num_workers=workers)
+        self.scheduler = TranscriptionScheduler(
+            self.transcriber,
+            workers=workers,
+            max_batch=config.server_max_batch,
+            session_queue_limit=config.server_session_queue_limit,
+        )
+        self.session_ids = itertools.count(1)
+        self.sessions = {}
+        self.lock = threading.Lock()
+        self.listener = None
+        self.running = False
+
+    def _run_session(self, session: Session) -> None:
+        try:
+            session.run()
+        finally:
+            stats = self.scheduler.remove_session(session.session_id)
+            with self.lock:
+                self.sessions.pop(session.session_id, None)
+            print(f"Session {session.session_id} closed: {stats}")
+
+    def serve_forever(self) -> None:
+        self.listener = socket.create_server((self.config.server_host, self.config.server_port))
+        self.listener.settimeout(0.5)
+        self.running = True
+        self.scheduler.start()
+        print(f"STT server listening on {self.config.server_host}:{self.config.server_port}")
+
+        while self.running:
+            try:
+                connection, address = self.listener.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+
+            with self.lock:
+                if len(self.sessions) >= self.config.server_max_sessions:
+                    connection.sendall(b'{"type": "rejected", "reason": "too_many_sessions"}\n')
+                    connection.close()
+                    continue
+                session = Session(next(self.session_ids), connection, self)
+                self.sessions[session.session_id] = session
+
+            self.scheduler.add_session(session.session_id)
+            print(f"Session {session.session_id} connected from {address[0]}:{address[1]}")
+            threading.Thread(target=self._run_session, args=(session,), name=f"session-{session.session_id}", daemon=True).start()
+
+    def stats(self) -> dict:
+        return self.scheduler.session_stats()
+
+    def close(self) -> None:
+        self.running = False
+        if self.listener is not None:
+            self.listener.close()
+            self.listener = None
+        self.scheduler.stop()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve concurrent STT sessions over TCP (raw int16 PCM in, JSON lines out).")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--model", default="large-v3")
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--llm", action="store_true", help="Answer activated sessions with the configured LLM.")
+    args = parser.parse_args()
+
+    server = STTServer(Config(
+        device=args.device,
+        stt_model=args.model,
+        stt_compute_type="int8" if args.device == "cpu" else "int8_float16",
+        server_host=args.host,
+        server_port=args.port,
+        server_workers=args.workers,
+        server_llm_enabled=args.llm,
+    ))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for session_id, stats in server.stats().items():
+            print(f"Session {session_id}: {stats}")
+        server.close()
@@ -0,0 +1,82 @@
+import threading
+
+
+class StreamingTranscriber:
+    """Incrementally transcribe one utterance while it is still being spoken.
+
+    Each update re-decodes the uncommitted tail of the growing audio and
+    commits the longest word prefix on which two consecutive hypotheses agree
+    (local agreement). Committed audio is dropped from later windows, so the
+    final decode only has to cover the last few hundred milliseconds.
+    """
+
+    def __init__(self, transcribe_words, transcribe_text, sample_rate: int, min_window_sec: float = 1.0, on_partial=None):
+        self.transcribe_words = transcribe_words  # (audio, prompt) -> [(word, start_sec, end_sec), ...]
+        self.transcribe_text = transcribe_text  # (audio, prompt) -> str
+        self.sample_rate = sample_rate
+        self.min_window_samples = int(max(0.0, float(min_window_sec)) * sample_rate)
+        self.on_partial = on_partial
+
+        self.lock = threading.Lock()
+        self.committed_words = []
+        self.previous_words = []
+        self.offset = 0  # Samples already covered by committed words.
+        self.closed = False
+        self.updates = 0
+
+    @property
+    def committed_text(self) -> str:
+        return "".join(self.committed_words).strip()
+
+    @staticmethod
+    def _normalize_word(word: str) -> str:
+        return "".join(ch for ch in word.casefold() if ch.isalnum())
+
+    def _agreed_prefix_length(self, words: list) -> int:
+        count = 0
+        for previous, current in zip(self.previous_words, words):
+            if self._normalize_word(previous[0]) != self._normalize_word(current[0]):
+                break
+            count += 1
+        return count
+
+    def update(self, audio) -> tuple[str, str] | None:
+        """Decode the uncommitted window of `audio` and return (committed, partial)."""
+        with self.lock:
+            if self.closed or audio is None:
+                return None
+
+            window = audio[self.offset:]
+            if len(window) < self.min_window_samples:
+                return None
+
+            words = self.transcribe_words(window, self.committed_text)
+            self.updates += 1
+
+            agreed = self._agreed_prefix_length(words)
+            if agreed > 0:
+                self.committed_words.extend(word for word, _, _ in words[:agreed])
+                self.offset += int(words[agreed - 1][2] * self.sample_rate)
+                # Keep remaining words relative to the new window start.
+                shift = words[agreed - 1][2]
+                words = [(word, start - shift, end - shift) for word, start, end in words[agreed:]]
+
+            self.previous_words = words
+            partial = "".join(word for word, _, _ in words).strip()
+            committed = self.committed_text
+
+        if self.on_partial is not None:
+            self.on_partial(committed, partial)
+        return committed, partial
+
+    def finalize(self, audio) -> str:
+        """Decode only the remaining tail and return the full utterance text."""
+        with self.lock:
+            self.closed = True
+            prefix = self.committed_text
+            window = audio[self.offset:] if audio is not None else None
+            tail = ""
+            if window is not None and len(window) > 0:
+                tail = self.transcribe_text(window, prefix)
+
+        return " ".join(part for part in (prefix, tail.strip()) if part).strip()
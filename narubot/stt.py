@@ -1,42 +1,75 @@
-import gc
 import importlib.util
 import queue
 import threading
 import time
 import wave
+from .audio import AudioRingBuffer
+from .audio import create_audio_source
+from .commands import is_end_of_speech
+from .commands import is_start_of_speech
 from .config import Config
+from .pipeline import Pipeline
+from .pipeline import Stage
+from .pool import ModelPool
+from .streaming import StreamingTranscriber
+from .tracing import Tracer
+from .tracing import TurnTrace
+from .transcriber import create_standby_transcriber
+from .vad import VADStats
+from .vad import create_vad
+
+
+class Utterance:
+    """Captured speech handed from the capture loop to the worker."""
+
+    __slots__ = ("audio", "streamer", "trace")
+
+    def __init__(self, audio, streamer: StreamingTranscriber | None = None, trace: TurnTrace | None = None):
+        self.audio = audio  # Normalized float32 samples.
+        self.streamer = streamer
+        self.trace = trace
 
 
 class STT:
     def __init__(self, config: Config):
-        if importlib.util.find_spec("pyaudio") is None:
+        needs_pyaudio = (config.audio_source or "microphone").lower() == "microphone" or config.tts_enabled
+        if needs_pyaudio and importlib.util.find_spec("pyaudio") is None:
             raise ModuleNotFoundError(
-                "PyAudio is required for STT microphone input. "
-                "Install OS audio libs then `pip install pyaudio` and retry."
+                "PyAudio is required for STT microphone input and effect playback. "
+                "Install OS audio libs then `pip install pyaudio` and retry, "
+                "or use a file/stream audio_source with tts_enabled=False."
             )
 
-        import pyaudio
         import numpy as np
-        from faster_whisper import WhisperModel
 
-        if self._needs_audio_format(config):
-            config.audio_format = pyaudio.paInt16
+        pyaudio = None
+        if needs_pyaudio:
+            import pyaudio
+
+            if self._needs_audio_format(config):
+                config.audio_format = pyaudio.paInt16
 
         self.config = config
         self.np = np
-        self.whisper = self._create_whisper_model(WhisperModel)
-        self.pyaudio = pyaudio.PyAudio()
-        self.microphone = self.pyaudio.open(
-            format=self.config.audio_format,
-            channels=self.config.audio_channels,
-            rate=self.config.audio_sample_rate,
-            input=True,
-            frames_per_buffer=self.config.audio_chunk,
+        self.standby_whisper = create_standby_transcriber(self.config)
+        self.pool = ModelPool(self.config)
+        if self.standby_whisper is None:
+            # Standby transcription needs the conversation model right away.
+            self.pool.get("stt")
+        self.pool.start()
+        self.pyaudio = pyaudio.PyAudio() if pyaudio is not None else None
+        self.audio_source = create_audio_source(self.config, self.pyaudio)
+
+        self.capture_buffer = AudioRingBuffer(
+            int(max(1.0, float(self.config.stt_max_utterance_sec)) * self.config.audio_sample_rate * self.config.audio_channels)
         )
-
-        self.audio_frames = []
         self.silent_chunks = 0
         self.speaking = False
+        self.vad = create_vad(self.config)
+        self.barge_in_vad = create_vad(self.config, threshold_scale=self.config.stt_barge_in_threshold_ratio) if self.config.stt_barge_in else None
+        self.barge_in_samples = 0
+        self.barge_in_active = False
+        self.vad_stats = VADStats()
         self.activated = False
         self.llm = None
         self.tts = None
@@ -44,50 +77,17 @@ class STT:
         self.running = False
         self.utterance_queue = queue.Queue(maxsize=self.config.stt_queue_max_size)
         self.worker_thread = None
+        self.pipeline = None
         self.tts_playing = threading.Event()
+        self.effect_stop = threading.Event()
         self.capture_paused_for_tts = False
 
-    def _create_whisper_model(self, whisper_model_cls):
-        try:
-            return whisper_model_cls(
-                self.config.stt_model,
-                device=self.config.device,
-                compute_type=self.config.stt_compute_type,
-                cpu_threads=8,
-                num_workers=1,
-            )
-        except (RuntimeError, OSError, ValueError) as exc:
-            if not str(self.config.device).startswith("cuda") or not self._is_cuda_runtime_error(exc):
-                raise
-
-            print(
-                "STT CUDA initialization failed. Falling back to CPU. "
-                f"Reason: {exc}"
-            )
-            self.config.device = "cpu"
-            if self.config.stt_compute_type in {"float16", "int8_float16"}:
-                self.config.stt_compute_type = "int8"
-            return whisper_model_cls(
-                self.config.stt_model,
-                device=self.config.device,
-                compute_type=self.config.stt_compute_type,
-                cpu_threads=8,
-                num_workers=1,
-            )
+        self.tracer = Tracer(self.config.trace_file, self.config.trace_callback) if self.config.trace_enabled else None
 
-    @staticmethod
-    def _is_cuda_runtime_error(exc: Exception) -> bool:
-        message = str(exc).lower()
-        cuda_error_markers = (
-            "cublas",
-            "cuda",
-            "cudnn",
-            ".dll",
-            "cannot be loaded",
-            "failed to load",
-            "runtimeerror: library",
-        )
-        return any(marker in message for marker in cuda_error_markers)
+        self.streamer = None
+        self.streaming_requests = queue.Queue(maxsize=1)
+        self.streaming_thread = None
+        self.last_partial_request = 0.0
 
     @staticmethod
     def _needs_audio_format(config: Config) -> bool:
@@ -100,46 +100,27 @@ class STT:
         self.close()
 
     def _is_silent(self, data: bytes) -> bool:
-        return self.np.abs(self.np.frombuffer(data, dtype=self.np.int16)).mean() < self.config.silence_threshold
-
-    @staticmethod
-    def _normalize_command_text(text: str) -> str:
-        return "".join(ch for ch in text.casefold() if ch.isalnum())
+        speech = self.vad.is_speech(data)
+        self.vad_stats.chunks += 1
+        if speech:
+            self.vad_stats.speech_chunks += 1
+        return not speech
 
     def _is_start_of_speech(self, text: str) -> tuple[bool, str]:
-        normalized_text = self._normalize_command_text(text)
-        for command in self.config.stt_start_commands:
-            if text.startswith(command):
-                return True, text.removeprefix(command).strip()
-            normalized_command = self._normalize_command_text(command)
-            if normalized_command and normalized_text.startswith(normalized_command):
-                return True, text
-
-        for command in self.config.stt_magic_commands:
-            if text.find(command) != -1:
-                return True, text
-            normalized_command = self._normalize_command_text(command)
-            if normalized_command and normalized_command in normalized_text:
-                return True, text
-        return False, ""
+        return is_start_of_speech(self.config, text)
 
     def _is_end_of_speech(self, text: str) -> bool:
-        normalized_text = self._normalize_command_text(text)
-        for command in self.config.stt_stop_commands:
-            if text.startswith(command):
-                return True
-            normalized_command = self._normalize_command_text(command)
-            if normalized_command and normalized_text.startswith(normalized_command):
-                return True
-        return False
+        return is_end_of_speech(self.config, text)
 
     def _play_effect(self, effect_path: str):
         if not self.config.tts_enabled:
             return
 
-        should_pause_stt = self.config.stt_pause_during_tts
+        # Barge-in also needs the flag: it treats playback as echo and can stop it.
+        should_pause_stt = self.config.stt_pause_during_tts or self.config.stt_barge_in
         if should_pause_stt:
             self.tts_playing.set()
+        self.effect_stop.clear()
 
         try:
             with wave.open(effect_path, "rb") as wav:
@@ -150,7 +131,7 @@ class STT:
                     output=True,
                 )
                 data = wav.readframes(self.config.audio_chunk)
-                while data:
+                while data and not self.effect_stop.is_set():
                     stream.write(data)
                     data = wav.readframes(self.config.audio_chunk)
                 stream.stop_stream()
@@ -160,58 +141,104 @@ class STT:
                 self.tts_playing.clear()
 
     def _activate(self):
-        from .llm import LLM
-        from .tts import TTS
-
         self.activated = True
         self._print_listening_status()
-        self.llm = LLM(self.config)
-        self.tts = TTS(self.config) if self.config.tts_enabled else None
+        for name in self._conversation_resources():
+            self.pool.pin(name)
+        if not self.pool.is_loaded("stt"):
+            self.pool.prewarm(["stt"])
+        self.llm = self.pool.get("llm")
+        self.llm.reset()
+        self.tts = self.pool.get("tts") if self.config.tts_enabled else None
         self._play_effect(r"asset/start.wav")
 
     def _deactivate(self):
         self._play_effect(r"asset/end.wav")
         self.activated = False
         self._print_listening_status()
-        del self.llm
-        if self.tts is not None:
-            del self.tts
         self.llm = None
         self.tts = None
-        gc.collect()
+        for name in self._conversation_resources():
+            self.pool.unpin(name)
 
-    def _frames_to_audio_array(self, frames: list[bytes]):
-        if not frames:
-            return None
+    def _conversation_resources(self) -> list[str]:
+        names = ["stt", "llm"]
+        if self.config.tts_enabled:
+            names.append("tts")
+        return names
 
-        pcm = self.np.frombuffer(b"".join(frames), dtype=self.np.int16)
-        if pcm.size == 0:
-            return None
+    def _conversation_model(self):
+        return self.pool.get("stt")
+
+    def _transcribe_text(self, audio, initial_prompt: str | None = None) -> str:
+        return self._conversation_model().transcribe(audio, initial_prompt)
 
-        return pcm.astype(self.np.float32) / 32768.0
+    def _transcribe_words(self, audio, initial_prompt: str | None = None) -> list[tuple[str, float, float]]:
+        return self._conversation_model().transcribe_words(audio, initial_prompt, beam_size=self.config.stt_streaming_beam_size)
 
-    def _speech_to_text_from_frames(self, frames: list[bytes]) -> str:
-        audio = self._frames_to_audio_array(frames)
-        if audio is None:
+    def _speech_to_text(self, audio) -> str:
+        if audio is None or len(audio) == 0:
             return ""
 
-        transcribe_kwargs = {
-            "language": self.config.stt_language,
-            "beam_size": self.config.stt_beam_size,
-            "vad_filter": self.config.stt_vad_filter,
-        }
-        if self.config.stt_vad_filter:
-            transcribe_kwargs["vad_parameters"] = {
-                "min_silence_duration_ms": self.config.stt_vad_min_silence_ms,
-            }
+        return self._transcribe_text(audio)
+
+    def _transcribe_utterance(self, utterance: Utterance, standby: bool = False) -> str:
+        if standby and self.standby_whisper is not None:
+            return self.standby_whisper.transcribe(utterance.audio)
+
+        if utterance.streamer is None:
+            return self._speech_to_text(utterance.audio)
+
+        return utterance.streamer.finalize(utterance.audio)
+
+    def _create_streaming_transcriber(self) -> StreamingTranscriber:
+        return StreamingTranscriber(
+            self._transcribe_words,
+            self._transcribe_text,
+            self.config.audio_sample_rate,
+            min_window_sec=self.config.stt_streaming_min_window_sec,
+            on_partial=self._print_partial,
+        )
+
+    @staticmethod
+    def _print_partial(committed: str, partial: str) -> None:
+        if committed or partial:
+            print(f"User (partial): {committed} [{partial}]")
+
+    def _request_partial(self) -> None:
+        now = time.monotonic()
+        if now - self.last_partial_request < max(0.0, float(self.config.stt_streaming_interval_sec)):
+            return
 
-        segments, _ = self.whisper.transcribe(audio, **transcribe_kwargs)
-        return " ".join(segment.text.strip() for segment in segments).strip()
+        self.last_partial_request = now
+        request = (self.streamer, self.capture_buffer.to_float32())
+        try:
+            self.streaming_requests.put_nowait(request)
+        except queue.Full:
+            # Only the newest window matters; replace the stale one.
+            try:
+                self.streaming_requests.get_nowait()
+            except queue.Empty:
+                pass
+            self.streaming_requests.put_nowait(request)
+
+    def _streaming_loop(self) -> None:
+        while self.running:
+            try:
+                streamer, audio = self.streaming_requests.get(timeout=0.1)
+            except queue.Empty:
+                continue
+
+            try:
+                streamer.update(audio)
+            except Exception as exc:
+                print(f"Streaming error: {exc}")
 
     def _clear_capture_buffers(self) -> None:
-        self.audio_frames = []
+        self.capture_buffer.clear()
         self.silent_chunks = 0
         self.speaking = False
+        self.streamer = None
 
     def _print_listening_status(self) -> None:
         if self.activated:
@@ -223,39 +250,76 @@ class STT:
         self._clear_capture_buffers()
         self._print_listening_status()
 
-    def _enqueue_utterance(self, frames: list[bytes]) -> None:
-        if not frames:
+    def _enqueue_utterance(self, utterance: Utterance) -> None:
+        if utterance.audio is None or len(utterance.audio) == 0:
             return
 
         try:
-            self.utterance_queue.put_nowait(frames)
+            self.utterance_queue.put_nowait(utterance)
         except queue.Full:
             print("STT queue is full. Dropping oldest utterance.")
             try:
                 self.utterance_queue.get_nowait()
+                self.utterance_queue.task_done()
             except queue.Empty:
                 pass
-            self.utterance_queue.put_nowait(frames)
+            self.utterance_queue.put_nowait(utterance)
+
+    def _transcribe_utterances(self, utterances: list[Utterance]) -> list[str]:
+        """Transcribe a backlog of utterances, batching the ones without streaming state."""
+        texts = [""] * len(utterances)
+        pending = []
+        for index, utterance in enumerate(utterances):
+            if utterance.streamer is not None:
+                texts[index] = self._transcribe_utterance(utterance)
+            else:
+                pending.append(index)
+
+        if len(pending) == 1:
+            texts[pending[0]] = self._transcribe_utterance(utterances[pending[0]])
+        elif pending:
+            batch_texts = self._conversation_model().transcribe_batch([utterances[index].audio for index in pending])
+            for index, text in zip(pending, batch_texts):
+                texts[index] = text
+        return texts
+
+    def _drain_utterance_backlog(self, max_items: int) -> list[Utterance]:
+        backlog = []
+        while len(backlog) < max_items:
+            try:
+                backlog.append(self.utterance_queue.get_nowait())
+            except queue.Empty:
+                break
+            # The caller is still handling its own utterance, so the queue cannot look idle yet.
+            self.utterance_queue.task_done()
+        return backlog
 
-    def _build_llm_batch_text(self, first_text: str) -> str:
+    def _build_llm_batch_text(self, first_text: str, queued_texts: list[str] | None = None) -> str:
         if not self.config.llm_batch_enabled:
             return first_text
 
         batch = [first_text]
+        for next_text in queued_texts or []:
+            if next_text:
+                print("User (queued):", next_text)
+                batch.append(next_text)
+
         deadline = time.monotonic() + max(0.0, float(self.config.llm_batch_window_sec))
         max_items = max(1, int(self.config.llm_batch_max_items))
+        utterances = []
 
-        while len(batch) < max_items and time.monotonic() < deadline:
+        while len(batch) + len(utterances) < max_items and time.monotonic() < deadline:
             timeout = max(0.0, deadline - time.monotonic())
             if timeout == 0.0:
                 break
 
             try:
-                frames = self.utterance_queue.get(timeout=timeout)
+                utterances.append(self.utterance_queue.get(timeout=timeout))
             except queue.Empty:
                 break
+            self.utterance_queue.task_done()
 
-            next_text = self._speech_to_text_from_frames(frames)
+        for next_text in self._transcribe_utterances(utterances):
             if next_text:
                 print("User (queued):", next_text)
                 batch.append(next_text)
@@ -273,108 +337,356 @@ class STT:
         while self.running and self.speaking and time.monotonic() < deadline:
             time.sleep(0.01)
 
-    def _speak_text(self, text: str) -> None:
-        if (not self.config.tts_enabled) or (not text):
+    def _speak_text(self, text: str, trace: TurnTrace | None = None) -> None:
+        tts = self.tts
+        if (not self.config.tts_enabled) or (not text) or tts is None:
             return
 
         self._wait_for_user_silence()
 
-        should_pause_stt = self.config.stt_pause_during_tts
+        should_pause_stt = self.config.stt_pause_during_tts or self.config.stt_barge_in
         if should_pause_stt:
             self.tts_playing.set()
 
         try:
-            self.tts.text_to_speech(text)
+            tts.text_to_speech(text, trace=trace)
         finally:
             if should_pause_stt:
                 self.tts_playing.clear()
 
-    def _process_utterance(self, frames: list[bytes]) -> None:
-        text = self._speech_to_text_from_frames(frames)
+    def _transcribe_turn(self, utterance: Utterance) -> tuple[str, TurnTrace | None] | None:
+        """Transcribe an utterance, apply start/stop commands and return the text for the LLM."""
+        if utterance.trace is not None:
+            utterance.trace.mark("dequeued")
+
+        queued_texts = []
+        if not self.activated:
+            text = self._transcribe_utterance(utterance, standby=True)
+        elif self.config.llm_batch_enabled:
+            # Utterances that piled up during the previous turn are decoded in one batch.
+            backlog = self._drain_utterance_backlog(max(1, int(self.config.llm_batch_max_items)) - 1)
+            texts = [text for text in self._transcribe_utterances([utterance] + backlog) if text]
+            if not texts:
+                return None
+            text, *queued_texts = texts
+        else:
+            text = self._transcribe_utterance(utterance)
         if not text:
-            return
+            return None
 
         if not self.activated:
             is_start, start_text = self._is_start_of_speech(text)
             if not is_start:
                 print("Not activated:", text)
-                return
+                return None
 
             self._activate()
-            self._speak_text("Starting conversation.")
+            self._say("Starting conversation.")
+            if start_text and self.standby_whisper is not None:
+                # The standby model only has to spot the command; re-decode the request itself properly.
+                text = self._speech_to_text(utterance.audio)
+                is_start, start_text = self._is_start_of_speech(text)
+                start_text = start_text if is_start else text
             text = start_text if start_text else ""
 
         if text and self._is_end_of_speech(text):
+            if self.pipeline is not None:
+                self.pipeline.cancel(["respond", "speak"])
             self._deactivate()
-            return
+            return None
 
         if not self.activated or not text:
-            return
+            return None
 
+        if utterance.trace is not None:
+            utterance.trace.mark("stt_done")
         print("User:", text)
-        batched_text = self._build_llm_batch_text(text)
+        return self._build_llm_batch_text(text, queued_texts), utterance.trace
+
+    def _respond(self, text: str, trace: TurnTrace | None = None) -> str | None:
+        llm = self.llm
+        if llm is None:
+            return None
+
         self._play_effect(r"asset/process.wav")
-        response = self.llm.chat(batched_text).strip()
+        response = llm.chat(text, trace=trace).strip()
+        if llm.cancelled.is_set():
+            print("Assistant: (interrupted)")
+            return None
         print("Assistant:", response)
-        self._speak_text(response)
+        return response
+
+    @staticmethod
+    def _prefetch(iterator):
+        """Drain `iterator` on a helper thread so the producer keeps running while items are consumed."""
+        items = queue.Queue()
+        done = object()
+
+        def drain():
+            try:
+                for item in iterator:
+                    items.put((item, None))
+            except Exception as exc:
+                items.put((None, exc))
+            items.put((done, None))
+
+        threading.Thread(target=drain, name="stt-prefetch", daemon=True).start()
+        while True:
+            item, error = items.get()
+            if error is not None:
+                raise error
+            if item is done:
+                return
+            yield item
+
+    def _respond_streaming(self, text: str, trace: TurnTrace | None, speak) -> None:
+        """Hand each sentence of the streamed reply to `speak` as soon as it is complete."""
+        llm = self.llm
+        if llm is None:
+            return
+
+        self._play_effect(r"asset/process.wav")
+        sentences = []
+        for sentence in self._prefetch(llm.chat_stream(text, trace=trace)):
+            if llm.cancelled.is_set():
+                break
+            sentences.append(sentence)
+            speak(sentence)
+
+        if llm.cancelled.is_set():
+            print("Assistant: (interrupted)")
+            return
+        print("Assistant:", " ".join(sentences))
+
+    def _finish_trace(self, trace: TurnTrace | None) -> None:
+        if self.tracer is not None and trace is not None:
+            self.tracer.finish(trace)
+
+    def _say(self, text: str) -> None:
+        if self.pipeline is not None:
+            self.pipeline.submit("speak", (text, None, True))
+        else:
+            self._speak_text(text)
+
+    def _process_utterance(self, utterance: Utterance) -> None:
+        turn = self._transcribe_turn(utterance)
+        if turn is None:
+            return
+
+        text, trace = turn
+        if self.config.llm_stream_enabled:
+            self._respond_streaming(text, trace, lambda sentence: self._speak_text(sentence, trace))
+        else:
+            response = self._respond(text, trace)
+            if response:
+                self._speak_text(response, trace)
+        self._finish_trace(trace)
 
     def _worker_loop(self) -> None:
         while self.running:
             try:
-                frames = self.utterance_queue.get(timeout=0.1)
+                utterance = self.utterance_queue.get(timeout=0.1)
             except queue.Empty:
                 continue
 
             try:
-                self._process_utterance(frames)
+                self._process_utterance(utterance)
             except Exception as exc:
                 print(f"Worker error: {exc}")
+            finally:
+                self.utterance_queue.task_done()
+
+    def _is_idle(self) -> bool:
+        if self.pipeline is not None:
+            return self.pipeline.is_idle()
+        # put() counts an utterance before get() can return it, and the worker
+        # marks it done only after handling it, so there is no idle-looking gap.
+        return self.utterance_queue.unfinished_tasks == 0
+
+    def _finish_audio_source(self) -> None:
+        """Flush the last utterance of a finite source and wait until it has been handled."""
+        print("Audio source ended.")
+        if self.speaking:
+            self._end_utterance()
+        while not self._is_idle():
+            time.sleep(0.05)
+        self.running = False
+
+    def _create_pipeline(self) -> Pipeline:
+        queue_size = max(1, int(self.config.stt_pipeline_queue_size))
+        return Pipeline([
+            Stage("transcribe", self._transcribe_turn, input_queue=self.utterance_queue),
+            Stage("respond", self._respond_stage, maxsize=queue_size),
+            Stage("speak", self._speak_stage, maxsize=queue_size),
+        ])
+
+    def _respond_stage(self, turn: tuple[str, TurnTrace | None]):
+        text, trace = turn
+        if self.config.llm_stream_enabled:
+            epoch = self.pipeline.epoch
+
+            def speak(sentence: str) -> None:
+                if self.pipeline.is_current(epoch):
+                    self.pipeline.submit("speak", (sentence, trace, False))
+
+            self._respond_streaming(text, trace, speak)
+            # Empty final item closes the turn's trace after its last sentence was played.
+            return "", trace, True
+
+        response = self._respond(text, trace)
+        if not response:
+            self._finish_trace(trace)
+            return None
+        return response, trace, True
+
+    def _speak_stage(self, item: tuple[str, TurnTrace | None, bool]) -> None:
+        text, trace, final = item
+        self._speak_text(text, trace)
+        if final:
+            self._finish_trace(trace)
+
+    def pipeline_stats(self) -> dict:
+        """Per-stage queue depth, throughput and utilization (empty when not pipelined)."""
+        if self.pipeline is None:
+            return {}
+        return self.pipeline.stats()
+
+    def _detect_barge_in(self, data: bytes) -> bool:
+        """Keep speech heard during playback and report once it is long enough to interrupt."""
+        if not self.barge_in_vad.is_speech(data):
+            self.capture_buffer.clear()
+            self.barge_in_samples = 0
+            return False
+
+        self.capture_buffer.write(data)
+        self.barge_in_samples += len(data) // 2
+        min_samples = self.config.stt_barge_in_min_speech_ms * self.config.audio_sample_rate * self.config.audio_channels / 1000
+        return self.barge_in_samples >= min_samples
+
+    def _barge_in(self) -> None:
+        print("Barge-in detected. Interrupting playback.")
+        self.barge_in_active = True
+        self.barge_in_samples = 0
+        self.capture_paused_for_tts = False
+        self.speaking = True
+        self.silent_chunks = 0
+        self.vad.reset()
+
+        if self.pipeline is not None:
+            self.pipeline.cancel(["respond", "speak"])
+        llm = self.llm
+        if llm is not None:
+            llm.cancel()
+        tts = self.tts
+        if tts is not None:
+            tts.stop()
+        self.effect_stop.set()
+
+    def _end_utterance(self) -> None:
+        self.speaking = False
+        self.barge_in_active = False
+        min_speech_samples = self.config.stt_vad_min_speech_ms * self.config.audio_sample_rate * self.config.audio_channels / 1000
+        if len(self.capture_buffer) < min_speech_samples:
+            # Too little speech to be a command; skip the Whisper call entirely.
+            self.vad_stats.rejected += 1
+            self._clear_capture_buffers()
+            return
+
+        trace = self.tracer.start_turn() if self.tracer is not None else None
+        if trace is not None:
+            trace.mark("speech_end")
+        utterance = Utterance(self.capture_buffer.to_float32(), self.streamer, trace)
+        self._flush_stream()
+        self.vad_stats.utterances += 1
+        self._enqueue_utterance(utterance)
 
     def process_audio_loop(self) -> None:
         self.running = True
-        self.worker_thread = threading.Thread(target=self._worker_loop, name="stt-worker", daemon=True)
-        self.worker_thread.start()
+        if self.config.stt_pipeline_enabled:
+            self.pipeline = self._create_pipeline()
+            self.pipeline.start()
+        else:
+            self.worker_thread = threading.Thread(target=self._worker_loop, name="stt-worker", daemon=True)
+            self.worker_thread.start()
+        if self.config.stt_streaming_enabled:
+            self.streaming_thread = threading.Thread(target=self._streaming_loop, name="stt-streaming", daemon=True)
+            self.streaming_thread.start()
         self._flush_stream()
 
         while self.running:
-            data = self.microphone.read(self.config.audio_chunk, exception_on_overflow=False)
+            data = self.audio_source.read(self.config.audio_chunk)
+            if not data:
+                self._finish_audio_source()
+                break
+
+            if self.barge_in_active and not self.tts_playing.is_set():
+                self.barge_in_active = False
 
-            if self.tts_playing.is_set():
+            if self.tts_playing.is_set() and not self.barge_in_active:
                 if not self.capture_paused_for_tts:
                     self._clear_capture_buffers()
                     self.capture_paused_for_tts = True
+                    self.barge_in_samples = 0
+                    if self.barge_in_vad is not None:
+                        self.barge_in_vad.reset()
+                if self.barge_in_vad is not None and self._detect_barge_in(data):
+                    self._barge_in()
                 continue
 
             if self.capture_paused_for_tts:
                 self._clear_capture_buffers()
+                self.vad.reset()
                 self.capture_paused_for_tts = False
 
             if self._is_silent(data):
                 self.silent_chunks += 1
                 silence_frames = self.config.silence_limit * self.config.audio_sample_rate / self.config.audio_chunk
                 if self.speaking and self.silent_chunks > silence_frames:
-                    self.speaking = False
-                    utterance = self.audio_frames
-                    self._flush_stream()
-                    self._enqueue_utterance(utterance)
+                    self._end_utterance()
             else:
                 self.silent_chunks = 0
                 if not self.speaking:
                     self.speaking = True
-                self.audio_frames.append(data)
+                    if self.config.stt_streaming_enabled and self.activated:
+                        self.streamer = self._create_streaming_transcriber()
+                        self.last_partial_request = time.monotonic()
+                self.capture_buffer.write(data)
+                if self.capture_buffer.full:
+                    print("Max utterance duration reached. Cutting utterance.")
+                    self._end_utterance()
+                elif self.streamer is not None:
+                    self._request_partial()
 
     def close(self):
         print("Closing...")
         self.running = False
+        print(self.vad_stats.summary())
+        if self.tracer is not None:
+            print(self.tracer.summary())
 
         if self.worker_thread is not None and self.worker_thread.is_alive():
             self.worker_thread.join(timeout=1.0)
             self.worker_thread = None
 
-        if self.microphone is not None:
-            self.microphone.stop_stream()
-            self.microphone.close()
-            self.microphone = None
+        if self.pipeline is not None:
+            for name, stats in self.pipeline.stats().items():
+                print(
+                    f"Stage {name}: {stats['processed']} processed, "
+                    f"{stats['throughput_per_sec']:.2f}/s, "
+                    f"{stats['utilization'] * 100:.0f}% busy, "
+                    f"queue depth {stats['queue_depth']}"
+                )
+            self.pipeline.stop()
+
+        if self.streaming_thread is not None and self.streaming_thread.is_alive():
+            self.streaming_thread.join(timeout=1.0)
+            self.streaming_thread = None
+
+        if self.audio_source is not None:
+            self.audio_source.close()
+            self.audio_source = None
+
+        self.pool.close()
 
         if self.pyaudio is not None:
             self.pyaudio.terminate()
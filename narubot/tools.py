@@ -0,0 +1,257 @@
+import json
+import re
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+
+from .config import Config
+from .utility import available_functions
+from .utility import tool_intents
+from .utility import tool_policies
+
+_START_POLL_SEC = 0.05
+
+
+class _ToolCall:
+    """One pending tool call; `started` is set by the worker that runs it."""
+
+    def __init__(self, index: int, name: str, arguments: dict, function, timeout: float):
+        self.index = index
+        self.name = name
+        self.arguments = arguments
+        self.function = function
+        self.timeout = timeout
+        self.started = None
+        self.executor = None
+        self.future = None
+
+    def run(self):
+        self.started = time.monotonic()
+        return self.function(**self.arguments)
+
+
+class ToolRuntime:
+    """Run tool calls concurrently with per-tool timeouts and a TTL result cache.
+
+    Tools are looked up in `functions`; `policies` maps a tool name to
+    `timeout_sec` and an optional `cache_ttl_sec`. Results are returned as
+    strings in call order (`run`) or as raw values (`execute`). A tool that
+    fails or times out yields an error, so the model can still answer.
+
+    Python cannot stop a running thread. A tool that times out while
+    running keeps its thread until its body returns, so the runtime moves
+    on to a fresh pool and leaves the stuck thread behind instead of letting
+    it shrink the pool for later calls. Tool bodies doing I/O should still
+    pass their own timeouts (e.g. to HTTP requests): abandoned threads are
+    joined at interpreter exit.
+    """
+
+    def __init__(self, functions: dict | None = None, policies: dict | None = None, max_workers: int = 4,
+            default_timeout_sec: float = 5.0):
+        self.functions = available_functions if functions is None else functions
+        self.policies = tool_policies if policies is None else policies
+        self.default_timeout_sec = default_timeout_sec
+        self.max_workers = max(1, int(max_workers))
+        self.executor = self._new_executor()
+        self.abandoned = 0
+        self.cache = {}
+        self.lock = threading.Lock()
+
+    def _new_executor(self) -> ThreadPoolExecutor:
+        return ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="tool")
+
+    def _abandon(self, executor: ThreadPoolExecutor) -> None:
+        """Replace `executor` after one of its threads got stuck in a tool."""
+        with self.lock:
+            if self.executor is not executor:
+                return
+            self.executor = self._new_executor()
+            self.abandoned += 1
+        # Idle threads exit; the stuck one ends whenever its tool returns.
+        executor.shutdown(wait=False)
+
+    def _cache_key(self, name: str, arguments: dict) -> tuple[str, str]:
+        return name, json.dumps(arguments, sort_keys=True, default=str)
+
+    def _cached(self, name: str, arguments: dict) -> tuple[float, object] | None:
+        """Return the (stored_at, output) cache entry if it is still fresh."""
+        ttl = self.policies.get(name, {}).get("cache_ttl_sec")
+        if not ttl:
+            return None
+        with self.lock:
+            entry = self.cache.get(self._cache_key(name, arguments))
+        if entry is None or time.monotonic() - entry[0] > ttl:
+            return None
+        return entry
+
+    def _store(self, name: str, arguments: dict, output) -> None:
+        if self.policies.get(name, {}).get("cache_ttl_sec"):
+            with self.lock:
+                self.cache[self._cache_key(name, arguments)] = (time.monotonic(), output)
+
+    def _submit(self, call: "_ToolCall") -> None:
+        call.executor = self.executor
+        call.future = call.executor.submit(call.run)
+
+    def _requeue(self, waiting: dict) -> dict:
+        """Move calls still queued on an abandoned executor to the current one."""
+        requeued = {}
+        for future, call in waiting.items():
+            if call.executor is not self.executor and call.started is None and future.cancel():
+                self._submit(call)
+            requeued[call.future] = call
+        return requeued
+
+    def execute(self, calls: list[tuple[str, dict]]) -> list[tuple[object, str | None] | None]:
+        """Execute (name, arguments) pairs and return (output, error) per call.
+
+        Outputs are the raw return values; unknown tools yield None. Each
+        call's timeout starts when a worker picks it up, so a call queued
+        behind a slow one is not charged for the wait.
+        """
+        results = [None] * len(calls)
+        waiting = {}
+        for index, (name, arguments) in enumerate(calls):
+            function = self.functions.get(name)
+            if function is None:
+                continue
+            cached = self._cached(name, arguments)
+            if cached is not None:
+                results[index] = (cached[1], None)
+                continue
+            timeout = self.policies.get(name, {}).get("timeout_sec", self.default_timeout_sec)
+            call = _ToolCall(index, name, arguments, function, timeout)
+            self._submit(call)
+            waiting[call.future] = call
+
+        while waiting:
+            waiting = self._requeue(waiting)
+            now = time.monotonic()
+            deadlines = [call.started + call.timeout for call in waiting.values() if call.started is not None]
+            wait_sec = max(0.0, min(deadlines) - now) if deadlines else None
+            if any(call.started is None for call in waiting.values()):
+                # Workers do not signal when they pick a call up, so poll for new starts.
+                wait_sec = _START_POLL_SEC if wait_sec is None else min(wait_sec, _START_POLL_SEC)
+            done, _ = wait(waiting, timeout=wait_sec, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                call = waiting.pop(future)
+                try:
+                    output = future.result()
+                except Exception as exc:
+                    print(f"Tool {call.name} failed: {exc}")
+                    results[call.index] = (None, f"{call.name} failed: {exc}")
+                    continue
+                self._store(call.name, call.arguments, output)
+                results[call.index] = (output, None)
+
+            now = time.monotonic()
+            for future, call in list(waiting.items()):
+                if call.started is None or now - call.started < call.timeout:
+                    continue
+                del waiting[future]
+                if not future.cancel():
+                    # The rest of this batch is requeued on the fresh executor next pass.
+                    self._abandon(call.executor)
+                print(f"Tool {call.name} timed out after {call.timeout:.1f}s")
+                results[call.index] = (None, f"{call.name} timed out after {call.timeout:.1f}s")
+        return results
+
+    def run(self, calls: list[tuple[str, dict]]) -> list[str | None]:
+        """Like `execute`, but formats every result as the string sent back to the model."""
+        return [
+            None if result is None else (f"Error: {result[1]}" if result[1] else str(result[0]))
+            for result in self.execute(calls)
+        ]
+
+    def clear_cache(self) -> None:
+        with self.lock:
+            self.cache.clear()
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def estimate_schema_tokens(tools: list | None) -> int:
+    """Rough prompt cost of tool schemas (about four characters per token)."""
+    return len(json.dumps(tools)) // 4 if tools else 0
+
+
+_STOPWORDS = {
+    "a", "an", "and", "are", "be", "can", "could", "do", "does", "for", "get", "give", "how", "i", "in", "is", "it",
+    "like", "me", "my", "now", "of", "on", "please", "s", "show", "tell", "that", "the", "this", "to", "what",
+    "which", "you", "your",
+}
+
+
+def _keywords(text: str) -> set[str]:
+    return {word for word in re.findall(r"\w+", text.lower()) if word not in _STOPWORDS}
+
+
+def _word_match(word: str, keywords: set[str]) -> bool:
+    if word in keywords:
+        return True
+    # Korean attaches particles to the stem (시간이 -> 시간), so compare prefixes of Hangul words.
+    if re.fullmatch(r"[가-힣]{2,}", word):
+        return any(len(keyword) >= 2 and (word.startswith(keyword) or keyword.startswith(word)) for keyword in keywords)
+    return False
+
+
+class ToolSelector:
+    """Attach only the tool schemas that look relevant to an utterance.
+
+    A tool scores 1.0 when one of its regular expressions in
+    `utility.tool_intents` matches, otherwise the share of the utterance's
+    content words found in its name, description and example utterances.
+    Tools scoring at least `threshold` are attached. When no tool does, the
+    selector is unsure and returns the full list.
+    """
+
+    def __init__(self, tools: list, intents: dict | None = None, threshold: float = 0.3):
+        self.tools = tools
+        self.threshold = threshold
+        intents = tool_intents if intents is None else intents
+        self.profiles = []
+        for tool in tools:
+            function = tool.get("function", {})
+            name = function.get("name", "")
+            intent = intents.get(name, {})
+            texts = [name.replace("_", " "), function.get("description", "")] + intent.get("examples", [])
+            self.profiles.append((
+                set().union(*(_keywords(text) for text in texts)),
+                [re.compile(pattern, re.IGNORECASE) for pattern in intent.get("patterns", [])],
+            ))
+
+    def scores(self, text: str) -> list[float]:
+        words = _keywords(text)
+        scores = []
+        for keywords, patterns in self.profiles:
+            if any(pattern.search(text) for pattern in patterns):
+                scores.append(1.0)
+            elif words:
+                scores.append(sum(_word_match(word, keywords) for word in words) / len(words))
+            else:
+                scores.append(0.0)
+        return scores
+
+    def select(self, text: str) -> list:
+        selected = [tool for tool, score in zip(self.tools, self.scores(text)) if score >= self.threshold]
+        return selected or self.tools
+
+
+_shared_runtime = None
+_shared_lock = threading.Lock()
+
+
+def get_tool_runtime(config: Config) -> ToolRuntime:
+    """Return the process-wide tool runtime, so cached results outlive a single conversation."""
+    global _shared_runtime
+    with _shared_lock:
+        if _shared_runtime is None:
+            _shared_runtime = ToolRuntime(
+                max_workers=config.llm_tool_workers,
+                default_timeout_sec=config.llm_tool_timeout_sec,
+            )
+        return _shared_runtime
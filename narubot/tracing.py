@@ -0,0 +1,126 @@
+import itertools
+import json
+import math
+import threading
+import time
+
+TRACE_POINTS = (
+    "speech_end",
+    "dequeued",
+    "stt_done",
+    "llm_sent",
+    "llm_first_token",
+    "llm_last_token",
+    "tts_first_audio",
+    "playback_done",
+)
+
+# Derived durations reported per turn: name -> (from point, to point).
+TRACE_SPANS = {
+    "queue_wait": ("speech_end", "dequeued"),
+    "stt": ("dequeued", "stt_done"),
+    "llm_time_to_first_token": ("llm_sent", "llm_first_token"),
+    "llm_total": ("llm_sent", "llm_last_token"),
+    "tts_time_to_first_audio": ("llm_first_token", "tts_first_audio"),
+    "playback": ("tts_first_audio", "playback_done"),
+    "voice_to_voice": ("speech_end", "tts_first_audio"),
+    "speech_end_to_response": ("speech_end", "llm_last_token"),
+}
+
+
+class TurnTrace:
+    """Monotonic timestamps for the trace points of one conversation turn."""
+
+    def __init__(self, turn_id: int):
+        self.turn_id = turn_id
+        self.started_at = time.time()
+        self.points = {}
+        self.metrics = {}
+
+    def mark(self, point: str) -> None:
+        """Record `point` the first time it is reached."""
+        self.points.setdefault(point, time.monotonic())
+
+    def update(self, point: str) -> None:
+        """Record `point`, overwriting an earlier timestamp (e.g. last token)."""
+        self.points[point] = time.monotonic()
+
+    def set_metric(self, name: str, value: float) -> None:
+        """Attach a per-turn measurement that is not a timestamp (e.g. prompt_eval_ms)."""
+        self.metrics[name] = value
+
+    def record(self) -> dict:
+        origin = self.points.get("speech_end", min(self.points.values(), default=0.0))
+        spans = {}
+        for name, (start, end) in TRACE_SPANS.items():
+            if start in self.points and end in self.points:
+                spans[name] = (self.points[end] - self.points[start]) * 1000.0
+        return {
+            "turn": self.turn_id,
+            "time": self.started_at,
+            "points_ms": {
+                point: (self.points[point] - origin) * 1000.0
+                for point in TRACE_POINTS
+                if point in self.points
+            },
+            "spans_ms": spans,
+            "metrics": dict(self.metrics),
+        }
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    """Nearest-rank percentile of `values` (0 < fraction <= 1)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+class Tracer:
+    """Collect per-turn traces, write them as JSONL and aggregate session percentiles."""
+
+    def __init__(self, path: str | None = None, callback=None):
+        self.path = path
+        self.callback = callback
+        self.lock = threading.Lock()
+        self.turn_ids = itertools.count(1)
+        self.samples = {name: [] for name in TRACE_SPANS}
+
+    def start_turn(self) -> TurnTrace:
+        return TurnTrace(next(self.turn_ids))
+
+    def finish(self, trace: TurnTrace | None) -> dict | None:
+        if trace is None:
+            return None
+
+        record = trace.record()
+        with self.lock:
+            for name, value in record["spans_ms"].items():
+                self.samples[name].append(value)
+            for name, value in record["metrics"].items():
+                if name.endswith("_ms"):
+                    self.samples.setdefault(name, []).append(value)
+            if self.path:
+                with open(self.path, "a", encoding="utf-8") as file:
+                    file.write(json.dumps(record) + "\n")
+
+        if self.callback is not None:
+            self.callback(record)
+        return record
+
+    def percentiles(self, fractions: tuple[float, ...] = (0.5, 0.9, 0.95, 0.99)) -> dict:
+        with self.lock:
+            return {
+                name: {f"p{int(fraction * 100)}": percentile(values, fraction) for fraction in fractions}
+                for name, values in self.samples.items()
+                if values
+            }
+
+    def summary(self) -> str:
+        lines = ["Turn latency (ms):"]
+        for name, values in self.percentiles().items():
+            lines.append(
+                f"  {name}: " + ", ".join(f"{key}={value:.0f}" for key, value in values.items())
+            )
+        return "\n".join(lines)
@@ -0,0 +1,215 @@
+import numpy as np
+
+from .config import Config
+
+
+class Transcriber:
+    """A faster-whisper model together with the decode settings it is used with."""
+
+    def __init__(self, config: Config, model_name: str, compute_type: str, beam_size: int,
+            vad_filter: bool = False, max_new_tokens: int | None = None,
+            without_timestamps: bool = False, num_workers: int = 1):
+        from faster_whisper import WhisperModel
+
+        self.config = config
+        self.model_name = model_name
+        self.compute_type = compute_type
+        self.beam_size = beam_size
+        self.vad_filter = vad_filter
+        self.max_new_tokens = max_new_tokens
+        self.without_timestamps = without_timestamps
+        self.num_workers = max(1, int(num_workers))  # Concurrent transcribe calls CTranslate2 may run.
+        self.model = self._create_whisper_model(WhisperModel)
+
+    def _create_whisper_model(self, whisper_model_cls):
+        try:
+            return whisper_model_cls(
+                self.model_name,
+                device=self.config.device,
+                compute_type=self.compute_type,
+                cpu_threads=8,
+                num_workers=self.num_workers,
+            )
+        except (RuntimeError, OSError, ValueError) as exc:
+            if not str(self.config.device).startswith("cuda") or not self._is_cuda_runtime_error(exc):
+                raise
+
+            print(
+                "STT CUDA initialization failed. Falling back to CPU. "
+                f"Reason: {exc}"
+            )
+            self.config.device = "cpu"
+            if self.compute_type in {"float16", "int8_float16"}:
+                self.compute_type = "int8"
+                if self.model_name == self.config.stt_model:
+                    self.config.stt_compute_type = self.compute_type
+            return whisper_model_cls(
+                self.model_name,
+                device=self.config.device,
+                compute_type=self.compute_type,
+                cpu_threads=8,
+                num_workers=self.num_workers,
+            )
+
+    @staticmethod
+    def _is_cuda_runtime_error(exc: Exception) -> bool:
+        message = str(exc).lower()
+        cuda_error_markers = (
+            "cublas",
+            "cuda",
+            "cudnn",
+            ".dll",
+            "cannot be loaded",
+            "failed to load",
+            "runtimeerror: library",
+        )
+        return any(marker in message for marker in cuda_error_markers)
+
+    def _transcribe_kwargs(self, beam_size: int, vad_filter: bool, initial_prompt: str | None = None) -> dict:
+        transcribe_kwargs = {
+            "language": self.config.stt_language,
+            "beam_size": beam_size,
+            "vad_filter": vad_filter,
+            "without_timestamps": self.without_timestamps,
+        }
+        if vad_filter:
+            transcribe_kwargs["vad_parameters"] = {
+                "min_silence_duration_ms": self.config.stt_vad_min_silence_ms,
+            }
+        if initial_prompt:
+            transcribe_kwargs["initial_prompt"] = initial_prompt
+        if self.max_new_tokens:
+            transcribe_kwargs["max_new_tokens"] = self.max_new_tokens
+        return transcribe_kwargs
+
+    def transcribe(self, audio, initial_prompt: str | None = None) -> str:
+        if audio is None or len(audio) == 0:
+            return ""
+
+        transcribe_kwargs = self._transcribe_kwargs(self.beam_size, self.vad_filter, initial_prompt)
+        segments, _ = self.model.transcribe(audio, **transcribe_kwargs)
+        return " ".join(segment.text.strip() for segment in segments).strip()
+
+    def transcribe_words(self, audio, initial_prompt: str | None = None, beam_size: int | None = None) -> list[tuple[str, float, float]]:
+        transcribe_kwargs = self._transcribe_kwargs(beam_size or self.beam_size, False, initial_prompt)
+        transcribe_kwargs["without_timestamps"] = False
+        segments, _ = self.model.transcribe(audio, word_timestamps=True, **transcribe_kwargs)
+        return [(word.word, word.start, word.end) for segment in segments for word in (segment.words or [])]
+
+    def transcribe_batch(self, audios: list) -> list[str]:
+        """Transcribe several short utterances in one padded encoder/decoder pass.
+
+        Utterances longer than one 30 s Whisper window fall back to `transcribe`.
+        The batched path decodes without timestamps or temperature fallback,
+        which is fine for the short conversational turns it is used for.
+        """
+        from faster_whisper.audio import pad_or_trim
+
+        texts = [""] * len(audios)
+        feature_extractor = self.model.feature_extractor
+        batch = []
+        for index, audio in enumerate(audios):
+            if audio is None or len(audio) == 0:
+                continue
+            if len(audio) > feature_extractor.n_samples:
+                texts[index] = self.transcribe(audio)
+            else:
+                batch.append(index)
+
+        if len(batch) == 1:
+            texts[batch[0]] = self.transcribe(audios[batch[0]])
+            return texts
+        if not batch:
+            return texts
+
+        features = np.stack([
+            pad_or_trim(feature_extractor(audios[index]), feature_extractor.nb_max_frames)
+            for index in batch
+        ])
+        encoder_output = self._encode_batch(features)
+        tokenizers = self._batch_tokenizers(encoder_output, len(batch))
+        results = self.model.model.generate(
+            encoder_output,
+            [list(tokenizer.sot_sequence) + [tokenizer.no_timestamps] for tokenizer in tokenizers],
+            beam_size=self.beam_size,
+            max_length=self.max_new_tokens or self.model.max_length,
+            suppress_blank=True,
+            suppress_tokens=[-1],
+        )
+        for index, tokenizer, result in zip(batch, tokenizers, results):
+            tokens = [token for token in result.sequences_ids[0] if token < tokenizer.eot]
+            texts[index] = tokenizer.decode(tokens).strip()
+        return texts
+
+    def _encode_batch(self, features):
+        """Encode (N, n_mels, frames) features in one call.
+
+        `WhisperModel.encode` adds a batch axis of its own, which would make
+        this input 4-D, so the CTranslate2 model is called directly.
+        """
+        from faster_whisper.transcribe import get_ctranslate2_storage
+
+        if features.ndim != 3:
+            raise ValueError(f"Expected (batch, n_mels, frames) features, got shape {features.shape}.")
+        whisper = self.model.model
+        to_cpu = whisper.device == "cuda" and len(whisper.device_index) > 1
+        return whisper.encode(get_ctranslate2_storage(features.astype(np.float32)), to_cpu=to_cpu)
+
+    def _batch_tokenizers(self, encoder_output, count: int) -> list:
+        """One tokenizer per utterance: the configured language, or the one Whisper detects for it."""
+        from faster_whisper.tokenizer import Tokenizer
+
+        def tokenizer(language: str | None):
+            return Tokenizer(self.model.hf_tokenizer, self.model.model.is_multilingual, task="transcribe", language=language)
+
+        if self.config.stt_language or not self.model.model.is_multilingual:
+            return [tokenizer(self.config.stt_language or "en")] * count
+        languages = [result[0][0][2:-2] for result in self.model.model.detect_language(encoder_output)]
+        return [tokenizer(language) for language in languages]
+
+    def close(self) -> None:
+        self.model = None
+
+
+def create_conversation_transcriber(config: Config, num_workers: int = 1) -> Transcriber:
+    return Transcriber(
+        config,
+        config.stt_model,
+        config.stt_compute_type,
+        config.stt_beam_size,
+        vad_filter=config.stt_vad_filter,
+        num_workers=num_workers,
+    )
+
+
+def create_standby_transcriber(config: Config) -> Transcriber | None:
+    """Small greedy model that only has to recognize start and magic commands."""
+    if not config.stt_standby_model:
+        return None
+
+    return Transcriber(
+        config,
+        config.stt_standby_model,
+        config.stt_standby_compute_type,
+        config.stt_standby_beam_size,
+        max_new_tokens=config.stt_standby_max_new_tokens,
+        without_timestamps=True,
+    )
+
+
+if __name__ == "__main__":
+    import argparse
+    import wave
+
+    parser = argparse.ArgumentParser(description="Check batched transcription against one-by-one transcription.")
+    parser.add_argument("wav", nargs="+", help="16 kHz mono WAV files, at least two for a real batch.")
+    args = parser.parse_args()
+
+    def load(path: str):
+        with wave.open(path, "rb") as wav:
+            return np.frombuffer(wav.readframes(wav.getnframes()), dtype=np.int16).astype(np.float32) / 32768.0
+
+    transcriber = create_conversation_transcriber(Config())
+    audios = [load(path) for path in args.wav]
+    for path, batched, single in zip(args.wav, transcriber.transcribe_batch(audios), (transcriber.transcribe(audio) for audio in audios)):
+        print(f"{path}: batch {batched!r} / single {single!r}")
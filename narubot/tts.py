@@ -1,20 +1,59 @@
+import os
+import threading
+
+import sounddevice as sd
 from melo.api import TTS as Melo
 from .config import Config
 
 class TTS:
     def __init__(self, config : Config):
         self.config = config
-        self.model = Melo(language=self.config.tts_language, device=self.config.device)
+        if self.config.tts_onnx_dir:
+            from melo.onnx_api import OnnxTTS
+            self.model = OnnxTTS(language=self.config.tts_language, onnx_dir=os.path.expanduser(self.config.tts_onnx_dir))
+        else:
+            self.model = Melo(language=self.config.tts_language, device=self.config.device)
+            if self.config.tts_optimize:
+                self.model.optimize_for_inference(dtype=self.config.tts_dtype)
         self.speaker_id = self.model.hps.data.spk2id[self.config.tts_language]
+        self.interrupted = threading.Event()
+        if self.config.tts_cache_mb:
+            self.model.enable_cache(max_bytes=int(self.config.tts_cache_mb * 1024 * 1024), disk_dir=os.path.expanduser(self.config.tts_cache_dir) if self.config.tts_cache_dir else None)
 
     def text_to_file(self, text: str, file_path: str) -> None:
         self.model.tts_to_file(text, self.speaker_id, 
             speed=self.config.tts_speed, 
             quiet=True, 
-            output_path=file_path)
+            output_path=file_path,
+            batch_size=self.config.tts_batch_size)
 
-    def text_to_speech(self, text: str) -> None:
-        self.model.tts_to_file(text, self.speaker_id, 
-            speed=self.config.tts_speed, 
-            quiet=True, 
-            play_audio=True)
+    def stop(self) -> None:
+        """Interrupt the current `text_to_speech` call as soon as possible."""
+        self.interrupted.set()
+        sd.stop()
+
+    def _wait_for_playback(self) -> None:
+        while not self.interrupted.wait(0.01):
+            if not sd.get_stream().active:
+                return
+        sd.stop()
+
+    def text_to_speech(self, text: str, trace=None) -> None:
+        """Play `text` sentence by sentence while the following sentences are synthesized."""
+        self.interrupted.clear()
+        stream = self.model.tts_stream(text, self.speaker_id,
+            speed=self.config.tts_speed,
+            lookahead=self.config.tts_lookahead,
+            quiet=True)
+        try:
+            for audio in stream:
+                if self.interrupted.is_set():
+                    return
+                if trace is not None:
+                    trace.mark("tts_first_audio")
+                sd.play(audio, samplerate=self.model.hps.data.sampling_rate)
+                self._wait_for_playback()
+        finally:
+            stream.close()
+        if trace is not None and not self.interrupted.is_set():
+            trace.update("playback_done")
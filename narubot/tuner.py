@@ -0,0 +1,230 @@
+import itertools
+import json
+import os
+import time
+import uuid
+
+from .config import Config
+from .history import estimate_tokens
+from .tools import estimate_schema_tokens
+from .tracing import percentile
+from .utility import get_tools
+
+DEFAULT_PROMPT = "Explain in three sentences why the sky is blue."
+DEFAULT_SYSTEM_PROMPT = "You are NaruBot, a friendly voice assistant. Answer briefly in plain spoken sentences."
+# Room for the reply on top of the history budget when choosing num_ctx.
+REPLY_HEADROOM_TOKENS = 512
+
+_HISTORY_EXCHANGES = [
+    ("What's the weather like for a walk this afternoon?", "It looks mild and dry, so a walk sounds like a good idea. Bring a light jacket in case the wind picks up."),
+    ("Can you remind me what we talked about for dinner?", "You were choosing between a vegetable curry and grilled fish, and you wanted something ready in under thirty minutes."),
+    ("오늘 일정 좀 정리해 줄래?", "오전에는 회의가 두 개 있고, 오후에는 장보기와 운동이 남아 있어요. 저녁은 비워 두셨어요."),
+    ("Tell me a short fact about octopuses.", "Octopuses have three hearts and blue blood, and each arm can taste what it touches."),
+]
+
+
+def _profile_path(config: Config) -> str | None:
+    return os.path.expanduser(config.llm_ollama_profile_path) if config.llm_ollama_profile_path else None
+
+
+def _profile_key(host: str, model: str) -> str:
+    return f"{host}|{model}"
+
+
+def load_profile(config: Config) -> dict | None:
+    """Return the tuned {"options": ..., "keep_alive": ...} for the configured host and model."""
+    path = _profile_path(config)
+    if path is None or not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            profiles = json.load(file)
+    except (OSError, ValueError) as exc:
+        print(f"Could not read ollama profile {path}: {exc}")
+        return None
+    return profiles.get(_profile_key(config.llm_ollama_host, config.llm_model))
+
+
+def save_profile(config: Config, profile: dict) -> str:
+    path = _profile_path(config)
+    if path is None:
+        raise ValueError("config.llm_ollama_profile_path is not set.")
+
+    profiles = {}
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as file:
+            profiles = json.load(file)
+    profiles[_profile_key(config.llm_ollama_host, config.llm_model)] = profile
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    temporary = path + ".tmp"
+    with open(temporary, "w", encoding="utf-8") as file:
+        json.dump(profiles, file, indent=2)
+    os.replace(temporary, path)
+    return path
+
+
+def build_messages(config: Config, prompt: str, history_tokens: int) -> list[dict]:
+    """A request shaped like a mid-conversation turn: system prompt, about `history_tokens` of history, then `prompt`."""
+    messages = [{"role": "system", "content": config.llm_system_prompt or DEFAULT_SYSTEM_PROMPT}]
+    size = 0
+    index = 0
+    while size < history_tokens:
+        question, answer = _HISTORY_EXCHANGES[index % len(_HISTORY_EXCHANGES)]
+        for message in ({"role": "user", "content": question}, {"role": "assistant", "content": answer}):
+            messages.append(message)
+            size += estimate_tokens(message)
+        index += 1
+    messages.append({"role": "user", "content": prompt})
+    return messages
+
+
+def min_context(config: Config, tools: list | None) -> int:
+    """Smallest num_ctx that holds a full history budget, the tool schemas and a reply without truncation."""
+    return config.llm_history_token_budget + estimate_schema_tokens(tools) + REPLY_HEADROOM_TOKENS
+
+
+def measure(client, model: str, options: dict, keep_alive: str | None, messages: list[dict],
+        tools: list | None = None, runs: int = 3) -> dict:
+    """Stream `runs` replies with `options` and report time to first token, prefill and decode speed.
+
+    A warm-up request is sent first, because changing num_ctx or num_thread
+    makes ollama reload the model. Every request starts its system prompt
+    with a fresh nonce: ollama reuses a cached prompt prefix, and a repeated
+    prompt would skip the prefill that num_batch controls.
+    """
+    kwargs = {"keep_alive": keep_alive} if keep_alive is not None else {}
+    if tools:
+        kwargs["tools"] = tools
+
+    def fresh():
+        first = dict(messages[0], content=f"[{uuid.uuid4().hex[:8]}] {messages[0]['content']}")
+        return [first] + messages[1:]
+
+    client.chat(model=model, messages=fresh(), stream=False, options=options, **kwargs)
+
+    ttfts = []
+    speeds = []
+    prefill_speeds = []
+    for _ in range(runs):
+        started = time.monotonic()
+        first = None
+        final = {}
+        for chunk in client.chat(model=model, messages=fresh(), stream=True, options=options, **kwargs):
+            if first is None and (chunk.get("message") or {}).get("content"):
+                first = time.monotonic()
+            if chunk.get("done"):
+                final = chunk
+        if first is None:
+            first = time.monotonic()
+        ttfts.append((first - started) * 1000.0)
+        if final.get("eval_count") and final.get("eval_duration"):
+            speeds.append(final["eval_count"] / (final["eval_duration"] / 1e9))
+        if final.get("prompt_eval_count") and final.get("prompt_eval_duration"):
+            prefill_speeds.append(final["prompt_eval_count"] / (final["prompt_eval_duration"] / 1e9))
+
+    return {
+        "ttft_ms": percentile(ttfts, 0.5),
+        "tokens_per_sec": percentile(speeds, 0.5) if speeds else 0.0,
+        "prefill_tokens_per_sec": percentile(prefill_speeds, 0.5) if prefill_speeds else 0.0,
+    }
+
+
+def first_sentence_ms(result: dict, sentence_tokens: int) -> float:
+    """Time until the first spoken sentence is complete: the voice loop's figure of merit."""
+    if result["tokens_per_sec"] <= 0:
+        return float("inf")
+    return result["ttft_ms"] + sentence_tokens / result["tokens_per_sec"] * 1000.0
+
+
+def tune(config: Config, num_batch: list[int], num_ctx: list[int], num_thread: list[int | None],
+        keep_alive: list[str | None], prompt: str = DEFAULT_PROMPT, runs: int = 3, sentence_tokens: int = 20,
+        history_tokens: int | None = None) -> dict | None:
+    """Benchmark every option combination and return the best profile (not yet saved).
+
+    The request mirrors the assistant's: system prompt, tool schemas and a
+    history of `history_tokens` (default: what is left after a trim), so the
+    prompt is long enough for num_batch to matter. num_ctx candidates too
+    small for the history budget are skipped, since ollama would silently
+    truncate the conversation.
+    """
+    import ollama
+
+    tools = get_tools()
+    if history_tokens is None:
+        history_tokens = int(config.llm_history_token_budget * config.llm_history_trim_ratio)
+    messages = build_messages(config, prompt, history_tokens)
+    smallest = min_context(config, tools)
+    contexts = [context for context in num_ctx if context >= smallest]
+    for context in sorted(set(num_ctx) - set(contexts)):
+        print(f"Skipping num_ctx={context}: below {smallest} tokens (history budget + tools + reply).")
+
+    client = ollama.Client(host=config.llm_ollama_host)
+    best = None
+    for batch, context, threads, alive in itertools.product(num_batch, contexts, num_thread, keep_alive):
+        options = {"num_batch": batch, "num_ctx": context}
+        if threads:
+            options["num_thread"] = threads
+        try:
+            result = measure(client, config.llm_model, options, alive, messages, tools, runs)
+        except Exception as exc:
+            print(f"{options} keep_alive={alive}: failed ({exc})")
+            continue
+
+        score = first_sentence_ms(result, sentence_tokens)
+        print(
+            f"{options} keep_alive={alive}: ttft {result['ttft_ms']:.0f} ms, "
+            f"prefill {result['prefill_tokens_per_sec']:.0f} tok/s, "
+            f"{result['tokens_per_sec']:.1f} tok/s, first sentence {score:.0f} ms"
+        )
+        if best is None or score < best["first_sentence_ms"]:
+            best = {
+                "options": options,
+                "keep_alive": alive,
+                "ttft_ms": result["ttft_ms"],
+                "tokens_per_sec": result["tokens_per_sec"],
+                "prefill_tokens_per_sec": result["prefill_tokens_per_sec"],
+                "first_sentence_ms": score,
+                "tuned_at": time.time(),
+            }
+    return best
+
+
+def _int_list(value: str) -> list[int]:
+    return [int(item) for item in value.split(",") if item]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Find the fastest ollama runtime options for the voice loop.")
+    parser.add_argument("--model", default=Config().llm_model)
+    parser.add_argument("--host", default=Config().llm_ollama_host)
+    parser.add_argument("--profile", default=Config().llm_ollama_profile_path, help="Where the best profile is stored.")
+    parser.add_argument("--num-batch", default="128,256,512")
+    parser.add_argument("--num-ctx", default="6144,8192", help="Values below the history budget plus headroom are skipped.")
+    parser.add_argument("--num-thread", default="0", help="Comma separated; 0 keeps ollama's default.")
+    parser.add_argument("--keep-alive", default="30m", help="Comma separated keep_alive values.")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--sentence-tokens", type=int, default=20, help="Tokens in a typical first sentence.")
+    parser.add_argument("--prompt", default=DEFAULT_PROMPT, help="Final user message, after the system prompt and history.")
+    parser.add_argument("--history-tokens", type=int, default=None, help="History before the prompt (default: budget x trim ratio).")
+    args = parser.parse_args()
+
+    config = Config(llm_model=args.model, llm_ollama_host=args.host, llm_ollama_profile_path=args.profile)
+    profile = tune(
+        config,
+        num_batch=_int_list(args.num_batch),
+        num_ctx=_int_list(args.num_ctx),
+        num_thread=[value or None for value in _int_list(args.num_thread)],
+        keep_alive=[value for value in args.keep_alive.split(",") if value] or [None],
+        prompt=args.prompt,
+        runs=args.runs,
+        sentence_tokens=args.sentence_tokens,
+        history_tokens=args.history_tokens,
+    )
+    if profile is None:
+        print("No option set succeeded; nothing saved.")
+    else:
+        print(f"Best: {profile['options']} keep_alive={profile['keep_alive']}")
+        print(f"Saved to {save_profile(config, profile)}")
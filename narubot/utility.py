@@ -61,3 +61,59 @@ available_functions = {
     "get_current_time": get_current_time,
     "get_system_info": get_system_info,
 }
+
+# Execution policy per tool: timeout in seconds and, for tools whose result
+# rarely changes, how long a result may be reused (cache_ttl_sec). The
+# timeout bounds the wait, not the tool itself; tools doing I/O should pass
+# their own, shorter timeouts to it.
+tool_policies = {
+    "get_current_time": {"timeout_sec": 1.0},
+    "get_system_info": {"timeout_sec": 2.0, "cache_ttl_sec": 300.0},
+}
+
+# Phrasings that the intent router may answer without the LLM: regular
+# expressions that must match the whole punctuation-stripped utterance,
+# example utterances for the fuzzy classifier, and reply templates per
+# language filled from the tool result.
+tool_intents = {
+    "get_current_time": {
+        "patterns": [
+            r"(?:hey )?(?:what time is it|what(?:'s| is) the (?:current )?time|tell me the (?:current )?time)(?: right)?(?: now)?(?: please)?",
+            r"(?:지금|현재)?\s*몇\s*시(?:야|예요|에요|인가요|니|냐|지)?",
+            r"(?:지금|현재)\s*시간(?:이|은)?(?:\s*(?:몇\s*시야|어떻게\s*(?:돼|돼요|되나요)|알려\s*(?:줘|주세요)))?",
+        ],
+        "examples": [
+            "what time is it",
+            "what time is it now",
+            "tell me the time",
+            "current time please",
+            "지금 몇 시야",
+            "몇 시예요",
+            "현재 시간 알려줘",
+            "지금 시간이 어떻게 돼",
+        ],
+        "templates": {
+            "en": "It's {hour}:{minute:02d}.",
+            "ko": "지금은 {hour}시 {minute}분입니다.",
+        },
+    },
+    "get_system_info": {
+        "patterns": [
+            r"(?:(?:show|tell) me )?(?:the )?system info(?:rmation)?(?: please)?",
+            r"what (?:os|operating system)(?: is this| are you running(?: on)?)?",
+            r"시스템\s*정보(?:\s*(?:알려|보여)\s*(?:줘|주세요))?",
+            r"(?:무슨|어떤)\s*운영\s*체제(?:야|예요|에요|인가요)?",
+        ],
+        "examples": [
+            "show me the system information",
+            "what operating system are you running on",
+            "what os is this",
+            "시스템 정보 알려줘",
+            "어떤 운영체제야",
+        ],
+        "templates": {
+            "en": "This is {os} {release} on {machine}, running Python {python_version}.",
+            "ko": "{os} {release}, {machine}에서 파이썬 {python_version}으로 실행 중입니다.",
+        },
+    },
+}
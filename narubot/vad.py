@@ -0,0 +1,222 @@
+import numpy as np
+
+from .config import Config
+
+
+class VADStats:
+    """Per-run counters for the capture-side voice activity detector."""
+
+    def __init__(self):
+        self.chunks = 0
+        self.speech_chunks = 0
+        self.utterances = 0
+        self.rejected = 0
+
+    @property
+    def whisper_calls_avoided(self) -> int:
+        return self.rejected
+
+    def summary(self) -> str:
+        return (
+            f"VAD stats: {self.speech_chunks}/{self.chunks} speech chunks, "
+            f"{self.utterances} utterances queued, "
+            f"{self.whisper_calls_avoided} Whisper calls avoided"
+        )
+
+
+class VAD:
+    """Frame-level voice activity detector.
+
+    Subclasses implement `frame_flags`, which classifies every frame of an
+    int16 chunk at once. A chunk counts as speech when at least
+    `speech_ratio` of its frames do.
+    """
+
+    def __init__(self, sample_rate: int, frame_ms: int = 10, speech_ratio: float = 0.5):
+        self.sample_rate = sample_rate
+        self.frame_size = max(1, int(sample_rate * frame_ms / 1000))
+        self.speech_ratio = speech_ratio
+
+    def reset(self) -> None:
+        pass
+
+    def _frames(self, samples):
+        count = len(samples) // self.frame_size
+        if count == 0:
+            return samples[np.newaxis, :]
+        return samples[:count * self.frame_size].reshape(count, self.frame_size)
+
+    def _frame_energy(self, samples):
+        return np.abs(self._frames(samples).astype(np.float32)).mean(axis=1)
+
+    def frame_flags(self, samples):
+        raise NotImplementedError
+
+    def is_speech(self, data) -> bool:
+        samples = np.frombuffer(data, dtype=np.int16) if isinstance(data, (bytes, bytearray, memoryview)) else data
+        if len(samples) == 0:
+            return False
+        return bool(self.frame_flags(samples).mean() >= self.speech_ratio)
+
+
+def _hysteresis(state: bool, enter, leave):
+    """Vectorized two-threshold state machine.
+
+    Frames above `enter` switch on, frames below `leave` switch off and frames
+    in between carry the last decided state forward.
+    """
+    decided = enter | leave
+    index = np.where(decided, np.arange(len(decided)), -1)
+    np.maximum.accumulate(index, out=index)
+    flags = np.where(index >= 0, enter[np.maximum(index, 0)], state)
+    return flags.astype(bool)
+
+
+class EnergyVAD(VAD):
+    """Mean-abs energy detector with separate on/off thresholds."""
+
+    def __init__(self, sample_rate: int, threshold: float, hysteresis_ratio: float = 0.6, frame_ms: int = 10, speech_ratio: float = 0.5):
+        super().__init__(sample_rate, frame_ms, speech_ratio)
+        self.enter_threshold = float(threshold)
+        self.leave_threshold = float(threshold) * float(hysteresis_ratio)
+        self.state = False
+
+    def reset(self) -> None:
+        self.state = False
+
+    def frame_flags(self, samples):
+        energy = self._frame_energy(samples)
+        flags = _hysteresis(self.state, energy >= self.enter_threshold, energy < self.leave_threshold)
+        self.state = bool(flags[-1])
+        return flags
+
+
+class AdaptiveVAD(VAD):
+    """Energy detector whose thresholds track an estimated noise floor."""
+
+    def __init__(self, sample_rate: int, initial_floor: float, enter_ratio: float = 3.0, leave_ratio: float = 2.0,
+            min_threshold: float = 100.0, frame_ms: int = 10, speech_ratio: float = 0.5,
+            floor_alpha: float = 0.05, floor_alpha_speech: float = 0.002):
+        super().__init__(sample_rate, frame_ms, speech_ratio)
+        self.initial_floor = float(initial_floor)
+        self.noise_floor = self.initial_floor
+        self.enter_ratio = enter_ratio
+        self.leave_ratio = leave_ratio
+        self.min_threshold = min_threshold
+        self.floor_alpha = floor_alpha
+        self.floor_alpha_speech = floor_alpha_speech
+        self.state = False
+
+    def reset(self) -> None:
+        self.state = False
+
+    def frame_flags(self, samples):
+        energy = self._frame_energy(samples)
+        enter_threshold = max(self.min_threshold, self.noise_floor * self.enter_ratio)
+        leave_threshold = max(self.min_threshold, self.noise_floor * self.leave_ratio)
+        flags = _hysteresis(self.state, energy >= enter_threshold, energy < leave_threshold)
+        self.state = bool(flags[-1])
+
+        noise = energy[~flags]
+        if len(noise) > 0:
+            self.noise_floor += self.floor_alpha * (float(noise.mean()) - self.noise_floor)
+        else:
+            # Creep toward the current level so a sustained noise step cannot lock the detector on.
+            self.noise_floor += self.floor_alpha_speech * (float(energy.mean()) - self.noise_floor)
+        return flags
+
+
+class SileroVAD(VAD):
+    """Small neural VAD using the Silero ONNX model bundled with faster-whisper."""
+
+    window_size = 512
+
+    def __init__(self, sample_rate: int, threshold: float = 0.5, hysteresis_ratio: float = 0.7, speech_ratio: float = 0.5):
+        from faster_whisper.vad import get_vad_model
+
+        super().__init__(sample_rate, frame_ms=int(self.window_size * 1000 / sample_rate), speech_ratio=speech_ratio)
+        self.frame_size = self.window_size
+        self.model = get_vad_model()
+        self.enter_threshold = threshold
+        self.leave_threshold = threshold * hysteresis_ratio
+        self.model_state = None
+        self.model_context = None
+        self.pending = np.zeros(0, dtype=np.float32)
+        self.state = False
+        self.smoke_check()
+        self.reset()
+
+    def reset(self) -> None:
+        # faster-whisper's Silero v5 wrapper carries an RNN state and the tail of the previous window.
+        self.model_state, self.model_context = self.model.get_initial_states(batch_size=1)
+        self.pending = np.zeros(0, dtype=np.float32)
+        self.state = False
+
+    def _probability(self, window) -> float:
+        output, self.model_state, self.model_context = self.model(
+            window[np.newaxis, :], self.model_state, self.model_context, self.sample_rate
+        )
+        return float(np.asarray(output).reshape(-1)[0])
+
+    def smoke_check(self) -> float:
+        """Run one silent window through the model so API or model problems surface at startup."""
+        self.reset()
+        probability = self._probability(np.zeros(self.window_size, dtype=np.float32))
+        if not 0.0 <= probability <= 1.0:
+            raise RuntimeError(f"Silero VAD returned {probability}, expected a probability.")
+        self.reset()
+        return probability
+
+    def frame_flags(self, samples):
+        audio = np.concatenate([self.pending, samples.astype(np.float32) / 32768.0])
+        count = len(audio) // self.window_size
+        self.pending = audio[count * self.window_size:]
+        if count == 0:
+            return np.array([self.state])
+
+        windows = audio[:count * self.window_size].reshape(count, self.window_size)
+        probabilities = np.empty(count, dtype=np.float32)
+        for index, window in enumerate(windows):
+            probabilities[index] = self._probability(window)
+
+        flags = _hysteresis(self.state, probabilities >= self.enter_threshold, probabilities < self.leave_threshold)
+        self.state = bool(flags[-1])
+        return flags
+
+
+def create_vad(config: Config, threshold_scale: float = 1.0) -> VAD:
+    """Build the configured VAD; `threshold_scale` > 1 makes it stricter (e.g. over speaker echo)."""
+    engine = (config.stt_vad_engine or "energy").lower()
+    if engine == "energy":
+        return EnergyVAD(
+            config.audio_sample_rate,
+            config.silence_threshold * threshold_scale,
+            hysteresis_ratio=config.stt_vad_hysteresis_ratio,
+            frame_ms=config.stt_vad_frame_ms,
+        )
+    if engine == "adaptive":
+        return AdaptiveVAD(
+            config.audio_sample_rate,
+            config.silence_threshold / config.stt_vad_adaptive_ratio,
+            enter_ratio=config.stt_vad_adaptive_ratio * threshold_scale,
+            leave_ratio=config.stt_vad_adaptive_ratio * config.stt_vad_hysteresis_ratio * threshold_scale,
+            frame_ms=config.stt_vad_frame_ms,
+        )
+    if engine == "silero":
+        # A probability cannot simply be multiplied; shrink the distance to 1.0 instead (0.5 at scale 2 -> 0.75).
+        threshold = 1.0 - (1.0 - config.stt_vad_speech_threshold) / max(threshold_scale, 1e-6)
+        return SileroVAD(config.audio_sample_rate, threshold=min(max(threshold, 0.0), 0.99))
+    raise ValueError(f"Unknown VAD engine: {config.stt_vad_engine}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run one second of silence through the configured VAD.")
+    parser.add_argument("--engine", default=Config().stt_vad_engine, choices=["energy", "adaptive", "silero"])
+    args = parser.parse_args()
+
+    config = Config(stt_vad_engine=args.engine)
+    vad = create_vad(config)
+    flags = vad.frame_flags(np.zeros(config.audio_sample_rate, dtype=np.int16))
+    print(f"{args.engine}: {len(flags)} frames, {int(np.sum(flags))} speech")